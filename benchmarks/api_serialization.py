@@ -0,0 +1,97 @@
+"""
+Compare DRF serialization of the API lists with the values() fast path.
+
+    python benchmarks/api_serialization.py [--repeat N]
+
+Each list serializer is timed on 10, 100 and 1000 objects, query and JSON
+encoding included, in a throwaway test database. Results are per object.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'portfolio_project.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import connection  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+from rest_framework.request import Request  # noqa: E402
+from rest_framework.test import APIRequestFactory  # noqa: E402
+
+from main.fast_serializers import RowSerializer, encode  # noqa: E402
+from main.models import BlogPost, Project, Skill  # noqa: E402
+from main.serializers import BlogPostListSerializer, ProjectListSerializer, SkillSerializer  # noqa: E402
+
+SIZES = (10, 100, 1000)
+
+
+def populate(count):
+    Project.objects.bulk_create([
+        Project(
+            title=f'Project {i}', description='A project ' * 50, image=f'projects/{i}.jpg',
+            project_url=f'https://example.com/{i}', technologies='Django Python', featured=i % 5 == 0,
+        )
+        for i in range(count)
+    ])
+    Skill.objects.bulk_create([Skill(name=f'Skill {i}', proficiency=i % 100, category='Backend') for i in range(count)])
+    for i in range(count):
+        post = BlogPost(
+            title=f'Post {i}', slug=f'post-{i}', content='<p>Body</p>' * 200, excerpt='An excerpt',
+            featured_image=f'blog/{i}.jpg', published=True,
+        )
+        post.save()
+        post.tags.add('django', f'tag-{i % 20}')
+
+
+def time_per_object(function, size, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best / size * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        populate(max(SIZES))
+        request = Request(APIRequestFactory().get('/api/'))
+        lists = [
+            (ProjectListSerializer, Project.objects.order_by('-date_created', '-id')),
+            (SkillSerializer, Skill.objects.order_by('category', 'id')),
+            (BlogPostListSerializer, BlogPost.objects.published().order_by('-created_at', '-id')),
+        ]
+        print(f'{"serializer":<24} {"objects":>7} {"DRF µs/obj":>11} {"fast µs/obj":>12} {"speedup":>8}')
+        for serializer_class, queryset in lists:
+            serializer = serializer_class(context={'request': request})
+            row_serializer = RowSerializer.compile(serializer)
+            for size in SIZES:
+                def drf():
+                    items = queryset.prefetch_related('tags') if serializer_class is BlogPostListSerializer else queryset
+                    data = serializer_class(items[:size], many=True, context={'request': request}).data
+                    return JSONRenderer().render(data)
+
+                def fast():
+                    return encode(row_serializer.serialize(queryset.values(*row_serializer.columns)[:size]))
+
+                assert drf() == fast()
+                slow, quick = time_per_object(drf, size, args.repeat), time_per_object(fast, size, args.repeat)
+                print(f'{serializer_class.__name__:<24} {size:>7} {slow:>11.1f} {quick:>12.1f} {slow / quick:>7.1f}x')
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
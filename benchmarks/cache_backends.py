@@ -0,0 +1,88 @@
+"""
+Compare cache hit latency of LocMemCache and SQLiteCache under the gunicorn
+worker model (several forked processes reading the same keys).
+
+    python benchmarks/cache_backends.py [--workers N] [--reads N]
+
+Besides latency, each run checks whether a value written by one worker is
+visible to the others, which is what generation-based invalidation needs.
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'portfolio_project.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.core.cache.backends.locmem import LocMemCache  # noqa: E402
+
+from main.cache_backends import SQLiteCache  # noqa: E402
+
+KEYS = [f'content:bench:{i}' for i in range(100)]
+VALUE = {'title': 'Project', 'description': 'x' * 500, 'tags': ['django', 'python']}
+
+
+def make_backends(directory):
+    return {
+        'locmem': lambda: LocMemCache('bench', {}),
+        'sqlite': lambda: SQLiteCache(os.path.join(directory, 'bench.sqlite3'), {}),
+    }
+
+
+def worker(factory, reads, barrier, results):
+    cache = factory()
+    barrier.wait()
+    start = time.perf_counter()
+    for i in range(reads):
+        cache.get(KEYS[i % len(KEYS)])
+    elapsed = time.perf_counter() - start
+    results.put(elapsed / reads)
+
+
+def run(name, factory, workers, reads):
+    cache = factory()
+    cache.clear()
+    for key in KEYS:
+        cache.set(key, VALUE, None)
+    cache.set('content-generation:bench', 1, None)
+
+    ctx = multiprocessing.get_context('fork')
+    barrier = ctx.Barrier(workers)
+    results = ctx.Queue()
+    procs = [ctx.Process(target=worker, args=(factory, reads, barrier, results)) for _ in range(workers)]
+    for proc in procs:
+        proc.start()
+    latencies = [results.get() for _ in procs]
+    for proc in procs:
+        proc.join()
+
+    # Bump in a child, read back in the parent
+    bump = ctx.Process(target=lambda: factory().incr('content-generation:bench'))
+    bump.start()
+    bump.join()
+    shared = cache.get('content-generation:bench') == 2
+
+    mean = sum(latencies) / len(latencies) * 1e6
+    print(f'{name:<8} workers={workers:<3} hit latency {mean:8.2f} us/get   cross-worker invalidation: {"yes" if shared else "no"}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workers', type=int, default=multiprocessing.cpu_count() * 2 + 1)
+    parser.add_argument('--reads', type=int, default=20000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        for name, factory in make_backends(directory).items():
+            run(name, factory, args.workers, args.reads)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""
+Compare import_content with saving the same rows one by one through the ORM.
+
+    python benchmarks/content_import.py [--rows N]
+
+N rows (100,000 by default) of projects, tagged blog posts, skills and
+testimonials are written to an NDJSON file, then loaded into a throwaway
+test database twice: with ``import_content`` (batched upserts, signals
+suppressed) and with ``update_or_create()`` plus ``tags.set()`` per row,
+which runs every signal handler, as saving in the admin does.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'portfolio_project.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.core.cache import cache  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test.utils import override_settings, setup_test_environment  # noqa: E402
+
+from main.importer import read_ndjson  # noqa: E402
+from main.models import BlogPost  # noqa: E402
+
+CONTENT = '<h2>Section</h2><p>' + 'Some words of a blog post. ' * 40 + '</p>'
+
+
+def record(i):
+    kind = i % 10
+    if kind < 4:
+        return {'model': 'main.project', 'fields': {
+            'title': f'Project {i}', 'description': 'A project. ' * 20, 'image': f'projects/{i}.jpg',
+            'project_url': f'https://example.com/{i}', 'technologies': 'Django Python', 'featured': kind == 0,
+        }}
+    if kind < 7:
+        return {'model': 'main.blogpost', 'fields': {
+            'title': f'Post {i}', 'slug': f'post-{i}', 'content': CONTENT, 'excerpt': 'An excerpt',
+            'featured_image': f'blog/{i}.jpg', 'published': True, 'tags': ['django', f'tag-{i % 50}'],
+        }}
+    if kind < 9:
+        return {'model': 'main.skill', 'fields': {'name': f'Skill {i}', 'proficiency': i % 100, 'category': 'Backend'}}
+    return {'model': 'main.testimonial', 'fields': {'client_name': f'Client {i}', 'content': 'Great work', 'rating': 5}}
+
+
+def one_by_one(path):
+    with open(path, encoding='utf-8') as handle:
+        for _, model, _, fields in read_ndjson(handle):
+            fields = dict(fields)
+            tags = fields.pop('tags', None)
+            if model is BlogPost:
+                obj, _ = BlogPost.objects.update_or_create(slug=fields.pop('slug'), defaults=fields)
+            else:
+                obj = model.objects.create(**fields)
+            if tags is not None:
+                obj.tags.set(tags)
+
+
+def timed(label, rows, function):
+    cache.clear()
+    start = time.perf_counter()
+    function()
+    elapsed = time.perf_counter() - start
+    print(f'{label:<12} {elapsed:8.1f} s   {rows / elapsed:8.0f} rows/s')
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        with tempfile.TemporaryDirectory() as directory, override_settings(
+            IMAGE_WORKERS=0, MEDIA_ROOT=directory,
+            CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+        ):
+            path = os.path.join(directory, 'content.ndjson')
+            with open(path, 'w', encoding='utf-8') as handle:
+                for i in range(args.rows):
+                    handle.write(json.dumps(record(i)) + '\n')
+
+            bulk = timed('bulk', args.rows, lambda: call_command('import_content', path, verbosity=0, stdout=open(os.devnull, 'w')))
+            call_command('flush', interactive=False, verbosity=0)
+            single = timed('one by one', args.rows, lambda: one_by_one(path))
+            print(f'speedup      {single / bulk:8.1f}x')
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
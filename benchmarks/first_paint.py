@@ -0,0 +1,150 @@
+"""
+Estimate first contentful paint of the main page types, Lighthouse style.
+
+    python benchmarks/first_paint.py [--rtt MS] [--throughput KBITS]
+
+Pages are rendered through Django from the configured database, then the
+load is simulated the way Lighthouse's "simulated throttling" does it (slow
+4G by default: 150 ms round trips, 1.6 Mbit/s): the HTML, then every
+render-blocking stylesheet and script in ``<head>`` must arrive before the
+first paint. Each new origin costs a DNS + TCP + TLS setup (3 round trips),
+each request one more, and all bytes share the link, gzipped.
+
+Three setups are compared:
+
+* ``cdn``      the libraries from their CDNs, as before vendoring (needs network)
+* ``bundle``   one self-hosted bundle, render-blocking
+* ``critical`` critical CSS inlined, the bundle loaded async, scripts deferred
+
+Run ``manage.py vendor_assets`` first so the bundle and critical CSS exist.
+"""
+import argparse
+import gzip
+import os
+import sys
+import time
+import urllib.parse
+from html.parser import HTMLParser
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'portfolio_project.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.staticfiles import finders  # noqa: E402
+from django.test.utils import override_settings  # noqa: E402
+
+from main.assets import BUNDLE_CSS, AssetError, bundle_available, fetch  # noqa: E402
+from main.critical import PAGES, render_page  # noqa: E402
+
+ORIGIN_SETUP_RTTS = 3
+
+
+class BlockingResources(HTMLParser):
+    """Collect stylesheets and synchronous scripts in <head>, outside <noscript>"""
+
+    def __init__(self):
+        super().__init__()
+        self.urls = []
+        self.in_head = True
+        self.in_noscript = False
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == 'noscript':
+            self.in_noscript = True
+        if not self.in_head or self.in_noscript:
+            return
+        if tag == 'link' and attrs.get('rel') == 'stylesheet' and attrs.get('media') in (None, 'all', 'screen'):
+            self.urls.append(attrs['href'])
+        elif tag == 'script' and attrs.get('src') and not {'defer', 'async'} & set(attrs):
+            self.urls.append(attrs['src'])
+
+    def handle_endtag(self, tag):
+        if tag == 'noscript':
+            self.in_noscript = False
+        elif tag == 'head':
+            self.in_head = False
+
+
+_sizes = {}
+
+
+def transfer_size(url):
+    """Gzipped size of a local static file or a remote URL"""
+    if url not in _sizes:
+        if url.startswith(settings.STATIC_URL):
+            with open(finders.find(url[len(settings.STATIC_URL):]), 'rb') as handle:
+                data = handle.read()
+        else:
+            data = fetch(url)
+        _sizes[url] = len(gzip.compress(data, 9))
+    return _sizes[url]
+
+
+def simulate(html, server_ms, rtt, bytes_per_ms):
+    """Return ``(blocking requests, blocking bytes, estimated FCP in ms)``"""
+    parser = BlockingResources()
+    parser.feed(html)
+    page_bytes = len(gzip.compress(html.encode(), 9))
+    # Connection to the site, request, server time, HTML download
+    fcp = ORIGIN_SETUP_RTTS * rtt + rtt + server_ms + page_bytes / bytes_per_ms
+
+    origins = {urllib.parse.urlsplit(url).netloc for url in parser.urls} - {''}
+    setup = (ORIGIN_SETUP_RTTS * rtt if origins else 0) + (rtt if parser.urls else 0)
+    blocking_bytes = sum(transfer_size(url) for url in parser.urls)
+    return len(parser.urls), blocking_bytes, fcp + setup + blocking_bytes / bytes_per_ms
+
+
+def render(url):
+    start = time.perf_counter()
+    html = render_page(url)
+    return html, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rtt', type=float, default=150, help='Round trip time in ms')
+    parser.add_argument('--throughput', type=float, default=1638.4, help='Link speed in Kbit/s')
+    args = parser.parse_args()
+    bytes_per_ms = args.throughput * 1024 / 8 / 1000
+
+    if not bundle_available(BUNDLE_CSS):
+        sys.exit('No CSS bundle; run "python manage.py vendor_assets" first')
+
+    setups = {
+        'cdn': [mock.patch('main.templatetags.assets.bundle_available', return_value=False)],
+        'bundle': [mock.patch('main.templatetags.assets.critical_css', return_value=None)],
+        'critical': [],
+    }
+    # Render every page afresh rather than from the page cache
+    with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}):
+        for page, get_url in PAGES.items():
+            url = get_url()
+            if url is None:
+                print(f'{page}: nothing to render')
+                continue
+            for name, patches in setups.items():
+                for patch in patches:
+                    patch.start()
+                try:
+                    html, server_ms = render(url)
+                    requests, size, fcp = simulate(html, server_ms, args.rtt, bytes_per_ms)
+                except AssetError as error:
+                    print(f'{page:<15} {name:<9} skipped: {error}')
+                    continue
+                finally:
+                    for patch in patches:
+                        patch.stop()
+                print(
+                    f'{page:<15} {name:<9} html {len(html) / 1024:6.1f} KiB   '
+                    f'blocking {requests} requests {size / 1024:6.1f} KiB   FCP ~{fcp:6.0f} ms'
+                )
+
+
+if __name__ == '__main__':
+    main()
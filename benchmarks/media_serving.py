@@ -0,0 +1,115 @@
+"""
+Compare media throughput of django.views.static.serve and main.media.serve_media.
+
+    python benchmarks/media_serving.py [--requests N] [--size BYTES]
+
+Requests go through Django's WSGI handler. The server side is emulated the
+way gunicorn works: bodies handed to ``wsgi.file_wrapper`` are sent with
+``os.sendfile()``, anything else is iterated and written, both into
+/dev/null. A second run asks for 64 KiB ranges, which only the new view
+answers with 206 (the old one sends the whole file).
+"""
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'portfolio_project.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.core.handlers.wsgi import WSGIHandler  # noqa: E402
+from django.test.utils import override_settings  # noqa: E402
+from django.urls import path  # noqa: E402
+from django.views.static import serve  # noqa: E402
+
+from main.media import serve_media  # noqa: E402
+
+
+class SendfileWrapper:
+    """gunicorn's FileWrapper: send file bodies with sendfile()"""
+
+    def __init__(self, filelike, block_size=8192):
+        self.filelike = filelike
+        self.block_size = block_size
+
+    def close(self):
+        self.filelike.close()
+
+
+def make_urlconf(root):
+    return type('urls', (), {'urlpatterns': [
+        path('old/<path:path>', serve, {'document_root': root}),
+        path('new/<path:path>', serve_media, {'document_root': root}),
+    ]})
+
+
+def request(handler, url, sink, range_header=None):
+    environ = {
+        'REQUEST_METHOD': 'GET', 'PATH_INFO': url, 'SERVER_NAME': 'localhost', 'SERVER_PORT': '80',
+        'wsgi.input': io.BytesIO(), 'wsgi.url_scheme': 'http', 'wsgi.file_wrapper': SendfileWrapper,
+    }
+    if range_header:
+        environ['HTTP_RANGE'] = range_header
+    state = {}
+
+    def start_response(status, headers):
+        state['length'] = int(dict(headers).get('Content-Length', -1))
+
+    body = handler(environ, start_response)
+    sent = 0
+    try:
+        if isinstance(body, SendfileWrapper):
+            fileno = body.filelike.fileno()
+            offset = os.lseek(fileno, 0, os.SEEK_CUR)
+            remaining = state['length']
+            while remaining > 0:
+                count = os.sendfile(sink, fileno, offset + sent, remaining)
+                if count == 0:
+                    break
+                sent += count
+                remaining -= count
+        else:
+            for chunk in body:
+                sent += os.write(sink, chunk)
+    finally:
+        if hasattr(body, 'close'):
+            body.close()
+    return sent
+
+
+def run(handler, url, count, sink, range_header=None):
+    sent = 0
+    start = time.perf_counter()
+    for _ in range(count):
+        sent += request(handler, url, sink, range_header)
+    elapsed = time.perf_counter() - start
+    return count / elapsed, sent / elapsed / 2 ** 20, sent / count / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--size', type=int, default=4 * 2 ** 20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        with open(os.path.join(root, 'photo.jpg'), 'wb') as handle:
+            handle.write(os.urandom(args.size))
+        sink = os.open(os.devnull, os.O_WRONLY)
+        with override_settings(ROOT_URLCONF=make_urlconf(root), ALLOWED_HOSTS=['*'], DEBUG=False):
+            handler = WSGIHandler()
+            for label, range_header in (('full file', None), ('64 KiB range', 'bytes=65536-131071')):
+                for name in ('old', 'new'):
+                    rate, throughput, body = run(handler, f'/{name}/photo.jpg', args.requests, sink, range_header)
+                    print(f'{label:<13} {name}: {rate:8.1f} req/s {throughput:9.1f} MiB/s {body:8.0f} KiB/response')
+        os.close(sink)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Measure the cost of a rate limit check with each cache backend.
+
+    python benchmarks/ratelimit.py [--checks N]
+
+"allowed" is the fast path for a new client (one get_many plus one add or
+incr per rule); "throttled" is a client already over its limit (one
+get_many). Both use the two rules applied to contact form POSTs.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'portfolio_project.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.core.cache import cache  # noqa: E402
+from django.test.utils import override_settings  # noqa: E402
+
+from main.ratelimit import SlidingWindow, consume, email_hash  # noqa: E402
+
+
+def backends(directory):
+    return {
+        'locmem': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+        'sqlite': {'BACKEND': 'main.cache_backends.SQLiteCache', 'LOCATION': os.path.join(directory, 'bench.sqlite3')},
+    }
+
+
+def measure(checks, ident):
+    ip_rule = SlidingWindow('bench-ip', '1000000/h')
+    email_rule = SlidingWindow('bench-email', '1000000/h')
+    start = time.perf_counter()
+    for i in range(checks):
+        consume([(ip_rule, ident(i)), (email_rule, email_hash(f'visitor{ident(i)}@example.com'))])
+    return (time.perf_counter() - start) / checks * 1e6
+
+
+def measure_throttled(checks):
+    rule = SlidingWindow('bench-blocked', '1/h')
+    consume([(rule, 'spammer')])
+    start = time.perf_counter()
+    for _ in range(checks):
+        consume([(rule, 'spammer')])
+    return (time.perf_counter() - start) / checks * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--checks', type=int, default=20000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        for name, config in backends(directory).items():
+            with override_settings(CACHES={'default': config}):
+                cache.clear()
+                allowed_new = measure(args.checks, lambda i: f'10.0.{i // 256 % 256}.{i % 256}')
+                allowed_repeat = measure(args.checks, lambda i: '10.1.0.1')
+                throttled = measure_throttled(args.checks)
+            print(
+                f'{name:<8} allowed (new client) {allowed_new:7.2f} us   '
+                f'allowed (repeat) {allowed_repeat:7.2f} us   throttled {throttled:7.2f} us'
+            )
+
+
+if __name__ == '__main__':
+    main()
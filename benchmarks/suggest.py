@@ -0,0 +1,67 @@
+"""
+Time autocomplete lookups against a memory-mapped suggestion index.
+
+    python benchmarks/suggest.py [--entries N] [--lookups N]
+
+An index of N synthetic projects, posts, technologies and tags (5,000 by
+default) is written to a temporary file, then prefix and misspelt queries
+are looked up in it. The suggest endpoint is meant to answer in well under
+5 ms per lookup.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'portfolio_project.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from main.suggest import KIND_ORDER, SuggestIndex, build_snapshot, write_snapshot  # noqa: E402
+
+WORDS = [
+    'django', 'python', 'postgres', 'redis', 'portfolio', 'caching', 'search', 'react', 'docker', 'deploy',
+    'testing', 'async', 'images', 'feeds', 'sitemap', 'gunicorn', 'nginx', 'celery', 'websockets', 'api',
+]
+QUERIES = ['dja', 'pyth', 'port', 'cach', 'djnago', 'pyhton', 'serch', 'r', 'web', 'doc']
+
+
+def entries(count):
+    rng = random.Random(0)
+    result = []
+    for i in range(count):
+        kind = KIND_ORDER[i % len(KIND_ORDER)]
+        label = ' '.join(rng.sample(WORDS, 3)).title() + f' {i}'
+        result.append((label, f'/{kind}/{i}/', kind))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--entries', type=int, default=5000)
+    parser.add_argument('--lookups', type=int, default=10000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'suggest.idx')
+        write_snapshot(path, build_snapshot(entries(args.entries)))
+        index = SuggestIndex(path)
+        try:
+            for query in QUERIES:
+                index.suggest(query)
+            start = time.perf_counter()
+            for i in range(args.lookups):
+                index.suggest(QUERIES[i % len(QUERIES)])
+            elapsed = time.perf_counter() - start
+        finally:
+            index.close()
+    print(f'{args.lookups} lookups in {elapsed:.2f} s   {elapsed / args.lookups * 1e6:.0f} µs/lookup')
+
+
+if __name__ == '__main__':
+    main()
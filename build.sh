@@ -8,6 +8,12 @@ pip install -r requirements.txt
 # Apply database migrations
 python manage.py migrate
 
+# Rebuild the full-text search index
+python manage.py rebuild_search_index
+
+# Render blog posts with the current renderer
+python manage.py render_posts
+
 # Create superuser (optional - only for initial setup)
 python -c "
 import os
@@ -1,13 +1,15 @@
 from django.contrib import admin
 from django.urls import path
 from django.shortcuts import render
-from django.db.models import Count, Q
+from django.db.models import Count, DateField, Q
+from django.db.models.functions import TruncDate, TruncMonth
 from django.utils import timezone
 from django.utils.html import format_html, mark_safe
 from django.urls import reverse
 from django.core.exceptions import ValidationError
-from datetime import timedelta
-from .models import Profile, Project, Skill, Testimonial, BlogPost, ContactMessage
+from datetime import date, datetime, time, timedelta
+from .cache import bump_generation_on_commit, get_content
+from .models import Profile, Project, Skill, Testimonial, BlogPost, ContactMessage, OutboundEmail
 
 class CustomAdminSite(admin.AdminSite):
     site_header = "Portfolio Administration"
@@ -22,53 +24,95 @@ class CustomAdminSite(admin.AdminSite):
         return custom_urls + urls
     
     def dashboard_view(self, request):
-        # Calculate statistics
-        total_projects = Project.objects.count()
-        featured_projects = Project.objects.filter(featured=True).count()
-        total_skills = Skill.objects.count()
-        total_testimonials = Testimonial.objects.count()
-        featured_testimonials = Testimonial.objects.filter(featured=True).count()
-        total_blog_posts = BlogPost.objects.count()
-        published_blog_posts = BlogPost.objects.filter(published=True).count()
-        total_contacts = ContactMessage.objects.count()
-        unread_contacts = ContactMessage.objects.filter(read=False).count()
-        
-        # Recent activity
-        recent_projects = Project.objects.all().order_by('-date_created')[:5]
-        recent_messages = ContactMessage.objects.all().order_by('-timestamp')[:5]
-        recent_posts = BlogPost.objects.filter(published=True).order_by('-created_at')[:5]
-        
-        # Chart data (simplified)
-        project_data = {
-            'total': total_projects,
-            'featured': featured_projects,
-        }
-        
-        message_data = {
-            'total': total_contacts,
-            'unread': unread_contacts,
-        }
-        
+        # Statistics are rebuilt only when content changes or the day rolls over
+        today = timezone.localdate()
+        stats = get_content(f'dashboard:{today.isoformat()}', DASHBOARD_MODELS, lambda: dashboard_statistics(today))
+
         context = {
             **self.each_context(request),
             'title': 'Dashboard',
-            'total_projects': total_projects,
-            'featured_projects': featured_projects,
-            'total_skills': total_skills,
-            'total_testimonials': total_testimonials,
-            'featured_testimonials': featured_testimonials,
-            'total_blog_posts': total_blog_posts,
-            'published_blog_posts': published_blog_posts,
-            'total_contacts': total_contacts,
-            'unread_contacts': unread_contacts,
-            'recent_projects': recent_projects,
-            'recent_messages': recent_messages,
-            'recent_posts': recent_posts,
-            'project_data': project_data,
-            'message_data': message_data,
+            **stats,
         }
         return render(request, 'admin/dashboard.html', context)
 
+
+# Dashboard statistics
+
+DASHBOARD_MODELS = [Project, Skill, Testimonial, BlogPost, ContactMessage]
+MESSAGE_DAYS = 30
+POST_MONTHS = 12
+
+
+def _with_percent(series):
+    """Add each point's height relative to the largest value for the bar charts"""
+    peak = max((point['count'] for point in series), default=0) or 1
+    for point in series:
+        point['percent'] = round(point['count'] * 100 / peak)
+    return series
+
+
+def _start_of(day):
+    # Compare against a datetime so the timestamp indexes can be used
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def messages_per_day(today):
+    start = today - timedelta(days=MESSAGE_DAYS - 1)
+    counts = dict(
+        ContactMessage.objects.filter(timestamp__gte=_start_of(start))
+        .annotate(day=TruncDate('timestamp'))
+        .values_list('day')
+        .annotate(count=Count('id'))
+        .order_by()
+    )
+    days = [start + timedelta(days=offset) for offset in range(MESSAGE_DAYS)]
+    return _with_percent([{'date': day, 'count': counts.get(day, 0)} for day in days])
+
+
+def posts_per_month(today):
+    months = []
+    year, month = today.year, today.month
+    for _ in range(POST_MONTHS):
+        months.append(date(year, month, 1))
+        year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+    months.reverse()
+    counts = dict(
+        BlogPost.objects.filter(published=True, created_at__gte=_start_of(months[0]))
+        .annotate(month=TruncMonth('created_at', output_field=DateField()))
+        .values_list('month')
+        .annotate(count=Count('id'))
+        .order_by()
+    )
+    return _with_percent([{'date': month, 'count': counts.get(month, 0)} for month in months])
+
+
+def dashboard_statistics(today):
+    """Collect the dashboard figures with a fixed number of queries"""
+    projects = Project.objects.aggregate(total=Count('id'), featured=Count('id', filter=Q(featured=True)))
+    skills = Skill.objects.aggregate(total=Count('id'))
+    testimonials = Testimonial.objects.aggregate(total=Count('id'), featured=Count('id', filter=Q(featured=True)))
+    posts = BlogPost.objects.aggregate(total=Count('id'), published=Count('id', filter=Q(published=True)))
+    messages = ContactMessage.objects.aggregate(total=Count('id'), unread=Count('id', filter=Q(read=False)))
+
+    return {
+        'total_projects': projects['total'],
+        'featured_projects': projects['featured'],
+        'total_skills': skills['total'],
+        'total_testimonials': testimonials['total'],
+        'featured_testimonials': testimonials['featured'],
+        'total_blog_posts': posts['total'],
+        'published_blog_posts': posts['published'],
+        'total_contacts': messages['total'],
+        'unread_contacts': messages['unread'],
+        'recent_projects': list(Project.objects.order_by('-date_created', '-id')[:5]),
+        'recent_messages': list(ContactMessage.objects.order_by('-timestamp')[:5]),
+        'recent_posts': list(BlogPost.objects.published().order_by('-created_at', '-id')[:5]),
+        'project_data': {'total': projects['total'], 'featured': projects['featured']},
+        'message_data': {'total': messages['total'], 'unread': messages['unread']},
+        'messages_per_day': messages_per_day(today),
+        'posts_per_month': posts_per_month(today),
+    }
+
 # Create an instance of the custom admin site
 custom_admin_site = CustomAdminSite(name='custom_admin')
 
@@ -144,7 +188,7 @@ class BlogPostAdmin(admin.ModelAdmin):
     list_filter = ('published', 'created_at')
     search_fields = ('title', 'content', 'excerpt')
     list_editable = ('published',)
-    readonly_fields = ('created_at', 'updated_at')
+    readonly_fields = ('created_at', 'updated_at', 'word_count', 'reading_time')
     prepopulated_fields = {'slug': ('title',)}
     
     fieldsets = (
@@ -158,7 +202,7 @@ class BlogPostAdmin(admin.ModelAdmin):
             'fields': ('featured_image',)
         }),
         ('Metadata', {
-            'fields': ('published',)
+            'fields': ('published', ('word_count', 'reading_time'))
         }),
         ('Dates', {
             'fields': ('created_at', 'updated_at'),
@@ -173,16 +217,31 @@ class ContactMessageAdmin(admin.ModelAdmin):
     list_editable = ('read',)
     readonly_fields = ('name', 'email', 'subject', 'message', 'timestamp')
     
+    # update() bypasses the save signals that refresh the dashboard
     def mark_as_read(self, request, queryset):
         queryset.update(read=True)
+        bump_generation_on_commit(ContactMessage)
     mark_as_read.short_description = "Mark selected messages as read"
     
     def mark_as_unread(self, request, queryset):
         queryset.update(read=False)
+        bump_generation_on_commit(ContactMessage)
     mark_as_unread.short_description = "Mark selected messages as unread"
     
     actions = [mark_as_read, mark_as_unread]
 
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'status', 'attempts', 'next_attempt_at', 'sent_at')
+    list_filter = ('status',)
+    search_fields = ('subject', 'recipients', 'last_error')
+    readonly_fields = ('subject', 'body', 'from_email', 'recipients', 'reply_to', 'attempts', 'last_error', 'created_at', 'sent_at')
+    
+    def retry_now(self, request, queryset):
+        queryset.exclude(status='sent').update(status='pending', next_attempt_at=timezone.now())
+    retry_now.short_description = "Retry selected emails now"
+    
+    actions = [retry_now]
+
 # Register models with custom admin site only (not with both)
 custom_admin_site.register(Profile, ProfileAdmin)
 custom_admin_site.register(Project, ProjectAdmin)
@@ -190,6 +249,7 @@ custom_admin_site.register(Skill, SkillAdmin)
 custom_admin_site.register(Testimonial, TestimonialAdmin)
 custom_admin_site.register(BlogPost, BlogPostAdmin)
 custom_admin_site.register(ContactMessage, ContactMessageAdmin)
+custom_admin_site.register(OutboundEmail, OutboundEmailAdmin)
 
 # OPTIONAL: If you want to keep the default admin as well, 
 #comment out the registrations below
@@ -198,4 +258,5 @@ admin.site.register(Project, ProjectAdmin)
 admin.site.register(Skill, SkillAdmin)
 admin.site.register(Testimonial, TestimonialAdmin)
 admin.site.register(BlogPost, BlogPostAdmin)
-admin.site.register(ContactMessage, ContactMessageAdmin)
\ No newline at end of file
+admin.site.register(ContactMessage, ContactMessageAdmin)
+admin.site.register(OutboundEmail, OutboundEmailAdmin)
\ No newline at end of file
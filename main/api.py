@@ -1,15 +1,217 @@
-from rest_framework import viewsets
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.decorators import method_decorator
+from rest_framework import permissions, status, viewsets
+from rest_framework.exceptions import ParseError, ValidationError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from .cache import CONTENT_TIMEOUT, conditional_by_generation, content_generation
+from .contact import submit_contact
+from .export import export_lines, export_models, parse_since
+from .fast_serializers import RowSerializer, encode
+from .forms import ContactForm
+from .ratelimit import ContactRateThrottle
 from .models import Project, Skill, BlogPost
-from .serializers import ProjectSerializer, SkillSerializer, BlogPostSerializer
+from .pagination import KeysetPagination
+from .serializers import (
+    ProjectListSerializer, ProjectSerializer, SkillSerializer, BlogPostListSerializer, BlogPostSerializer,
+)
+
+def _field_names(value):
+    return [name.strip() for name in value.split(',') if name.strip()] if value else []
+
+class SparseFieldsMixin:
+    """Lean list responses and ``?fields=``/``?omit=`` sparse fieldsets.
+
+    Lists use ``list_serializer_class``, which leaves out the large fields.
+    ``?fields=a,b`` keeps only the named fields and ``?omit=a,b`` drops
+    them. The queryset reads just the columns behind the selected fields
+    (``.only()``), and prefetches a relation in ``field_prefetches`` only
+    when its field is selected.
+    """
+    list_serializer_class = None
+    field_prefetches = {}
+    
+    def get_serializer_class(self):
+        if self.action == 'list' and self.list_serializer_class is not None:
+            return self.list_serializer_class
+        return super().get_serializer_class()
+    
+    def selected_fields(self):
+        """Return ``{name: serializer field}`` for the fields to output"""
+        if not hasattr(self, '_selected_fields'):
+            fields = self.get_serializer_class()().fields
+            params = self.request.query_params if self.request is not None else {}
+            requested, omitted = _field_names(params.get('fields')), _field_names(params.get('omit'))
+            unknown = sorted({*requested, *omitted} - set(fields))
+            if unknown:
+                raise ValidationError({'fields': [f'Unknown field: {name}' for name in unknown]})
+            self._selected_fields = {
+                name: field for name, field in fields.items()
+                if (not requested or name in requested) and name not in omitted
+            }
+        return self._selected_fields
+    
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault('fields', list(self.selected_fields()))
+        return super().get_serializer(*args, **kwargs)
+    
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        model = queryset.model
+        # The pagination seeks on the ordering fields
+        columns = {model._meta.pk.name, *(name.lstrip('-') for name in getattr(self, 'keyset_ordering', ()))}
+        for name, field in self.selected_fields().items():
+            if name in self.field_prefetches:
+                queryset = queryset.prefetch_related(self.field_prefetches[name])
+                continue
+            try:
+                model_field = model._meta.get_field(field.source.split('.')[0])
+            except FieldDoesNotExist:
+                continue
+            if model_field.concrete and not model_field.many_to_many:
+                columns.add(model_field.name)
+        return queryset.only(*columns)
+
+class FastListMixin:
+    """Serve JSON list pages from ``values()`` rows (see main.fast_serializers).
+
+    Set ``API_FAST_SERIALIZATION = False`` to always go through DRF.
+    """
+    def row_serializer(self, request):
+        renderer = request.accepted_renderer
+        if not getattr(settings, 'API_FAST_SERIALIZATION', True) or type(renderer) is not JSONRenderer:
+            return None
+        if renderer.get_indent(request.accepted_media_type, {}) is not None:
+            return None
+        return RowSerializer.compile(self.get_serializer())
+    
+    def list(self, request, *args, **kwargs):
+        row_serializer = self.row_serializer(request)
+        if row_serializer is None:
+            return super().list(request, *args, **kwargs)
+        # The pagination seeks on the ordering fields
+        columns = {*row_serializer.columns, *(name.lstrip('-') for name in getattr(self, 'keyset_ordering', ()))}
+        queryset = self.filter_queryset(self.get_queryset()).prefetch_related(None).values(*columns)
+        page = self.paginate_queryset(queryset)
+        if page is None:
+            data = row_serializer.serialize(queryset)
+        else:
+            data = self.get_paginated_response(row_serializer.serialize(page)).data
+        return HttpResponse(encode(data), content_type=JSONRenderer.media_type)
 
-class ProjectViewSet(viewsets.ReadOnlyModelViewSet):
+class CachedResponseMixin:
+    """Cache rendered JSON list and detail responses until ``cache_models`` change.
+
+    The key covers the URL with the ``cache_query_params`` it was given, in
+    any order, and the content generation of the models, which
+    ``main.signals`` bumps on every change. Other parameters are ignored, so
+    they cannot fill the cache with copies of a page; responses to requests
+    carrying them are served from the cache but not stored, as their links
+    repeat the parameters. Hits return the stored bytes without touching the
+    database; throttling and content negotiation still run first. The
+    browsable API is never cached.
+    """
+    cache_models = None
+    # Pagination and sparse fieldsets; add a viewset's filter parameters
+    cache_query_params = ('cursor', 'count', 'fields', 'omit')
+    
+    def response_cache_key(self, request):
+        models = self.cache_models or (self.queryset.model,)
+        params = sorted(
+            (name, values) for name, values in request.query_params.lists() if name in self.cache_query_params
+        )
+        parts = (request.build_absolute_uri(request.path), repr(params), request.accepted_media_type)
+        digest = hashlib.md5('|'.join(parts).encode()).hexdigest()
+        return f'api:{self.basename}:{self.action}:{digest}:{content_generation(*models)}'
+    
+    def cached_response(self, handler, request, *args, **kwargs):
+        if type(request.accepted_renderer) is not JSONRenderer:
+            return handler(request, *args, **kwargs)
+        key = self.response_cache_key(request)
+        cached = cache.get(key)
+        if cached is not None:
+            content, content_type = cached
+            return HttpResponse(content, content_type=content_type)
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200 and set(request.query_params) <= set(self.cache_query_params):
+            if isinstance(response, Response):
+                # Render now rather than in finalize_response() to store the bytes
+                response.accepted_renderer = request.accepted_renderer
+                response.accepted_media_type = request.accepted_media_type
+                response.renderer_context = self.get_renderer_context()
+                response.render()
+            cache.set(key, (response.content, response['Content-Type']), CONTENT_TIMEOUT)
+        return response
+    
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+    
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+@method_decorator(conditional_by_generation(Project), name='dispatch')
+class ProjectViewSet(CachedResponseMixin, FastListMixin, SparseFieldsMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Project.objects.all()
     serializer_class = ProjectSerializer
+    list_serializer_class = ProjectListSerializer
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-date_created', '-id')
 
-class SkillViewSet(viewsets.ReadOnlyModelViewSet):
+@method_decorator(conditional_by_generation(Skill), name='dispatch')
+class SkillViewSet(CachedResponseMixin, FastListMixin, SparseFieldsMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Skill.objects.all()
     serializer_class = SkillSerializer
+    pagination_class = KeysetPagination
+    keyset_ordering = ('category', 'id')
+
+@method_decorator(conditional_by_generation(BlogPost), name='dispatch')
+class BlogPostViewSet(CachedResponseMixin, FastListMixin, SparseFieldsMixin, viewsets.ReadOnlyModelViewSet):
+    queryset = BlogPost.objects.published()
+    serializer_class = BlogPostSerializer
+    list_serializer_class = BlogPostListSerializer
+    field_prefetches = {'tags': 'tags'}
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-created_at', '-id')
+
+class ContactView(APIView):
+    """Accept a contact message as JSON; validated like the contact form"""
+    authentication_classes = []
+    throttle_classes = [ContactRateThrottle]
+    
+    def post(self, request):
+        form = ContactForm(request.data)
+        if not form.is_valid():
+            return Response({'success': False, 'errors': form.errors}, status=status.HTTP_400_BAD_REQUEST)
+        submit_contact(form.cleaned_data)
+        return Response(
+            {'success': True, 'message': 'Your message has been sent successfully!'},
+            status=status.HTTP_202_ACCEPTED,
+        )
+
+class ExportView(APIView):
+    """Stream every content object as NDJSON (see main.export); staff only.
 
-class BlogPostViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = BlogPost.objects.filter(published=True)
-    serializer_class = BlogPostSerializer
\ No newline at end of file
+    ``?since=<ISO date or datetime>`` exports only rows changed since then and
+    ``?models=project,blogpost`` limits the models.
+    """
+    permission_classes = [permissions.IsAdminUser]
+    
+    def get(self, request):
+        started = timezone.now()
+        try:
+            since = parse_since(request.query_params['since']) if request.query_params.get('since') else None
+            models = export_models(_field_names(request.query_params.get('models')))
+        except ValueError as error:
+            raise ParseError(str(error))
+        response = StreamingHttpResponse(export_lines(models, since), content_type='application/x-ndjson')
+        response['Content-Disposition'] = 'attachment; filename="portfolio.ndjson"'
+        # Pass as ``since`` next time to pick up only later changes
+        response['X-Export-Started'] = started.isoformat()
+        return response
@@ -0,0 +1,341 @@
+"""
+Self-hosted front-end assets.
+
+The site used to pull Bootstrap, Font Awesome, Poppins and AOS from four
+CDNs on every page. ``manage.py vendor_assets`` (run by ``collectstatic``)
+downloads the pinned versions into ``static/main/vendor/`` and bundles them
+with the site's own CSS and JS into ``main/vendor/site.css``
+and ``main/vendor/site.js``:
+
+* Font Awesome is cut down to the icons the templates and scripts use, and
+  its fonts to those glyphs when fontTools is installed
+* Poppins is fetched as WOFF2, Latin subsets only
+* CSS is minified (rcssmin if installed), JS concatenated (and minified by
+  rjsmin if installed), source map comments dropped
+
+The static storage then hashes the bundles and writes ``.br``/``.gz``
+siblings, which WhiteNoise serves with a year-long cache lifetime. Until a
+bundle exists, templates fall back to the CDN links; whether it exists is
+looked up once per process, so a running server picks up a new bundle when
+it restarts.
+"""
+import io
+import logging
+import os
+import posixpath
+import re
+import urllib.request
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+
+logger = logging.getLogger(__name__)
+
+BOOTSTRAP_VERSION = '5.3.0'
+FONT_AWESOME_VERSION = '6.4.0'
+AOS_VERSION = '2.3.1'
+
+BOOTSTRAP_CSS = f'https://cdn.jsdelivr.net/npm/bootstrap@{BOOTSTRAP_VERSION}/dist/css/bootstrap.min.css'
+BOOTSTRAP_JS = f'https://cdn.jsdelivr.net/npm/bootstrap@{BOOTSTRAP_VERSION}/dist/js/bootstrap.bundle.min.js'
+FONT_AWESOME_BASE = f'https://cdnjs.cloudflare.com/ajax/libs/font-awesome/{FONT_AWESOME_VERSION}/'
+FONT_AWESOME_CSS = FONT_AWESOME_BASE + 'css/all.min.css'
+POPPINS_CSS = 'https://fonts.googleapis.com/css2?family=Poppins:wght@300;400;500;600;700&display=swap'
+AOS_CSS = f'https://unpkg.com/aos@{AOS_VERSION}/dist/aos.css'
+AOS_JS = f'https://unpkg.com/aos@{AOS_VERSION}/dist/aos.js'
+
+# In page order; what base.html links to when there is no bundle
+CDN_CSS = (BOOTSTRAP_CSS, FONT_AWESOME_CSS, POPPINS_CSS, AOS_CSS)
+CDN_JS = (BOOTSTRAP_JS, AOS_JS)
+LOCAL_CSS = ('main/css/style.css',)
+LOCAL_JS = ('main/js/script.js',)
+
+# Below main/: jazzmin already ships a top-level vendor/ directory
+VENDOR_DIR = 'main/vendor'
+BUNDLE_CSS = 'main/vendor/site.css'
+BUNDLE_JS = 'main/vendor/site.js'
+FONTS_DIR = 'fonts'
+
+# Google Fonts only sends WOFF2 to browsers that support it
+WOFF2_USER_AGENT = (
+    'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36'
+)
+FONT_SUBSETS = ('latin', 'latin-ext')
+FETCH_TIMEOUT = 30
+
+ICON_CLASS_RE = re.compile(r'\bfa-([a-z0-9]+(?:-[a-z0-9]+)*)')
+ICON_SELECTOR_RE = re.compile(r'^\.fa-([a-z0-9-]+)::?(?:before|after)$')
+ICON_BODY_RE = re.compile(r'^\{\s*content:\s*"((?:\\.|[^"\\])*)"\s*;?\s*\}$', re.S)
+CSS_ESCAPE_RE = re.compile(r'\\([0-9a-fA-F]{1,6})\s?|\\(.)', re.S)
+URL_RE = re.compile(r'url\(\s*([\'"]?)([^\'")]+)\1\s*\)')
+NON_WOFF2_SRC_RE = re.compile(r',?\s*url\([^)]*\.(?:ttf|woff|eot|svg)(?:[?#][^)]*)?[\'"]?\)\s*format\([^)]*\)')
+SOURCE_MAP_RE = re.compile(r'^\s*(?://[#@]|/\*[#@])\s*sourceMappingURL=.*$', re.M)
+GOOGLE_FACE_RE = re.compile(r'/\*\s*([\w-]+)\s*\*/\s*(@font-face\s*\{[^}]*\})')
+CSS_TOKEN_RE = re.compile(r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'|/\*.*?\*/', re.S)
+
+
+class AssetError(Exception):
+    pass
+
+
+def fetch(url, user_agent=WOFF2_USER_AGENT):
+    request = urllib.request.Request(url, headers={'User-Agent': user_agent})
+    try:
+        with urllib.request.urlopen(request, timeout=FETCH_TIMEOUT) as response:
+            return response.read()
+    except OSError as error:
+        raise AssetError(f'Could not download {url}: {error}') from error
+
+
+def output_root():
+    return settings.STATICFILES_DIRS[0]
+
+
+_available = {}
+
+
+def bundle_available(name):
+    """Whether static file ``name`` exists; looked up once per process and ``STATICFILES_DIRS``"""
+    key = (name, tuple(settings.STATICFILES_DIRS))
+    if key not in _available:
+        _available[key] = finders.find(name) is not None
+    return _available[key]
+
+
+# CSS helpers
+
+def split_rules(css):
+    """Split a stylesheet into top-level statements: rules, at-rule blocks and ``;`` statements"""
+    rules, depth, start = [], 0, 0
+    position = 0
+    while position < len(css):
+        char = css[position]
+        if char in '"\'' or css.startswith('/*', position):
+            match = CSS_TOKEN_RE.match(css, position)
+            if match:
+                position = match.end()
+                continue
+        if char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                rules.append(css[start:position + 1].strip())
+                start = position + 1
+        elif char == ';' and depth == 0:
+            rules.append(css[start:position + 1].strip())
+            start = position + 1
+        position += 1
+    if css[start:].strip():
+        rules.append(css[start:].strip())
+    return [rule for rule in rules if rule]
+
+
+def unescape_css(value):
+    def replace(match):
+        if match.group(1):
+            return chr(int(match.group(1), 16))
+        return match.group(2)
+    return CSS_ESCAPE_RE.sub(replace, value)
+
+
+def rebase_urls(css, source_dir, target_dir):
+    """Rewrite relative ``url()``s of a stylesheet moved from ``source_dir`` to ``target_dir``"""
+    def replace(match):
+        quote, url = match.groups()
+        if re.match(r'^(?:[a-z]+:|/|#)', url):
+            return match.group(0)
+        path = posixpath.normpath(posixpath.join(source_dir, url))
+        return f'url({quote}{posixpath.relpath(path, target_dir)}{quote})'
+    return URL_RE.sub(replace, css)
+
+
+def _squeeze(css):
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{};,>])\s*', r'\1', css)
+    # Only declarations have a space after the colon; "a :hover" must stay
+    css = re.sub(r'\s*:\s+', ':', css)
+    # Tokens may touch strings and comments, so edges can be trimmed too
+    return css.replace(';}', '}').strip()
+
+
+def minify_css(css):
+    try:
+        import rcssmin
+    except ImportError:
+        pass
+    else:
+        return rcssmin.cssmin(css, keep_bang_comments=True)
+
+    # Whitespace and comments only; strings and /*! licence */ comments are kept
+    parts, position = [], 0
+    for match in CSS_TOKEN_RE.finditer(css):
+        parts.append(_squeeze(css[position:match.start()]))
+        token = match.group(0)
+        if not token.startswith('/*'):
+            parts.append(token)
+        elif token.startswith('/*!'):
+            parts.append(token + '\n')
+        position = match.end()
+    parts.append(_squeeze(css[position:]))
+    return ''.join(parts).strip()
+
+
+def minify_js(js):
+    try:
+        import rjsmin
+    except ImportError:
+        return js.strip()
+    return rjsmin.jsmin(js, keep_bang_comments=True)
+
+
+def strip_source_maps(text):
+    return SOURCE_MAP_RE.sub('', text)
+
+
+# Font Awesome
+
+def used_icons(paths):
+    """Return the ``fa-*`` class names found in the files below ``paths``"""
+    names = set()
+    for path in paths:
+        for directory, _, filenames in os.walk(path):
+            for filename in filenames:
+                if os.path.splitext(filename)[1] in ('.html', '.js', '.txt', '.py'):
+                    with open(os.path.join(directory, filename), encoding='utf-8', errors='ignore') as handle:
+                        names.update(ICON_CLASS_RE.findall(handle.read()))
+    return names
+
+
+def icon_sources():
+    """Directories whose templates and scripts may use Font Awesome classes"""
+    paths = [directory for engine in settings.TEMPLATES for directory in engine.get('DIRS', [])]
+    paths += [os.path.join(directory, 'main', 'js') for directory in settings.STATICFILES_DIRS]
+    return paths
+
+
+def subset_font_awesome(css, icons):
+    """Drop the icon rules of ``css`` not in ``icons``.
+
+    Returns the stylesheet, with fonts moved to ``fonts/`` and only their
+    WOFF2 sources, and the code points of the kept icons.
+    """
+    kept, codepoints = [], set()
+    for rule in split_rules(css):
+        brace = rule.find('{')
+        selectors = [selector.strip() for selector in rule[:brace].split(',')] if brace > 0 else []
+        matches = [ICON_SELECTOR_RE.match(selector) for selector in selectors]
+        body = ICON_BODY_RE.match(rule[brace:]) if brace > 0 else None
+        if not selectors or not all(matches) or not body:
+            kept.append(rule)
+            continue
+        used = [selector for selector, match in zip(selectors, matches) if match.group(1) in icons]
+        if used:
+            kept.append(','.join(used) + rule[brace:])
+            codepoints.update(ord(char) for char in unescape_css(body.group(1)))
+
+    css = '\n'.join(kept)
+    css = NON_WOFF2_SRC_RE.sub('', css).replace('src:,', 'src:')
+    css = re.sub(r'url\((["\']?)\.\./webfonts/', rf'url(\1{FONTS_DIR}/', css)
+    return css, codepoints
+
+
+def subset_font(data, codepoints):
+    """Keep only the glyphs for ``codepoints``; needs fontTools (and brotli for WOFF2)"""
+    try:
+        from fontTools import subset
+        from fontTools.ttLib import TTFont
+    except ImportError:
+        return data
+    try:
+        font = TTFont(io.BytesIO(data))
+        options = subset.Options()
+        options.flavor = 'woff2'
+        subsetter = subset.Subsetter(options)
+        subsetter.populate(unicodes=codepoints)
+        subsetter.subset(font)
+        buffer = io.BytesIO()
+        font.save(buffer)
+    except Exception as error:
+        # Ship the font whole rather than fail the build
+        logger.warning('Could not subset font: %s', error)
+        return data
+    return buffer.getvalue()
+
+
+def font_awesome(icons):
+    """Return ``(css, {font name: data})`` for the subset of Font Awesome in use"""
+    css, codepoints = subset_font_awesome(fetch(FONT_AWESOME_CSS).decode(), icons)
+    fonts = {}
+    for _, url in URL_RE.findall(css):
+        name = posixpath.basename(url)
+        if url.startswith(f'{FONTS_DIR}/') and name not in fonts:
+            fonts[name] = subset_font(fetch(FONT_AWESOME_BASE + 'webfonts/' + name), codepoints)
+    return css, fonts
+
+
+# Poppins
+
+def google_fonts(url, subsets=FONT_SUBSETS):
+    """Return ``(css, {font name: data})`` of a Google Fonts stylesheet, self-hosted"""
+    css = fetch(url).decode()
+    faces, fonts = [], {}
+    for subset, face in GOOGLE_FACE_RE.findall(css):
+        if subset not in subsets:
+            continue
+        family = re.search(r"font-family:\s*'?([^';]+)", face).group(1).lower().replace(' ', '-')
+        weight = re.search(r'font-weight:\s*(\d+)', face).group(1)
+        for _, font_url in URL_RE.findall(face):
+            name = f'{family}-{weight}-{subset}{posixpath.splitext(font_url)[1]}'
+            fonts[name] = fetch(font_url)
+            face = face.replace(font_url, f'{FONTS_DIR}/{name}')
+        faces.append(face)
+    return '\n'.join(faces), fonts
+
+
+# Building
+
+def read_local(name):
+    path = finders.find(name)
+    if path is None:
+        raise AssetError(f'Static file {name} not found')
+    with open(path, encoding='utf-8') as handle:
+        return handle.read()
+
+
+def build(icons):
+    """Download and bundle everything; returns ``{path below static/: bytes}``"""
+    vendor_css = [('bootstrap.min.css', fetch(BOOTSTRAP_CSS).decode())]
+    fa_css, fonts = font_awesome(icons)
+    vendor_css.append(('font-awesome.css', fa_css))
+    poppins_css, poppins_fonts = google_fonts(POPPINS_CSS)
+    fonts.update(poppins_fonts)
+    vendor_css.append(('poppins.css', poppins_css))
+    vendor_css.append(('aos.css', fetch(AOS_CSS).decode()))
+    vendor_js = [('bootstrap.bundle.min.js', fetch(BOOTSTRAP_JS).decode()), ('aos.js', fetch(AOS_JS).decode())]
+
+    files = {}
+    for name, text in vendor_css + vendor_js:
+        files[f'{VENDOR_DIR}/{name}'] = strip_source_maps(text).encode()
+    for name, data in fonts.items():
+        files[f'{VENDOR_DIR}/{FONTS_DIR}/{name}'] = data
+
+    bundle_dir = posixpath.dirname(BUNDLE_CSS)
+    stylesheets = [strip_source_maps(text) for _, text in vendor_css]
+    stylesheets += [
+        rebase_urls(read_local(name), posixpath.dirname(name), bundle_dir) for name in LOCAL_CSS
+    ]
+    files[BUNDLE_CSS] = minify_css('\n'.join(stylesheets)).encode()
+    scripts = [strip_source_maps(text) for _, text in vendor_js] + [read_local(name) for name in LOCAL_JS]
+    # The semicolons keep a script without a trailing one from running into the next
+    files[BUNDLE_JS] = '\n;'.join(minify_js(script) for script in scripts).encode()
+    return files
+
+
+def write_files(files, root=None):
+    root = root or output_root()
+    _available.clear()
+    for name, data in files.items():
+        path = os.path.join(root, *name.split('/'))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as handle:
+            handle.write(data)
@@ -0,0 +1,200 @@
+"""
+Versioned content cache.
+
+Every content model has a generation counter stored in the cache. The
+handlers in ``main.signals`` bump a model's counter whenever one of its rows
+changes, and cache keys embed the current generations, so a stale entry is
+never read again and simply ages out.
+"""
+import hashlib
+import time
+from datetime import datetime, timezone
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Max
+from django.http import HttpResponse
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+CONTENT_TIMEOUT = 60 * 60 * 24
+GENERATION_KEY = 'content-generation:{}'
+MODIFIED_KEY = 'content-modified:{}'
+PAGE_KEY = 'page:{}:{}'
+
+_MISSING = object()
+
+
+def _label(model):
+    if isinstance(model, str):
+        return model.lower()
+    return model._meta.model_name
+
+
+def _initial_generation():
+    # Seed counters from the clock so that a counter lost to eviction never
+    # comes back with a value older entries were stored under.
+    return int(time.time() * 1000)
+
+
+def get_generations(*models):
+    """Return a ``{model_name: generation}`` dict for the given models."""
+    keys = {GENERATION_KEY.format(_label(model)): _label(model) for model in models}
+    found = cache.get_many(list(keys))
+    generations = {}
+    for key, label in keys.items():
+        generation = found.get(key)
+        if generation is None:
+            generation = _initial_generation()
+            if not cache.add(key, generation, None):
+                generation = cache.get(key, generation)
+        generations[label] = generation
+    return generations
+
+
+def content_generation(*models):
+    """Return a string identifying the current content of the given models."""
+    generations = get_generations(*models)
+    return '-'.join(f'{label}.{generations[label]}' for label in sorted(generations))
+
+
+def bump_generation(*models):
+    """Invalidate everything cached from the given models."""
+    for model in models:
+        key = GENERATION_KEY.format(_label(model))
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _initial_generation(), None)
+    # Remember when each model last changed; edits and deletions are not
+    # reflected in any timestamp column.
+    now = time.time()
+    cache.set_many({MODIFIED_KEY.format(_label(model)): now for model in models}, None)
+
+
+def bump_generation_on_commit(*models):
+    """Bump generations once the current transaction commits.
+
+    Bumping earlier would let a concurrent request rebuild the cache from the
+    old rows under the new generation.
+    """
+    transaction.on_commit(lambda: bump_generation(*models))
+
+
+def get_content(name, models, builder, timeout=CONTENT_TIMEOUT):
+    """Return ``builder()`` cached until any of ``models`` changes.
+
+    Builders must return fully evaluated data (lists, not querysets) so that
+    a cache hit never touches the database.
+    """
+    key = f'content:{name}:{content_generation(*models)}'
+    value = cache.get(key, _MISSING)
+    if value is _MISSING:
+        value = builder()
+        cache.set(key, value, timeout)
+    return value
+
+
+def _is_cacheable_request(request):
+    # Sessions and message cookies mean the page may be personalised
+    return (
+        request.method in ('GET', 'HEAD')
+        and settings.SESSION_COOKIE_NAME not in request.COOKIES
+        and 'messages' not in request.COOKIES
+    )
+
+
+def _is_cacheable_response(request, response):
+    messages = getattr(request, '_messages', None)
+    return (
+        response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+        # A CSRF token was rendered into a form
+        and not request.META.get('CSRF_COOKIE_NEEDS_UPDATE')
+        and not getattr(messages, 'added_new', False)
+    )
+
+
+def page_cache_key(request, models):
+    url = hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+    return PAGE_KEY.format(url, content_generation(*models))
+
+
+def cache_page_by_generation(*models, timeout=CONTENT_TIMEOUT):
+    """Cache a view's rendered HTML per URL until any of ``models`` changes.
+
+    Only anonymous GET/HEAD requests are served from the cache, and responses
+    that set cookies, carry messages or embed a CSRF token are never stored.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if not _is_cacheable_request(request):
+                return view_func(request, *args, **kwargs)
+
+            key = page_cache_key(request, models)
+            cached = cache.get(key)
+            if cached is not None:
+                content, content_type = cached
+                return HttpResponse(content, content_type=content_type)
+
+            response = view_func(request, *args, **kwargs)
+            if _is_cacheable_response(request, response):
+                cache.set(key, (response.content, response['Content-Type']), timeout)
+            return response
+        return wrapper
+    return decorator
+
+
+def content_last_modified(*models):
+    """Return when the content of the given models last changed.
+
+    This is the newest ``get_latest_by`` timestamp of the models' rows or the
+    last recorded change, whichever is later.
+    """
+    def newest_row():
+        timestamps = [
+            model.objects.aggregate(latest=Max(model._meta.get_latest_by))['latest']
+            for model in models
+            if model._meta.get_latest_by
+        ]
+        return max(filter(None, timestamps), default=None)
+
+    timestamps = [get_content('last-modified', models, newest_row)]
+    changed = cache.get_many([MODIFIED_KEY.format(_label(model)) for model in models])
+    timestamps += [datetime.fromtimestamp(ts, tz=timezone.utc) for ts in changed.values()]
+    return max(filter(None, timestamps), default=None)
+
+
+def generation_etag(request, models):
+    """Return an ETag for ``request`` that changes with the content of ``models``."""
+    parts = (request.build_absolute_uri(), request.META.get('HTTP_ACCEPT', ''), content_generation(*models))
+    return hashlib.md5('|'.join(parts).encode()).hexdigest()
+
+
+def conditional_by_generation(*models):
+    """Answer conditional GETs with 304 Not Modified until ``models`` change.
+
+    Responses carry an ETag derived from the URL and content generation plus
+    a Last-Modified date, and ask clients to revalidate before reuse.
+    """
+    def etag_func(request, *args, **kwargs):
+        return generation_etag(request, models)
+
+    def last_modified_func(request, *args, **kwargs):
+        return content_last_modified(*models)
+
+    def decorator(view_func):
+        conditional_view = condition(etag_func=etag_func, last_modified_func=last_modified_func)(view_func)
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            response = conditional_view(request, *args, **kwargs)
+            if request.method in ('GET', 'HEAD'):
+                patch_cache_control(response, no_cache=True)
+            return response
+        return wrapper
+    return decorator
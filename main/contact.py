@@ -0,0 +1,124 @@
+"""
+Contact form ingestion shared by the contact views and the JSON API.
+
+Submissions are buffered per process and written with one ``bulk_create``
+for the messages and one for their notification emails. A buffer is flushed
+once it holds ``CONTACT_FLUSH_SIZE`` submissions or ``CONTACT_FLUSH_INTERVAL``
+seconds after its first one, whichever comes first. The default size of 1
+writes every submission before the response is sent; a larger size trades
+that durability for fewer transactions under a burst, as buffered
+submissions are lost if the worker is killed.
+
+Submissions leave the buffer only once their transaction has committed. A
+failed write is logged and the batch kept for the next flush.
+"""
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+
+from .cache import bump_generation_on_commit
+from .mail import contact_notification
+from .models import ContactMessage, OutboundEmail
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ('name', 'email', 'subject', 'message')
+
+
+class ContactBuffer:
+
+    def __init__(self, flush_size=None, flush_interval=None):
+        self._flush_size = flush_size
+        self._flush_interval = flush_interval
+        self._lock = threading.Lock()
+        # Held while writing, so a batch is never written twice
+        self._flush_lock = threading.Lock()
+        self._messages = []
+        self._emails = []
+        self._timer = None
+
+    @property
+    def flush_size(self):
+        if self._flush_size is not None:
+            return self._flush_size
+        return getattr(settings, 'CONTACT_FLUSH_SIZE', 1)
+
+    @property
+    def flush_interval(self):
+        if self._flush_interval is not None:
+            return self._flush_interval
+        return getattr(settings, 'CONTACT_FLUSH_INTERVAL', 1.0)
+
+    def __len__(self):
+        return len(self._messages)
+
+    def submit(self, data):
+        """Accept cleaned form ``data`` and return the (possibly unsaved) message"""
+        message = ContactMessage(**{field: data[field] for field in FIELDS})
+        email = contact_notification(*(data[field] for field in FIELDS))
+        with self._lock:
+            self._messages.append(message)
+            if email is not None:
+                self._emails.append(email)
+            full = len(self._messages) >= self.flush_size
+            if not full:
+                self._start_timer()
+        if full:
+            self.flush()
+        return message
+
+    def _start_timer(self):
+        # Called with the lock held
+        if self._timer is None:
+            self._timer = threading.Timer(self.flush_interval, self._flush_from_timer)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self):
+        """Write all buffered submissions and return how many were written"""
+        with self._flush_lock:
+            with self._lock:
+                messages, emails = list(self._messages), list(self._emails)
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+            if not messages:
+                return 0
+            try:
+                with transaction.atomic():
+                    ContactMessage.objects.bulk_create(messages)
+                    OutboundEmail.objects.bulk_create(emails)
+                    # bulk_create sends no post_save, so refresh the dashboard here
+                    bump_generation_on_commit(ContactMessage)
+            except DatabaseError:
+                logger.exception('Could not write %d contact submissions; they stay buffered', len(messages))
+                for obj in messages + emails:
+                    obj.pk = None
+                    obj._state.adding = True
+                with self._lock:
+                    self._start_timer()
+                return 0
+            # Submitted while writing: kept after the written ones
+            with self._lock:
+                del self._messages[:len(messages)]
+                del self._emails[:len(emails)]
+        return len(messages)
+
+    def _flush_from_timer(self):
+        try:
+            self.flush()
+        finally:
+            # The timer thread got its own database connection
+            connection.close()
+
+
+contact_buffer = ContactBuffer()
+atexit.register(contact_buffer.flush)
+
+
+def submit_contact(data):
+    """Store a validated contact form submission and queue its notification"""
+    return contact_buffer.submit(data)
@@ -0,0 +1,214 @@
+"""
+Critical CSS: the part of the stylesheet needed to paint the top of a page.
+
+``vendor_assets`` renders one page of each type in ``PAGES`` and keeps the
+rules of the CSS bundle whose selectors can match an element above the
+fold. The fold is approximated from the markup: the navigation plus the
+first block of ``<main>``, capped at ``FOLD_ELEMENTS`` elements. Hover and
+focus states are left out; ``@font-face`` and ``@keyframes`` rules are kept
+when a kept rule uses them.
+
+The result is written next to the bundle, and ``{% site_css 'index' %}``
+inlines it in ``<head>`` and loads the full bundle without blocking
+rendering.
+"""
+import io
+import os
+import posixpath
+import re
+from html.parser import HTMLParser
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.handlers.base import BaseHandler
+from django.core.handlers.wsgi import WSGIRequest
+from django.urls import reverse
+
+from .assets import BUNDLE_CSS, minify_css, split_rules
+from .models import Project
+
+CRITICAL_DIR = posixpath.join(posixpath.dirname(BUNDLE_CSS), 'critical')
+FOLD_ELEMENTS = 150
+VOID_ELEMENTS = {
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'source', 'track', 'wbr',
+}
+# Interaction states cannot be needed for the first paint
+STATE_RE = re.compile(r':(?:hover|focus|focus-visible|focus-within|active|visited)\b')
+IGNORED_RE = re.compile(r'\[[^\]]*\]|::?[\w-]+(?:\([^)]*\))?')
+CLASS_RE = re.compile(r'\.(-?[_a-zA-Z][\w-]*)')
+ID_RE = re.compile(r'#(-?[_a-zA-Z][\w-]*)')
+TAG_RE = re.compile(r'(?:^|[\s>+~])([a-zA-Z][\w-]*)')
+FONT_FAMILY_RE = re.compile(r'font-family:\s*["\']?([^"\';,}]+)')
+KEYFRAMES_RE = re.compile(r'^@(?:-[a-z]+-)?keyframes\s+([\w-]+)')
+
+
+def _project_url():
+    project = Project.objects.order_by('id').only('id').first()
+    return project and reverse('project_detail', args=[project.id])
+
+
+# Page type: function returning the URL of a page of that type, or None
+PAGES = {
+    'index': lambda: reverse('index'),
+    'blog': lambda: reverse('blog'),
+    'project_detail': _project_url,
+}
+
+
+class FoldParser(HTMLParser):
+    """Collect the tags, classes and ids of the elements above the fold"""
+
+    def __init__(self):
+        super().__init__()
+        self.tags, self.classes, self.ids = {'html', 'body'}, set(), set()
+        self.in_main = False
+        self.depth = 0
+        self.seen = 0
+        self.done = False
+
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+        if self.in_main:
+            self.seen += 1
+            if tag not in VOID_ELEMENTS:
+                self.depth += 1
+            if self.seen >= FOLD_ELEMENTS:
+                self.done = True
+        elif tag == 'main':
+            self.in_main = True
+        self.tags.add(tag)
+        for name, value in attrs:
+            if name == 'class' and value:
+                self.classes.update(value.split())
+            elif name == 'id' and value:
+                self.ids.add(value)
+
+    def handle_endtag(self, tag):
+        if self.in_main and not self.done and tag not in VOID_ELEMENTS:
+            self.depth -= 1
+            # The first block of <main> is closed, or <main> itself
+            if self.depth <= 0:
+                self.done = True
+
+
+def fold_tokens(html):
+    parser = FoldParser()
+    parser.feed(html)
+    return parser.tags, parser.classes, parser.ids
+
+
+def selector_needed(selector, tokens):
+    """True if ``selector`` may match an element described by ``tokens``"""
+    if STATE_RE.search(selector):
+        return False
+    tags, classes, ids = tokens
+    simple = IGNORED_RE.sub('', selector)
+    return (
+        all(name in classes for name in CLASS_RE.findall(simple))
+        and all(name in ids for name in ID_RE.findall(simple))
+        and all(name.lower() in tags for name in TAG_RE.findall(CLASS_RE.sub('', ID_RE.sub('', simple))))
+    )
+
+
+def _filter_rules(css, tokens):
+    kept, faces, keyframes = [], [], []
+    for rule in split_rules(css):
+        brace = rule.find('{')
+        if brace < 0:
+            continue
+        prelude, body = rule[:brace].strip(), rule[brace + 1:-1]
+        # Licence comments stay in the full bundle
+        prelude = re.sub(r'^/\*.*?\*/\s*', '', prelude, flags=re.S)
+        if prelude.startswith(('@media', '@supports')):
+            inner_kept, inner_faces, inner_keyframes = _filter_rules(body, tokens)
+            if inner_kept:
+                kept.append(f'{prelude}{{{"".join(inner_kept)}}}')
+            faces.extend(inner_faces)
+            keyframes.extend(inner_keyframes)
+        elif prelude.startswith('@font-face'):
+            faces.append(f'{prelude}{{{body}}}')
+        elif KEYFRAMES_RE.match(prelude):
+            keyframes.append((KEYFRAMES_RE.match(prelude).group(1), f'{prelude}{{{body}}}'))
+        elif not prelude.startswith('@'):
+            selectors = [selector.strip() for selector in prelude.split(',')]
+            needed = [selector for selector in selectors if selector_needed(selector, tokens)]
+            if needed:
+                kept.append(f'{",".join(needed)}{{{body}}}')
+    return kept, faces, keyframes
+
+
+def _family(face):
+    match = FONT_FAMILY_RE.search(face)
+    return match.group(1).strip() if match else None
+
+
+def extract_critical(css, tokens):
+    """Return the rules of ``css`` needed to render an element set ``tokens``"""
+    kept, faces, keyframes = _filter_rules(css, tokens)
+    used = '\n'.join(kept)
+    rules = [face for face in faces if _family(face) in used]
+    rules += kept
+    rules += [rule for name, rule in keyframes if re.search(rf'\b{re.escape(name)}\b', used)]
+    return minify_css('\n'.join(rules))
+
+
+def critical_path(page):
+    return os.path.join(settings.STATICFILES_DIRS[0], *CRITICAL_DIR.split('/'), f'{page}.css')
+
+
+def render_page(url):
+    """Render ``url`` through the middleware and view as an anonymous GET; None unless it succeeds"""
+    host = next((host.lstrip('.') for host in settings.ALLOWED_HOSTS if host and host != '*'), 'localhost')
+    path, _, query = url.partition('?')
+    request = WSGIRequest({
+        'REQUEST_METHOD': 'GET', 'SCRIPT_NAME': '', 'PATH_INFO': path, 'QUERY_STRING': query,
+        'SERVER_NAME': host, 'SERVER_PORT': '443', 'HTTP_HOST': host,
+        'wsgi.url_scheme': 'https', 'wsgi.input': io.BytesIO(),
+    })
+    handler = BaseHandler()
+    handler.load_middleware()
+    # Errors become a 500 response; a page that fails to render is linked to the bundle normally
+    response = handler.get_response(request)
+    if response.status_code != 200:
+        return None
+    return response.content.decode()
+
+
+def build_critical_css():
+    """Write the critical CSS of every page type; returns ``{page: size or None}``"""
+    with open(finders.find(BUNDLE_CSS), encoding='utf-8') as handle:
+        bundle = handle.read()
+    results = {}
+    for page, get_url in PAGES.items():
+        url = get_url()
+        html = url and render_page(url)
+        path = critical_path(page)
+        if not html:
+            # Pages of this type link the bundle normally
+            if os.path.exists(path):
+                os.remove(path)
+            results[page] = None
+            continue
+        css = extract_critical(bundle, fold_tokens(html))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as handle:
+            handle.write(css)
+        results[page] = len(css)
+    return results
+
+
+_loaded = {}
+
+
+def critical_css(page):
+    """Return the critical CSS of page type ``page``, or None if it was not built"""
+    path = critical_path(page)
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+    if _loaded.get(path, (None,))[0] != mtime:
+        with open(path, encoding='utf-8') as handle:
+            _loaded[path] = (mtime, handle.read())
+    return _loaded[path][1]
@@ -0,0 +1,119 @@
+"""
+NDJSON export of the portfolio content, for syncing it into other systems.
+
+Each line is one object, in the shape of Django's serialization formats::
+
+    {"model": "main.blogpost", "pk": 3, "fields": {"title": ..., "tags": ["django"]}}
+
+Rows are read with ``values().iterator()`` and written as they arrive, so
+memory use does not depend on the number of rows. ``since`` limits the
+export to rows changed at or after that time, by their ``updated_at`` (or
+creation) column. Models without such a column are exported in full unless
+the content cache records that they have not changed since. Deletions are
+not part of an incremental export.
+"""
+from datetime import datetime, time
+from itertools import islice
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from taggit.models import TaggedItem
+
+from .cache import content_last_modified
+from .models import Profile, Project, Skill, Testimonial, BlogPost
+
+EXPORT_MODELS = (Profile, Project, Skill, Testimonial, BlogPost)
+TIMESTAMP_FIELDS = ('updated_at', 'date_created', 'created_at')
+CHUNK_SIZE = 1000
+
+
+class ExportEncoder(DjangoJSONEncoder):
+    """DjangoJSONEncoder keeping microseconds, so timestamps survive an import"""
+
+    def default(self, o):
+        if isinstance(o, datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+_encoder = ExportEncoder(ensure_ascii=False, separators=(',', ':'))
+
+
+def model_label(model):
+    return model._meta.label_lower
+
+
+def export_models(labels=None):
+    """Return the models named by ``labels`` (``project`` or ``main.project``), all by default"""
+    if not labels:
+        return EXPORT_MODELS
+    by_label = {}
+    for model in EXPORT_MODELS:
+        by_label[model_label(model)] = by_label[model._meta.model_name] = model
+    unknown = [label for label in labels if label.lower() not in by_label]
+    if unknown:
+        raise ValueError(f'Unknown model: {", ".join(unknown)}')
+    return tuple(dict.fromkeys(by_label[label.lower()] for label in labels))
+
+
+def parse_since(value):
+    """Parse an ISO date or datetime; naive values are in the current time zone"""
+    since = parse_datetime(value)
+    if since is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f'Invalid date: {value}')
+        since = datetime.combine(day, time.min)
+    if timezone.is_naive(since):
+        since = timezone.make_aware(since)
+    return since
+
+
+def timestamp_field(model):
+    """The column that tells when a row last changed, or None"""
+    names = {field.name for field in model._meta.concrete_fields}
+    return next((name for name in TIMESTAMP_FIELDS if name in names), None)
+
+
+def changed_rows(model, since=None):
+    queryset = model._default_manager.order_by('pk')
+    if since is None:
+        return queryset
+    field = timestamp_field(model)
+    if field is not None:
+        return queryset.filter(**{f'{field}__gte': since})
+    last_modified = content_last_modified(model)
+    return queryset if last_modified is None or last_modified >= since else queryset.none()
+
+
+def _tags(model, pks):
+    names = {pk: [] for pk in pks}
+    items = TaggedItem.objects.filter(
+        content_type=ContentType.objects.get_for_model(model), object_id__in=pks,
+    ).values_list('object_id', 'tag__name').order_by('tag__name')
+    for pk, name in items:
+        names[pk].append(name)
+    return names
+
+
+def export_lines(models=EXPORT_MODELS, since=None, chunk_size=CHUNK_SIZE):
+    """Yield one NDJSON line per object of ``models``"""
+    for model in models:
+        label = model_label(model)
+        pk_name = model._meta.pk.attname
+        columns = [field.attname for field in model._meta.concrete_fields]
+        tagged = any(field.name == 'tags' for field in model._meta.many_to_many)
+        rows = changed_rows(model, since).values(*columns).iterator(chunk_size=chunk_size)
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            # One query per chunk for the tags
+            tags = _tags(model, [row[pk_name] for row in chunk]) if tagged else None
+            for row in chunk:
+                pk = row.pop(pk_name)
+                if tags is not None:
+                    row['tags'] = tags[pk]
+                yield _encoder.encode({'model': label, 'pk': pk, 'fields': row}) + '\n'
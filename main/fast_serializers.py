@@ -0,0 +1,116 @@
+"""
+Read-only API lists built from ``values()`` rows.
+
+DRF serializes a list by building a model instance per row, then calling
+``get_attribute()`` and ``to_representation()`` for every field of every
+object. The read-only endpoints only output column values, so
+``RowSerializer`` compiles a serializer's fields once into per-column
+converters and applies them to the dicts ``values()`` returns. Fields that
+need another table provide ``bulk_values(pks)``, one query per page.
+
+The output is identical to DRF's, byte for byte (see the tests). A
+serializer with a field that cannot be compiled returns None from
+``RowSerializer.compile``, and the view falls back to DRF.
+"""
+import json
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.settings import api_settings
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Fields whose representation of a column value is the value itself
+IDENTITY_FIELDS = (serializers.BooleanField, serializers.CharField, serializers.IntegerField)
+
+
+def _file_converter(field, storage):
+    request = field.context.get('request')
+
+    def convert(name):
+        if not name:
+            return None
+        url = storage.url(name)
+        return request.build_absolute_uri(url) if request is not None else url
+    return convert
+
+
+def _converter(field, model_field):
+    """Return ``convert(value)``, None for the identity, or raise ValueError"""
+    if isinstance(field, serializers.FileField):
+        if not getattr(field, 'use_url', api_settings.UPLOADED_FILES_USE_URL):
+            return None
+        return _file_converter(field, model_field.storage)
+    if isinstance(field, IDENTITY_FIELDS) or (isinstance(field, serializers.JSONField) and not field.binary):
+        return None
+    if isinstance(field, serializers.RelatedField) or model_field.is_relation:
+        raise ValueError(field.field_name)
+    return field.to_representation
+
+
+class RowSerializer:
+    """Serialize ``values(*columns)`` rows like ``serializer`` serializes objects"""
+
+    def __init__(self, plan, columns, pk):
+        self.plan = plan
+        self.columns = columns
+        self.pk = pk
+
+    @classmethod
+    def compile(cls, serializer):
+        """Return a ``RowSerializer`` for a bound serializer, or None"""
+        model = serializer.Meta.model
+        pk = model._meta.pk.attname
+        plan, columns = [], {pk}
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if hasattr(field, 'bulk_values'):
+                plan.append((name, None, field.bulk_values))
+                continue
+            try:
+                model_field = model._meta.get_field(field.source)
+                if not model_field.concrete:
+                    return None
+                plan.append((name, model_field.attname, _converter(field, model_field)))
+            except (FieldDoesNotExist, ValueError):
+                return None
+            columns.add(model_field.attname)
+        return cls(plan, columns, pk)
+
+    def serialize(self, rows):
+        rows = list(rows)
+        pks = [row[self.pk] for row in rows]
+        # Fields from other tables, looked up for the whole page at once
+        extra = {name: bulk_values(pks) for name, column, bulk_values in self.plan if column is None}
+        data = []
+        for row in rows:
+            item = {}
+            for name, column, convert in self.plan:
+                if column is None:
+                    item[name] = extra[name][row[self.pk]]
+                    continue
+                value = row[column]
+                item[name] = value if value is None or convert is None else convert(value)
+            data.append(item)
+        return data
+
+
+_encoder = json.JSONEncoder(
+    ensure_ascii=not api_settings.UNICODE_JSON,
+    allow_nan=not api_settings.STRICT_JSON,
+    separators=(',', ':') if api_settings.COMPACT_JSON else (', ', ': '),
+)
+
+
+def encode(data):
+    """Encode serialized data to the bytes ``JSONRenderer`` produces"""
+    if orjson is not None and api_settings.UNICODE_JSON and api_settings.COMPACT_JSON:
+        content = orjson.dumps(data)
+    else:
+        content = _encoder.encode(data).encode()
+    # JSONRenderer escapes these so the output is also valid JavaScript
+    return content.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
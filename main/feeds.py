@@ -1,17 +1,54 @@
 # feeds.py
 from django.contrib.syndication.views import Feed
+from django.utils.feedgenerator import Atom1Feed
+
+from .cache import conditional_by_generation
+from .generated import serve_generated
 from .models import BlogPost
 
+# Tag changes bump BlogPost too (see main.signals)
+FEED_MODELS = (BlogPost,)
+
+
 class LatestPostsFeed(Feed):
     title = "Your Portfolio Blog"
     link = "/blog/"
     description = "Latest blog posts from my portfolio"
-    
+    name = 'feed-rss'
+
+    def __call__(self, request, *args, **kwargs):
+        # Feed readers poll; answer with 304 until a post changes, and
+        # otherwise from the file written for the current posts
+        view = conditional_by_generation(*FEED_MODELS)(self.serve)
+        return view(request, *args, **kwargs)
+
+    def serve(self, request):
+        return serve_generated(
+            request, self.name, FEED_MODELS,
+            lambda handle: self.get_feed(None, request).write(handle, 'utf-8'),
+            content_type=self.feed_type.content_type,
+        )
+
     def items(self):
-        return BlogPost.objects.filter(published=True).order_by('-created_at')[:10]
-    
+        return BlogPost.objects.published_with_tags().order_by('-created_at')[:10]
+
     def item_title(self, item):
         return item.title
-    
+
     def item_description(self, item):
-        return item.excerpt
\ No newline at end of file
+        return item.excerpt
+
+    def item_categories(self, item):
+        return [tag.name for tag in item.tags.all()]
+
+    def item_pubdate(self, item):
+        return item.created_at
+
+    def item_updateddate(self, item):
+        return item.updated_at
+
+
+class AtomLatestPostsFeed(LatestPostsFeed):
+    feed_type = Atom1Feed
+    subtitle = LatestPostsFeed.description
+    name = 'feed-atom'
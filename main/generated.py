@@ -0,0 +1,78 @@
+"""
+Documents written to disk once per content generation.
+
+sitemap.xml and the feeds are fetched by crawlers and feed readers far more
+often than the content changes. Each document is written to a file named
+after the content generation of its models, streamed as it is generated so
+a large archive is never held in memory, and then served from disk with
+``sendfile()``. A repeat fetch costs a cache lookup and a ``stat()``.
+
+The documents hold absolute URLs, so each host and scheme gets its own
+file. Files of older generations are removed once a newer one is written.
+"""
+import glob
+import hashlib
+import os
+import tempfile
+
+from django.conf import settings
+from django.http import FileResponse
+
+from .cache import content_generation
+
+STALE_FILE_AGE = 60
+
+
+def generated_dir():
+    return getattr(settings, 'GENERATED_DIR', os.path.join(settings.BASE_DIR, 'cache', 'generated'))
+
+
+def _digest(value):
+    return hashlib.md5(value.encode()).hexdigest()[:16]
+
+
+def generated_path(request, name, models):
+    site = _digest(f'{request.scheme}://{request.get_host()}')
+    return os.path.join(generated_dir(), f'{name}-{site}-{_digest(content_generation(*models))}')
+
+
+def _remove_stale_files(current):
+    # Readers that opened an older file keep it; the grace period covers a
+    # worker that has just seen an older generation
+    cutoff = os.path.getmtime(current) - STALE_FILE_AGE
+    prefix = current.rsplit('-', 1)[0]
+    for path in glob.glob(glob.escape(prefix) + '-*'):
+        try:
+            if path != current and not path.endswith('.tmp') and os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def write_generated(path, write):
+    """Call ``write(handle)`` into a temporary file, then move it to ``path``"""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as handle:
+            write(handle)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, path)
+    _remove_stale_files(path)
+
+
+def serve_generated(request, name, models, write, content_type):
+    """Serve document ``name``, written by ``write(handle)`` until ``models`` change.
+
+    ``write`` may raise ``Http404``; nothing is stored then.
+    """
+    path = generated_path(request, name, models)
+    try:
+        handle = open(path, 'rb')
+    except FileNotFoundError:
+        write_generated(path, write)
+        handle = open(path, 'rb')
+    return FileResponse(handle, content_type=content_type)
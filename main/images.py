@@ -0,0 +1,183 @@
+"""
+Resized WebP variants of uploaded images for responsive ``srcset``s.
+
+Every image is stored in a few width buckets next to the uploads, under
+``variants/``. Saving an object with images queues a job on a process pool
+(see ``main.jobs``), so the admin request never waits for Pillow. Each
+finished job is recorded in the ``ImageVariant`` manifest, with the
+dimensions and byte size of every rendition. Templates read the whole
+manifest as one cached dict and never look at the file system; an image
+whose variants are not ready yet is served at its original size.
+"""
+import hashlib
+import io
+import logging
+import os
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from .cache import bump_generation_on_commit, get_content
+from .jobs import submit
+from .models import ImageVariant
+
+logger = logging.getLogger(__name__)
+
+WIDTHS = (160, 320, 480, 768, 1024, 1536)
+WEBP_QUALITY = 80
+QUEUED_KEY = 'image-queued:{}'
+# Uploads that could not be processed are retried after this long
+RETRY_TIMEOUT = 60 * 5
+
+# Image fields rendered on the site, per model
+IMAGE_FIELDS = {
+    'profile': ('profile_picture', 'about_picture'),
+    'project': ('image',),
+    'testimonial': ('avatar',),
+    'blogpost': ('featured_image',),
+}
+
+
+def _digest(name):
+    return hashlib.md5(name.encode()).hexdigest()
+
+
+def variant_name(name, digest, width):
+    """Storage name of the ``width`` bucket of upload ``name``, whose bytes hash to ``digest``"""
+    directory, filename = os.path.split(name)
+    stem = os.path.splitext(filename)[0]
+    # A new file under the same name gets new variant names, so the media
+    # view can let browsers cache variants for good
+    return os.path.join('variants', directory, f'{stem}-{digest[:8]}-{width}w.webp')
+
+
+def encode_webp(image, width, height):
+    resized = image.resize((width, height), Image.LANCZOS)
+    buffer = io.BytesIO()
+    resized.save(buffer, 'WEBP', quality=WEBP_QUALITY, method=4)
+    return buffer.getvalue()
+
+
+# Processing; runs in pool workers and must not use the database
+
+def build_variants(name, storage=None):
+    """Create any missing variants of upload ``name``.
+
+    Returns ``(name, width, height, size)`` renditions, the original first.
+    """
+    storage = storage or default_storage
+    with storage.open(name, 'rb') as handle:
+        data = handle.read()
+    digest = hashlib.md5(data).hexdigest()
+    image = Image.open(io.BytesIO(data))
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'A' in image.getbands() or 'transparency' in image.info else 'RGB')
+    image.load()
+
+    renditions = [(name, image.width, image.height, len(data))]
+    for width in WIDTHS:
+        if width >= image.width:
+            break
+        path = variant_name(name, digest, width)
+        height = round(image.height * width / image.width)
+        if storage.exists(path):
+            renditions.append((path, width, height, storage.size(path)))
+            continue
+        data = encode_webp(image, width, height)
+        storage.save(path, ContentFile(data))
+        renditions.append((path, width, height, len(data)))
+    return renditions
+
+
+def safe_build_variants(name):
+    """``build_variants`` for the job runner: None instead of an exception"""
+    try:
+        return build_variants(name)
+    except (OSError, UnidentifiedImageError, Image.DecompressionBombError) as error:
+        logger.info('Could not create variants of %s: %s', name, error)
+        return None
+
+
+# Manifest
+
+def _info(renditions):
+    original, *variants = sorted(renditions, key=lambda rendition: rendition[1], reverse=True)
+    return {
+        'width': original[1],
+        'height': original[2],
+        'variants': [(width, name) for name, width, _, _ in reversed(variants)],
+    }
+
+
+def record_variants(source, renditions, models=()):
+    """Store the renditions of ``source`` in the manifest.
+
+    ``models`` are the models whose pages show the image; their cached pages
+    are invalidated so they pick up the new ``srcset``.
+    """
+    if renditions is None:
+        # Leave the upload queued so it is not retried for a while
+        cache.set(QUEUED_KEY.format(_digest(source)), True, RETRY_TIMEOUT)
+        return
+    with transaction.atomic():
+        ImageVariant.objects.filter(source=source).delete()
+        ImageVariant.objects.bulk_create([
+            ImageVariant(source=source, name=name, width=width, height=height, size=size)
+            for name, width, height, size in renditions
+        ])
+        bump_generation_on_commit(ImageVariant, *models)
+
+
+def manifest():
+    """Return ``{source: {'width', 'height', 'variants'}}`` for every processed upload"""
+    def build():
+        renditions = {}
+        for source, *rendition in ImageVariant.objects.values_list('source', 'name', 'width', 'height', 'size'):
+            renditions.setdefault(source, []).append(tuple(rendition))
+        return {source: _info(rows) for source, rows in renditions.items()}
+
+    return get_content('image-manifest', [ImageVariant], build)
+
+
+def image_variants(field_file):
+    """Return ``{'width', 'height', 'variants'}`` for an upload, or None.
+
+    Uploads that were never processed are queued, and None is returned
+    until their job has finished; pages of the owning model are invalidated
+    then.
+    """
+    if not field_file:
+        return None
+    info = manifest().get(field_file.name)
+    if info is None:
+        owner = getattr(field_file, 'instance', None)
+        queue_upload(field_file.name, models=[type(owner)] if owner is not None else ())
+    return info
+
+
+def queue_upload(name, models=(), then=None):
+    """Process upload ``name`` in the background unless it is already queued.
+
+    ``then()`` is called once the variants are recorded and committed.
+    """
+    def done(renditions):
+        record_variants(name, renditions, models)
+        if then is not None and renditions is not None:
+            # After the manifest's generation has moved on
+            transaction.on_commit(then)
+
+    if cache.add(QUEUED_KEY.format(_digest(name)), True, RETRY_TIMEOUT):
+        submit(safe_build_variants, name, callback=done)
+
+
+def queue_instance(instance):
+    """Queue processing of every new image of a saved object"""
+    processed = manifest()
+    for field in IMAGE_FIELDS.get(instance._meta.model_name, ()):
+        field_file = getattr(instance, field)
+        if field_file and field_file.name not in processed:
+            queue_upload(field_file.name, models=[type(instance)])
@@ -0,0 +1,269 @@
+"""
+Bulk import of portfolio content from NDJSON or CSV.
+
+NDJSON lines have the shape written by ``main.export``::
+
+    {"model": "main.blogpost", "pk": 3, "fields": {"title": ..., "tags": ["django"]}}
+
+A CSV file holds one model, named by the caller, with a header row of field
+names; ``id`` is the primary key and ``tags`` a comma-separated list.
+
+Objects are upserted in batches, one transaction and one
+``bulk_create(update_conflicts=True)`` per batch: on the primary key when
+the row has one, otherwise blog posts match on their slug and other rows
+are inserted. Only the fields a row supplies are updated. Timestamps in the
+file are kept; missing ones are set to the time of the import.
+
+The per-row signal handlers are suppressed. Once every batch is written
+the search index is rebuilt and the cached content invalidated, once. A bad
+row stops the import; the batches written before it stay.
+Post content is rendered as it is read; images are queued the first time a
+page shows them.
+"""
+import csv
+import json
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.management.color import no_style
+from django.db import connection, models, transaction
+from django.utils import timezone
+from taggit.models import Tag, TaggedItem
+
+from .cache import bump_generation_on_commit
+from .images import manifest
+from .models import Profile, Project, Skill, Testimonial, BlogPost, RENDERED_FIELDS
+from .search import rebuild_index
+from .signals import signals_suppressed
+
+IMPORT_MODELS = (Profile, Project, Skill, Testimonial, BlogPost)
+BATCH_SIZE = 1000
+# Natural keys to upsert on when a row has no primary key
+NATURAL_KEYS = {BlogPost: 'slug'}
+# Recomputed on import
+DERIVED_FIELDS = {BlogPost: set(RENDERED_FIELDS)}
+# (field, auto_now) of the fields Django fills in with now()
+AUTO_TIMESTAMPS = {
+    model: [
+        (field, field.auto_now) for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    for model in IMPORT_MODELS
+}
+
+
+class ContentImportError(Exception):
+    pass
+
+
+def import_model(label):
+    """Return the model for ``label`` (``project`` or ``main.project``)"""
+    for model in IMPORT_MODELS:
+        if label.lower() in (model._meta.label_lower, model._meta.model_name):
+            return model
+    raise ContentImportError(f'Unknown model: {label}')
+
+
+# Readers yield (line number, model, pk or None, fields)
+
+def read_ndjson(handle):
+    for number, line in enumerate(handle, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+            model = import_model(record['model'])
+        except (ValueError, KeyError, TypeError) as error:
+            raise ContentImportError(f'Line {number}: {error!r}') from error
+        except ContentImportError as error:
+            raise ContentImportError(f'Line {number}: {error}') from error
+        yield number, model, record.get('pk'), record.get('fields') or {}
+
+
+CSV_BOOLEANS = {'1': True, 't': True, 'true': True, 'yes': True, '0': False, 'f': False, 'false': False, 'no': False}
+
+
+def read_csv(handle, model):
+    text_fields, boolean_fields = set(), set()
+    for field in model._meta.concrete_fields:
+        if isinstance(field, (models.CharField, models.TextField)):
+            text_fields.add(field.name)
+        elif isinstance(field, models.BooleanField):
+            boolean_fields.add(field.name)
+    for number, row in enumerate(csv.DictReader(handle), 2):
+        pk = row.pop('id', None) or row.pop('pk', None) or None
+        fields = {}
+        for name, value in row.items():
+            if name == 'tags':
+                fields['tags'] = [tag.strip() for tag in (value or '').split(',') if tag.strip()]
+            elif name in boolean_fields and value:
+                fields[name] = CSV_BOOLEANS.get(value.strip().lower(), value)
+            # An empty cell leaves other fields at their default
+            elif value or name in text_fields:
+                fields[name] = value or ''
+        yield number, model, pk, fields
+
+
+@contextmanager
+def explicit_timestamps():
+    """Let bulk_create() write the timestamps of the rows instead of now().
+
+    This changes the field definitions for the whole process, which is fine
+    for a management command.
+    """
+    saved = [
+        (field, field.auto_now, field.auto_now_add) for fields in AUTO_TIMESTAMPS.values() for field, _ in fields
+    ]
+    for field, _, _ in saved:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class ContentImporter:
+    """Collect rows into batches per model, key and set of columns, and upsert them"""
+
+    def __init__(self, batch_size=BATCH_SIZE):
+        self.batch_size = batch_size
+        self.now = timezone.now()
+        self.image_info = manifest().get
+        self.batches = defaultdict(list)
+        self.counts = Counter()
+        self.explicit_pks = set()
+
+    def add(self, number, model, pk, fields):
+        fields = dict(fields)
+        tags = fields.pop('tags', None)
+        values = {}
+        derived = DERIVED_FIELDS.get(model, ())
+        try:
+            for name, value in fields.items():
+                if name in derived:
+                    continue
+                field = model._meta.get_field(name)
+                if not field.concrete or field.primary_key:
+                    raise FieldDoesNotExist(f'{model._meta.label} has no field named {name!r}')
+                value = field.to_python(value)
+                if isinstance(value, datetime) and timezone.is_naive(value):
+                    value = timezone.make_aware(value)
+                values[field.attname] = value
+            if pk is not None:
+                pk = model._meta.pk.to_python(pk)
+        except (FieldDoesNotExist, ValidationError) as error:
+            raise ContentImportError(f'Line {number}: {"; ".join(getattr(error, "messages", [str(error)]))}') from error
+        if tags is not None and not any(field.name == 'tags' for field in model._meta.many_to_many):
+            raise ContentImportError(f'Line {number}: {model._meta.label} has no tags')
+
+        columns = set(values)
+        for field, auto_now in AUTO_TIMESTAMPS[model]:
+            if values.get(field.attname) is None:
+                values[field.attname] = self.now
+                # A creation date is only set on insert
+                if auto_now:
+                    columns.add(field.attname)
+        instance = model(pk=pk, **values)
+        if model is BlogPost and 'content' in values:
+            instance.render_content(self.image_info)
+            columns.update(RENDERED_FIELDS)
+
+        key = 'pk' if pk is not None else NATURAL_KEYS.get(model)
+        if key is not None and key != 'pk' and key not in columns:
+            key = None
+        group = (model, key, frozenset(columns))
+        self.batches[group].append((instance, tags))
+        if len(self.batches[group]) >= self.batch_size:
+            self.flush(group)
+
+    def flush(self, group):
+        model, key, columns = group
+        batch = self.batches.pop(group, [])
+        if not batch:
+            return
+        if key is not None:
+            # A row can be upserted once per statement; the last one wins
+            batch = list({getattr(instance, key): (instance, tags) for instance, tags in batch}.values())
+        objects = [instance for instance, _ in batch]
+        options = {}
+        if key is not None:
+            unique_field = model._meta.pk.name if key == 'pk' else key
+            update_fields = sorted(
+                model._meta.get_field(column).name for column in columns if column != unique_field
+            )
+            if update_fields:
+                options = {'update_conflicts': True, 'unique_fields': [unique_field], 'update_fields': update_fields}
+            else:
+                options = {'ignore_conflicts': True}
+        with transaction.atomic():
+            model.objects.bulk_create(objects, **options)
+            tagged = [(instance, tags) for instance, tags in batch if tags is not None]
+            if tagged:
+                self.set_tags(model, key, tagged)
+        if key == 'pk':
+            self.explicit_pks.add(model)
+        self.counts[model] += len(objects)
+
+    def set_tags(self, model, key, tagged):
+        if all(instance.pk is not None for instance, _ in tagged):
+            pks = [instance.pk for instance, _ in tagged]
+        else:
+            # Not every database returns the keys of upserted rows
+            natural_key = NATURAL_KEYS[model]
+            found = dict(model.objects.filter(
+                **{f'{natural_key}__in': [getattr(instance, natural_key) for instance, _ in tagged]}
+            ).values_list(natural_key, 'pk'))
+            pks = [found[getattr(instance, natural_key)] for instance, _ in tagged]
+
+        names = {name for _, tags in tagged for name in tags}
+        tag_ids = dict(Tag.objects.filter(name__in=names).values_list('name', 'pk'))
+        missing = names - set(tag_ids)
+        if missing:
+            Tag.objects.bulk_create(
+                [Tag(name=name, slug=Tag().slugify(name)) for name in missing], ignore_conflicts=True,
+            )
+            tag_ids.update(Tag.objects.filter(name__in=missing).values_list('name', 'pk'))
+            # Names whose slug is taken get a numbered slug from Tag.save()
+            for name in missing - set(tag_ids):
+                tag_ids[name] = Tag.objects.get_or_create(name=name)[0].pk
+
+        content_type = ContentType.objects.get_for_model(model)
+        TaggedItem.objects.filter(content_type=content_type, object_id__in=pks).delete()
+        TaggedItem.objects.bulk_create([
+            TaggedItem(content_type=content_type, object_id=pk, tag_id=tag_ids[name])
+            for pk, (_, tags) in zip(pks, tagged) for name in dict.fromkeys(tags)
+        ])
+
+    def flush_all(self):
+        for group in list(self.batches):
+            self.flush(group)
+
+    def refresh(self):
+        """Bring sequences, the search index and the caches up to date with the written rows"""
+        if self.explicit_pks:
+            # Rows inserted with their own ids leave PostgreSQL's sequences behind
+            with connection.cursor() as cursor:
+                for statement in connection.ops.sequence_reset_sql(no_style(), list(self.explicit_pks)):
+                    cursor.execute(statement)
+        if self.counts:
+            with transaction.atomic():
+                rebuild_index()
+            bump_generation_on_commit(*self.counts)
+
+
+def import_records(records, batch_size=BATCH_SIZE):
+    """Upsert ``(number, model, pk, fields)`` records; return a ``Counter`` per model"""
+    with signals_suppressed(), explicit_timestamps():
+        importer = ContentImporter(batch_size)
+        try:
+            for record in records:
+                importer.add(*record)
+            importer.flush_all()
+        finally:
+            # Batches written before an error stay, so refresh for them too
+            importer.refresh()
+    return importer.counts
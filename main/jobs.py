@@ -0,0 +1,90 @@
+"""
+Background jobs on a per-process ``ProcessPoolExecutor``.
+
+Jobs are plain module-level functions that must not use the database; their
+results are handed to a callback in this process, on a short-lived thread
+with its own database connection. ``IMAGE_WORKERS`` sets the pool size, and
+0 runs jobs inline (used by the tests).
+"""
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_executor = None
+
+
+def init_worker():
+    # Spawned workers start without Django configured
+    import django
+    django.setup()
+
+
+def get_executor(workers=None):
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=workers or getattr(settings, 'IMAGE_WORKERS', 1), initializer=init_worker,
+            )
+        return _executor
+
+
+def _reset_executor():
+    global _executor
+    with _lock:
+        _executor = None
+
+
+def _run_callback(callback, result):
+    try:
+        callback(result)
+    except Exception:
+        logger.exception('Background job callback failed')
+    finally:
+        connection.close()
+
+
+def _done(callback, future):
+    try:
+        result = future.result()
+    except BrokenProcessPool:
+        logger.exception('Background job pool died; it will be restarted')
+        _reset_executor()
+        return
+    except Exception:
+        logger.exception('Background job failed')
+        return
+    if callback is not None:
+        # Done callbacks may run on the submitting thread; keep database work
+        # and connection cleanup off it.
+        threading.Thread(target=_run_callback, args=(callback, result), daemon=True).start()
+
+
+def submit(func, *args, callback=None):
+    """Run ``func(*args)`` in the pool and pass its result to ``callback``"""
+    if getattr(settings, 'IMAGE_WORKERS', 1) <= 0:
+        result = func(*args)
+        if callback is not None:
+            callback(result)
+        return
+    try:
+        future = get_executor().submit(func, *args)
+    except BrokenProcessPool:
+        _reset_executor()
+        future = get_executor().submit(func, *args)
+    future.add_done_callback(lambda future: _done(callback, future))
+
+
+def shutdown(wait=True):
+    global _executor
+    with _lock:
+        if _executor is not None:
+            _executor.shutdown(wait=wait)
+            _executor = None
@@ -0,0 +1,144 @@
+"""
+Durable outbound email.
+
+Callers use ``queue_mail`` (or ``main.contact`` for contact notifications),
+which only inserts an ``OutboundEmail`` row. ``manage.py run_mail_worker`` delivers due
+rows in batches over a single backend connection and reschedules failures
+with exponential backoff, so a slow or unreachable SMTP server never holds up
+a web request.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import OutboundEmail
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 50
+MAX_ATTEMPTS = 6
+RETRY_BASE = timedelta(minutes=1)
+RETRY_MAX = timedelta(hours=6)
+# How long a claimed batch is hidden from other workers while it is sent
+CLAIM_TIMEOUT = timedelta(minutes=10)
+
+
+def queue_mail(subject, body, recipients, from_email=None, reply_to=None):
+    """Store an email for the worker to send and return its ``OutboundEmail``"""
+    return OutboundEmail.objects.create(
+        subject=subject,
+        body=body,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        recipients=list(recipients),
+        reply_to=list(reply_to or []),
+    )
+
+
+def email_configured():
+    return bool(settings.EMAIL_HOST_USER and settings.EMAIL_HOST_PASSWORD)
+
+
+def contact_notification(name, email, subject, message):
+    """Return an unsaved ``OutboundEmail`` telling the site owner about a message"""
+    if not email_configured():
+        return None
+    body = (
+        "New message from your portfolio contact form:\n\n"
+        f"Name: {name}\n"
+        f"Email: {email}\n"
+        f"Subject: {subject}\n\n"
+        f"Message:\n{message}\n\n"
+        f"Sent: {timezone.localtime().strftime('%Y-%m-%d %H:%M:%S')}\n"
+    )
+    return OutboundEmail(
+        subject=f"Portfolio Contact: {subject}",
+        body=body,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        recipients=[settings.DEFAULT_FROM_EMAIL],
+        reply_to=[email],
+    )
+
+
+def retry_delay(attempts):
+    """Backoff before attempt ``attempts + 1``: 1, 2, 4, ... minutes, capped"""
+    return min(RETRY_BASE * 2 ** (attempts - 1), RETRY_MAX)
+
+
+def claim_batch(batch_size=BATCH_SIZE):
+    """Reserve up to ``batch_size`` due emails for this worker and return them"""
+    now = timezone.now()
+    with transaction.atomic():
+        due = OutboundEmail.objects.filter(status='pending', next_attempt_at__lte=now).order_by('next_attempt_at')
+        if connection.features.has_select_for_update_skip_locked:
+            due = due.select_for_update(skip_locked=True)
+        batch = list(due[:batch_size])
+        # Push the claimed rows into the future so a concurrent worker skips
+        # them; if this worker dies they become due again after the timeout.
+        OutboundEmail.objects.filter(pk__in=[email.pk for email in batch]).update(
+            next_attempt_at=now + CLAIM_TIMEOUT
+        )
+    return batch
+
+
+def _record_failure(email, error):
+    email.attempts += 1
+    email.last_error = str(error)[:2000]
+    if email.attempts >= MAX_ATTEMPTS:
+        email.status = 'failed'
+        logger.error('Giving up on email %s after %s attempts: %s', email.pk, email.attempts, error)
+    else:
+        email.next_attempt_at = timezone.now() + retry_delay(email.attempts)
+        logger.warning('Email %s failed (attempt %s), retrying: %s', email.pk, email.attempts, error)
+    email.save(update_fields=['attempts', 'last_error', 'status', 'next_attempt_at'])
+
+
+def send_batch(batch):
+    """Send claimed emails over one connection; return the number delivered"""
+    if not batch:
+        return 0
+    backend = get_connection(fail_silently=False)
+    try:
+        backend.open()
+    except Exception as error:
+        # The server is unreachable: every email in the batch waits for a retry
+        for email in batch:
+            _record_failure(email, error)
+        return 0
+
+    sent = 0
+    try:
+        for email in batch:
+            message = EmailMessage(
+                email.subject, email.body, email.from_email, email.recipients,
+                reply_to=email.reply_to or None, connection=backend,
+            )
+            try:
+                message.send()
+            except Exception as error:
+                _record_failure(email, error)
+                continue
+            email.status = 'sent'
+            email.attempts += 1
+            email.sent_at = timezone.now()
+            email.last_error = ''
+            email.save(update_fields=['status', 'attempts', 'sent_at', 'last_error'])
+            sent += 1
+    finally:
+        backend.close()
+    return sent
+
+
+def send_pending(batch_size=BATCH_SIZE):
+    """Deliver every due email, one batch at a time, and return the count sent"""
+    total = 0
+    while True:
+        batch = claim_batch(batch_size)
+        if not batch:
+            return total
+        total += send_batch(batch)
+        if len(batch) < batch_size:
+            return total
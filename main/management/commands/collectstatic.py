@@ -0,0 +1,15 @@
+from django.contrib.staticfiles.management.commands.collectstatic import Command as CollectStaticCommand
+from django.core.management import call_command
+
+
+class Command(CollectStaticCommand):
+    help = 'Bundle the front-end libraries (see vendor_assets), then collect static files'
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--skip-vendor', action='store_true', help='Collect without rebuilding the bundles')
+
+    def handle(self, **options):
+        if not options['skip_vendor']:
+            call_command('vendor_assets', verbosity=options['verbosity'], stdout=self.stdout, stderr=self.stderr)
+        return super().handle(**options)
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from main.assets import BUNDLE_CSS, bundle_available
+from main.critical import build_critical_css
+
+
+class Command(BaseCommand):
+    help = 'Extract the above-the-fold CSS of each page type from the CSS bundle'
+
+    def handle(self, *args, **options):
+        if not bundle_available(BUNDLE_CSS):
+            raise CommandError(f'{BUNDLE_CSS} does not exist; run vendor_assets first')
+        for page, size in build_critical_css().items():
+            if size is None:
+                self.stdout.write(f'{page}: no page to render, the bundle is linked normally')
+            else:
+                self.stdout.write(f'{page}: {size / 1024:.1f} KiB')
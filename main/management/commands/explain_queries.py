@@ -0,0 +1,107 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+# Test utilities, used on purpose: this command is run at build time, not by
+# the site, and needs every view rendered through the full middleware stack
+# with the cache switched off
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from main.models import Project, BlogPost
+
+
+def view_urls():
+    """URLs of every public view, using real objects for the detail pages"""
+    urls = [
+        reverse('index'),
+        reverse('projects'),
+        reverse('blog'),
+        reverse('search') + '?q=django',
+        '/api/projects/',
+        '/api/skills/',
+        '/api/blog/',
+    ]
+    project = Project.objects.order_by('id').first()
+    if project:
+        urls += [reverse('project_detail', args=[project.id]), f'/api/projects/{project.id}/']
+    post = BlogPost.objects.published().order_by('id').first()
+    if post:
+        urls += [reverse('blog_post', args=[post.slug]), f'/api/blog/{post.id}/']
+    return urls
+
+
+def explain(sql):
+    """Return the query plan of ``sql`` as a list of lines"""
+    # SET LOCAL only lasts until the end of the transaction
+    with transaction.atomic(), connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+            return [row[-1] for row in cursor.fetchall()]
+        if connection.vendor == 'postgresql':
+            # Tiny tables are always cheaper to scan; ask whether an index *can* be used
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute('EXPLAIN ' + sql)
+            return [row[0] for row in cursor.fetchall()]
+        cursor.execute('EXPLAIN ' + sql)
+        return [' '.join(str(value) for value in row) for row in cursor.fetchall()]
+
+
+def plan_problems(sql, plan):
+    """Return the parts of ``plan`` that read a portfolio table without an index"""
+    filtered = ' WHERE ' in sql
+    # Ranked full-text matches are always sorted by relevance after the lookup
+    fulltext = any('VIRTUAL TABLE' in line for line in plan) or 'ts_rank' in sql
+    problems = []
+    for line in plan:
+        if connection.vendor == 'sqlite':
+            if filtered and line.startswith('SCAN main_') and 'INDEX' not in line:
+                problems.append(line)
+            elif not fulltext and 'USE TEMP B-TREE FOR ORDER BY' in line:
+                problems.append(line)
+        elif connection.vendor == 'postgresql':
+            if filtered and 'Seq Scan on main_' in line:
+                problems.append(line)
+            elif not fulltext and line.lstrip().startswith('Sort'):
+                problems.append(line)
+    return problems
+
+
+def explain_views():
+    """Yield ``(url, sql, plan, problems)`` for every query the public views run"""
+    client = Client()
+    # Render every view from the database rather than from cached content
+    with override_settings(
+        ALLOWED_HOSTS=['*'],
+        CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}},
+    ):
+        for url in view_urls():
+            with CaptureQueriesContext(connection) as queries:
+                client.get(url, HTTP_ACCEPT='application/json')
+            for query in queries:
+                sql = query['sql']
+                if not sql.lstrip().upper().startswith('SELECT'):
+                    continue
+                plan = explain(sql)
+                yield url, sql, plan, plan_problems(sql, plan)
+
+
+class Command(BaseCommand):
+    help = "Run EXPLAIN on every query issued by the public views and flag unindexed reads"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fail-on-scan', action='store_true',
+            help='Exit with an error if any filtered or sorted query scans a table without an index',
+        )
+
+    def handle(self, *args, **options):
+        failures = 0
+        for url, sql, plan, problems in explain_views():
+            style = self.style.ERROR if problems else self.style.SUCCESS
+            self.stdout.write(style(f'{url}'))
+            self.stdout.write(f'  {sql}')
+            for line in plan:
+                self.stdout.write(f'    {line}')
+            failures += bool(problems)
+        if failures and options['fail_on_scan']:
+            raise CommandError(f'{failures} queries read portfolio tables without an index')
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from main.export import CHUNK_SIZE, export_lines, export_models, parse_since
+
+
+class Command(BaseCommand):
+    help = 'Write every project, post, skill, testimonial and profile as NDJSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', help='Only rows changed at or after this ISO date or datetime')
+        parser.add_argument('--models', help='Comma-separated models to export, e.g. project,blogpost')
+        parser.add_argument('--output', '-o', help='File to write; standard output by default')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+
+    def write(self, write, models, since, chunk_size):
+        count = 0
+        for line in export_lines(models, since, chunk_size):
+            write(line)
+            count += 1
+        return count
+
+    def handle(self, *args, **options):
+        started = timezone.now()
+        try:
+            since = parse_since(options['since']) if options['since'] else None
+            models = export_models([label.strip() for label in (options['models'] or '').split(',') if label.strip()])
+        except ValueError as error:
+            raise CommandError(error)
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                count = self.write(output.write, models, since, options['chunk_size'])
+        else:
+            count = self.write(lambda line: self.stdout.write(line, ending=''), models, since, options['chunk_size'])
+        # Reported on stderr so it does not end up in an exported stream
+        self.stderr.write(f'Exported {count} objects; use --since {started.isoformat()} for later changes')
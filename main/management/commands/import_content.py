@@ -0,0 +1,44 @@
+import os
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from main.importer import BATCH_SIZE, ContentImportError, import_model, import_records, read_csv, read_ndjson
+
+
+class Command(BaseCommand):
+    help = 'Upsert projects, posts, skills, testimonials and profiles from NDJSON or CSV files'
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+', help='Files to import; - reads standard input')
+        parser.add_argument('--format', choices=['ndjson', 'csv'], help='Defaults to the file extension, else NDJSON')
+        parser.add_argument('--model', help='Model of the rows in CSV files, e.g. project')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def records(self, paths, file_format, model):
+        for path in paths:
+            handle = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8')
+            try:
+                if (file_format or os.path.splitext(path)[1].lstrip('.').lower()) == 'csv':
+                    if model is None:
+                        raise ContentImportError('CSV files need --model')
+                    yield from read_csv(handle, model)
+                else:
+                    yield from read_ndjson(handle)
+            except ContentImportError as error:
+                raise ContentImportError(f'{path}: {error}') from error
+            finally:
+                if handle is not sys.stdin:
+                    handle.close()
+
+    def handle(self, *args, **options):
+        try:
+            model = import_model(options['model']) if options['model'] else None
+            counts = import_records(
+                self.records(options['paths'], options['format'], model), options['batch_size'],
+            )
+        except (ContentImportError, OSError) as error:
+            raise CommandError(error)
+        for model, count in counts.items():
+            self.stdout.write(f'{model._meta.verbose_name_plural}: {count}')
+        self.stdout.write(self.style.SUCCESS(f'Imported {sum(counts.values())} objects'))
@@ -0,0 +1,50 @@
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from main.images import IMAGE_FIELDS, record_variants, safe_build_variants
+from main.jobs import init_worker
+from main.models import Profile, Project, Testimonial, BlogPost, ImageVariant
+
+MODELS = (Profile, Project, Testimonial, BlogPost)
+
+
+def uploads():
+    """Map every image upload in use to the models that show it"""
+    sources = {}
+    for model in MODELS:
+        fields = IMAGE_FIELDS[model._meta.model_name]
+        for row in model.objects.values_list(*fields):
+            for name in row:
+                if name:
+                    sources.setdefault(name, set()).add(model)
+    return sources
+
+
+class Command(BaseCommand):
+    help = 'Create resized WebP variants of uploaded images and record them in the manifest'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None, help='Processes to resize with (default: CPU count)')
+        parser.add_argument('--all', action='store_true', help='Also reprocess uploads already in the manifest')
+
+    def handle(self, *args, **options):
+        sources = uploads()
+        if not options['all']:
+            done = set(ImageVariant.objects.filter(source__in=list(sources)).values_list('source', flat=True))
+            sources = {name: models for name, models in sources.items() if name not in done}
+        if not sources:
+            self.stdout.write('No images to process')
+            return
+
+        names = sorted(sources)
+        processed = failed = 0
+        with ProcessPoolExecutor(max_workers=options['workers'], initializer=init_worker) as executor:
+            for name, renditions in zip(names, executor.map(safe_build_variants, names)):
+                record_variants(name, renditions, sources[name])
+                if renditions is None:
+                    failed += 1
+                    self.stderr.write(f'Could not process {name}')
+                else:
+                    processed += 1
+        self.stdout.write(self.style.SUCCESS(f'Processed {processed} images, {failed} failed'))
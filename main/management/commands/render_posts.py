@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from main.cache import bump_generation_on_commit
+from main.models import BlogPost, RENDERED_FIELDS
+
+
+class Command(BaseCommand):
+    help = 'Render the HTML, table of contents and reading time of every blog post again'
+
+    def handle(self, *args, **options):
+        posts = list(BlogPost.objects.only('content', *RENDERED_FIELDS))
+        for post in posts:
+            post.render_content()
+        BlogPost.objects.bulk_update(posts, RENDERED_FIELDS, batch_size=500)
+        bump_generation_on_commit(BlogPost)
+        self.stdout.write(self.style.SUCCESS(f'Rendered {len(posts)} posts'))
@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from main.mail import BATCH_SIZE, send_pending
+
+
+class Command(BaseCommand):
+    help = 'Send queued outbound email, retrying failures with backoff'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Send what is due and exit')
+        parser.add_argument('--interval', type=float, default=5, help='Seconds to wait between polls')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Emails sent per connection')
+
+    def handle(self, *args, **options):
+        while True:
+            # Long-running process: drop connections the database has closed
+            close_old_connections()
+            sent = send_pending(options['batch_size'])
+            if sent:
+                self.stdout.write(f'Sent {sent} emails')
+            if options['once']:
+                return
+            try:
+                time.sleep(options['interval'])
+            except KeyboardInterrupt:
+                return
@@ -0,0 +1,38 @@
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError
+
+from main.assets import AssetError, build, icon_sources, output_root, used_icons, write_files
+
+
+class Command(BaseCommand):
+    help = 'Download, subset and bundle the front-end libraries into static/main/vendor/'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fail-offline', action='store_true',
+            help='Exit with an error when a download fails instead of keeping the CDN links',
+        )
+
+    def handle(self, *args, **options):
+        icons = used_icons(icon_sources())
+        try:
+            # Everything is downloaded before anything is written, so a
+            # failure leaves the previous bundle in place
+            files = build(icons)
+        except AssetError as error:
+            if options['fail_offline']:
+                raise CommandError(str(error))
+            self.stderr.write(self.style.WARNING(f'{error}; pages keep using the CDN links'))
+            return
+        write_files(files)
+        total = sum(len(data) for data in files.values())
+        self.stdout.write(self.style.SUCCESS(
+            f'Wrote {len(files)} files ({total // 1024} KiB, {len(icons)} icon classes) to {output_root()}'
+        ))
+
+        # Rendering sample pages needs a migrated database
+        try:
+            call_command('critical_css', stdout=self.stdout, stderr=self.stderr)
+        except DatabaseError as error:
+            self.stderr.write(self.style.WARNING(f'Skipped critical CSS: {error}'))
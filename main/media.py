@@ -0,0 +1,170 @@
+"""
+Production view for user uploads under ``MEDIA_URL``.
+
+Static files are served by WhiteNoise; uploads change at runtime, so they
+get this view instead of ``django.views.static.serve``. It adds:
+
+* ``Range`` requests (single ranges) answered with 206 Partial Content
+* ``ETag``/``If-None-Match`` and ``If-Modified-Since`` revalidation
+* year-long ``immutable`` caching for image variants, whose names carry a
+  hash of the upload's contents, and a short revalidated lifetime for
+  everything else
+* WhiteNoise-style precompressed siblings (``name.br``, ``name.gz``) for
+  compressible types when the client accepts them
+
+Responses hand the open file to the WSGI server's ``wsgi.file_wrapper``, so
+gunicorn sends the body with ``sendfile()``; ranges are expressed as a file
+offset plus ``Content-Length``, which keeps that zero-copy path.
+"""
+import mimetypes
+import os
+import posixpath
+import re
+from email.utils import formatdate
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_http_date_safe
+from django.views.decorators.http import require_safe
+
+IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+MEDIA_MAX_AGE = 60 * 60
+# Read size when the server cannot use sendfile()
+BLOCK_SIZE = 64 * 1024
+# Image variants, named after a hash of their upload (see images.variant_name)
+VARIANT_NAME_RE = re.compile(r'^variants/(?:.+/)?[^/]+-[0-9a-f]{8}-\d+w\.webp$')
+COMPRESSIBLE_TYPES = re.compile(r'^(text/|image/svg\+xml|application/(json|javascript|xml|pdf))')
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class FileRange:
+    """Read at most ``length`` bytes of ``file`` starting at ``start``.
+
+    ``fileno()`` is passed through so ``sendfile()`` still works: the server
+    sends from the file's current offset for ``Content-Length`` bytes.
+    """
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.remaining = length
+        file.seek(start)
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def is_immutable(path):
+    return bool(VARIANT_NAME_RE.match(path))
+
+
+def etag_for(stat):
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+
+def not_modified(request, etag, mtime):
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match is not None:
+        return if_none_match.strip() == '*' or etag in [tag.strip() for tag in if_none_match.split(',')]
+    since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+    return since is not None and int(mtime) <= since
+
+
+def parse_range(header, size):
+    """Return ``(start, end)`` inclusive for a single byte range, None if unsatisfiable"""
+    match = RANGE_RE.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            return None
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return None
+    return start, end
+
+
+def find_encoded(request, fullpath, content_type):
+    """Return ``(path, encoding)`` of the best precompressed sibling, if any"""
+    if not COMPRESSIBLE_TYPES.match(content_type):
+        return fullpath, None
+    accepted = request.META.get('HTTP_ACCEPT_ENCODING', '')
+    for encoding, suffix in ENCODINGS:
+        if encoding in accepted and os.path.isfile(fullpath + suffix):
+            return fullpath + suffix, encoding
+    return fullpath, None
+
+
+@require_safe
+def serve_media(request, path, document_root=None):
+    """Serve a file below ``MEDIA_ROOT`` (or ``document_root``)"""
+    document_root = document_root or settings.MEDIA_ROOT
+    path = posixpath.normpath(path).lstrip('/')
+    # Raises SuspiciousFileOperation (400) for paths escaping the root
+    fullpath = safe_join(document_root, path)
+    if not os.path.isfile(fullpath):
+        raise Http404('Not found')
+
+    content_type = mimetypes.guess_type(fullpath)[0] or 'application/octet-stream'
+    source, encoding = find_encoded(request, fullpath, content_type)
+    stat = os.stat(source)
+    etag = etag_for(stat)
+    headers = {
+        'ETag': etag,
+        'Last-Modified': formatdate(stat.st_mtime, usegmt=True),
+        'Accept-Ranges': 'bytes',
+        'Cache-Control': (
+            f'public, max-age={IMMUTABLE_MAX_AGE}, immutable' if is_immutable(path)
+            else f'public, max-age={MEDIA_MAX_AGE}, must-revalidate'
+        ),
+    }
+
+    if not_modified(request, etag, stat.st_mtime):
+        response = HttpResponseNotModified()
+        for header in ('ETag', 'Last-Modified', 'Cache-Control'):
+            response[header] = headers[header]
+        return response
+
+    start, length, status = 0, stat.st_size, 200
+    range_header = request.META.get('HTTP_RANGE')
+    if_range = request.META.get('HTTP_IF_RANGE')
+    # A stale If-Range means the client's partial copy is outdated: send it all
+    if range_header and (if_range is None or if_range in (etag, headers['Last-Modified'])):
+        byte_range = parse_range(range_header, stat.st_size)
+        if byte_range is None:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{stat.st_size}'
+            return response
+        start, end = byte_range
+        length, status = end - start + 1, 206
+        headers['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+
+    response = FileResponse(FileRange(open(source, 'rb'), start, length), status=status, content_type=content_type)
+    response.block_size = BLOCK_SIZE
+    response['Content-Length'] = str(length)
+    for header, value in headers.items():
+        response[header] = value
+    if encoding:
+        response['Content-Encoding'] = encoding
+    if COMPRESSIBLE_TYPES.match(content_type):
+        patch_vary_headers(response, ['Accept-Encoding'])
+    return response
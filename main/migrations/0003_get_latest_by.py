@@ -0,0 +1,25 @@
+# Generated by Django 5.0.6 on 2026-10-18 07:09
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0002_alter_profile_bio_alter_profile_name'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='blogpost',
+            options={'get_latest_by': 'updated_at', 'ordering': ['-created_at']},
+        ),
+        migrations.AlterModelOptions(
+            name='project',
+            options={'get_latest_by': 'date_created'},
+        ),
+        migrations.AlterModelOptions(
+            name='testimonial',
+            options={'get_latest_by': 'created_at'},
+        ),
+    ]
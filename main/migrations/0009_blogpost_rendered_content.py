@@ -0,0 +1,88 @@
+# Generated by Django 5.0.6 on 2026-10-18 07:40
+
+import math
+import re
+
+import bleach
+import main.models
+from django.db import migrations, models
+from django.utils.html import strip_tags
+
+
+# Frozen copy of main.rendering's allowlist when this migration was written
+ALLOWED_TAGS = [
+    'a', 'abbr', 'b', 'blockquote', 'br', 'code', 'div', 'em', 'figcaption', 'figure', 'h1', 'h2', 'h3',
+    'h4', 'h5', 'h6', 'hr', 'i', 'iframe', 'img', 'li', 'ol', 'p', 'pre', 's', 'span', 'strong', 'sub',
+    'sup', 'table', 'tbody', 'td', 'tfoot', 'th', 'thead', 'tr', 'u', 'ul',
+]
+ALLOWED_ATTRIBUTES = {
+    '*': ['class', 'style'],
+    'a': ['href', 'title', 'target'],
+    'abbr': ['title'],
+    'img': ['src', 'alt', 'title', 'width', 'height'],
+    'td': ['colspan', 'rowspan'],
+    'th': ['colspan', 'rowspan'],
+}
+ALLOWED_STYLES = [
+    'color', 'background-color', 'text-align', 'font-weight', 'font-style', 'text-decoration', 'width', 'float',
+]
+IFRAME_SOURCE_RE = re.compile(r'^(https:)?//(www\.youtube\.com/embed/|player\.vimeo\.com/video/)')
+IFRAME_ATTRIBUTES = ('width', 'height', 'frameborder', 'allowfullscreen')
+WORD_RE = re.compile(r'\w+(?:[\'’-]\w+)*')
+
+
+def allow_attribute(tag, name, value):
+    if tag == 'iframe':
+        if name == 'src':
+            return bool(IFRAME_SOURCE_RE.match(value))
+        return name in IFRAME_ATTRIBUTES
+    return name in ALLOWED_ATTRIBUTES.get(tag, []) + ALLOWED_ATTRIBUTES['*']
+
+
+def render_posts(apps, schema_editor):
+    # Sanitized source and HTML and the reading time only; `manage.py
+    # render_posts` adds the table of contents, highlighting and image srcsets
+    BlogPost = apps.get_model('main', 'BlogPost')
+    for post in BlogPost.objects.all():
+        post.content = post.content_html = bleach.clean(
+            post.content, tags=ALLOWED_TAGS, attributes=allow_attribute, styles=ALLOWED_STYLES, strip=True,
+        )
+        post.word_count = len(WORD_RE.findall(strip_tags(post.content_html)))
+        post.reading_time = math.ceil(post.word_count / 200)
+        post.save(update_fields=['content', 'content_html', 'word_count', 'reading_time'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0008_project_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blogpost',
+            name='content_html',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='blogpost',
+            name='reading_time',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Minutes'),
+        ),
+        migrations.AddField(
+            model_name='blogpost',
+            name='toc',
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+        migrations.AddField(
+            model_name='blogpost',
+            name='word_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='blogpost',
+            name='content',
+            field=main.models.SummernoteSourceField(),
+        ),
+        migrations.RunPython(render_posts, migrations.RunPython.noop),
+    ]
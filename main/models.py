@@ -1,7 +1,11 @@
+from django import forms
 from django.db import models
+from django.urls import reverse
+from django.utils import timezone
 from django.core.validators import URLValidator
 from taggit.managers import TaggableManager
 from django_summernote.fields import SummernoteTextField
+from django_summernote.widgets import SummernoteWidget
 
 class Profile(models.Model):
     name = models.CharField(max_length=100, default="Besong Wisdom ")
@@ -27,10 +31,21 @@ class Project(models.Model):
     github_url = models.TextField(validators=[URLValidator()], blank=True)
     technologies = models.CharField(max_length=200)
     date_created = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     featured = models.BooleanField(default=False)
     
     def __str__(self):
         return self.title
+    
+    def get_absolute_url(self):
+        return reverse('project_detail', args=[self.id])
+    
+    class Meta:
+        get_latest_by = 'updated_at'
+        indexes = [
+            models.Index(fields=['-date_created', '-id'], name='project_listing_idx'),
+            models.Index(fields=['-date_created'], condition=models.Q(featured=True), name='project_featured_idx'),
+        ]
 
 class Skill(models.Model):
     name = models.CharField(max_length=100)
@@ -39,6 +54,11 @@ class Skill(models.Model):
     
     def __str__(self):
         return self.name
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['category', 'id'], name='skill_category_idx'),
+        ]
 
 class Testimonial(models.Model):
     client_name = models.CharField(max_length=100)
@@ -52,23 +72,94 @@ class Testimonial(models.Model):
     
     def __str__(self):
         return f"Testimonial from {self.client_name}"
+    
+    class Meta:
+        get_latest_by = 'created_at'
+        indexes = [
+            models.Index(fields=['-created_at'], condition=models.Q(featured=True), name='testimonial_featured_idx'),
+        ]
+
+class BlogPostQuerySet(models.QuerySet):
+    def published(self):
+        return self.filter(published=True)
+    
+    def published_with_tags(self):
+        """Published posts with their tags prefetched in one extra query"""
+        return self.published().prefetch_related('tags')
+
+class SummernoteSourceField(SummernoteTextField):
+    """Summernote's editor, sanitized with main.rendering's allowlist.
+
+    Summernote's own field cleans with an allowlist that drops image sources
+    and code blocks.
+    """
+    def formfield(self, **kwargs):
+        kwargs.update({'form_class': forms.CharField, 'widget': SummernoteWidget()})
+        return models.TextField.formfield(self, **kwargs)
+    
+    def to_python(self, value):
+        from .rendering import sanitize
+        
+        value = models.TextField.to_python(self, value)
+        return value if value is None else sanitize(value)
+    
+    def pre_save(self, model_instance, add):
+        value = self.to_python(getattr(model_instance, self.attname))
+        setattr(model_instance, self.attname, value)
+        return value
+
+RENDERED_FIELDS = ('content_html', 'toc', 'word_count', 'reading_time')
 
 class BlogPost(models.Model):
     title = models.CharField(max_length=200)
     slug = models.SlugField(unique=True, max_length=200)
-    content = SummernoteTextField()
+    content = SummernoteSourceField()
     excerpt = models.TextField(max_length=300)
     featured_image = models.ImageField(upload_to='blog/')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     published = models.BooleanField(default=False)
     tags = TaggableManager()
+    # Rendered from content on save (see main.rendering)
+    content_html = models.TextField(blank=True, editable=False)
+    toc = models.JSONField(default=list, blank=True, editable=False)
+    word_count = models.PositiveIntegerField(default=0, editable=False)
+    reading_time = models.PositiveIntegerField(default=0, editable=False, help_text='Minutes')
+    
+    objects = BlogPostQuerySet.as_manager()
     
     def __str__(self):
         return self.title
     
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'content' in update_fields:
+            self.render_content()
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, *RENDERED_FIELDS}
+        super().save(*args, **kwargs)
+    
+    def render_content(self, image_info=None):
+        """Fill in the rendered fields from ``content``; ``image_info`` defaults to the image manifest"""
+        from .images import manifest
+        from .rendering import render_content
+        
+        rendered = render_content(self.content, image_info=image_info or manifest().get)
+        self.content_html = rendered.html
+        self.toc = rendered.toc
+        self.word_count = rendered.word_count
+        self.reading_time = rendered.reading_time
+    
+    def get_absolute_url(self):
+        return reverse('blog_post', args=[self.slug])
+    
     class Meta:
         ordering = ['-created_at']
+        get_latest_by = 'updated_at'
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], condition=models.Q(published=True), name='blogpost_published_idx'),
+            models.Index(fields=['updated_at'], name='blogpost_updated_idx'),
+        ]
 
 class ContactMessage(models.Model):
     name = models.CharField(max_length=100)
@@ -79,4 +170,90 @@ class ContactMessage(models.Model):
     read = models.BooleanField(default=False)
     
     def __str__(self):
-        return f"Message from {self.name} - {self.subject}"
\ No newline at end of file
+        return f"Message from {self.name} - {self.subject}"
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['-timestamp'], name='contactmessage_timestamp_idx'),
+            models.Index(fields=['-timestamp'], condition=models.Q(read=False), name='contactmessage_unread_idx'),
+        ]
+
+class SearchDocument(models.Model):
+    """Searchable text of a project, published post or skill.
+
+    Rows are kept up to date by ``main.signals`` and indexed by the database's
+    full-text engine (see ``main.search``).
+    """
+    KIND_CHOICES = [
+        ('project', 'Project'),
+        ('blogpost', 'Blog post'),
+        ('skill', 'Skill'),
+    ]
+    
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    title = models.CharField(max_length=200)
+    body = models.TextField(blank=True)
+    url = models.CharField(max_length=300)
+    
+    def __str__(self):
+        return f"{self.get_kind_display()}: {self.title}"
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='unique_search_document'),
+        ]
+
+class OutboundEmail(models.Model):
+    """An email waiting to be delivered by ``manage.py run_mail_worker``.
+
+    Requests only insert rows; the worker sends them over one SMTP connection
+    and retries failures with exponential backoff (see ``main.mail``).
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+    
+    subject = models.CharField(max_length=300)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254)
+    recipients = models.JSONField(default=list)
+    reply_to = models.JSONField(default=list, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    
+    def __str__(self):
+        return f"{self.subject} ({self.get_status_display()})"
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['next_attempt_at'], condition=models.Q(status='pending'), name='outboundemail_due_idx'),
+        ]
+
+class ImageVariant(models.Model):
+    """One stored rendition of an uploaded image.
+
+    The manifest lets templates build ``srcset``s without touching the
+    file system. Each upload has a row for the original (``name == source``)
+    plus one per resized WebP variant (see ``main.images``).
+    """
+    source = models.CharField(max_length=255)
+    name = models.CharField(max_length=255)
+    width = models.PositiveIntegerField()
+    height = models.PositiveIntegerField()
+    size = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"{self.name} ({self.width}x{self.height})"
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['source', 'width'], name='unique_image_variant'),
+        ]
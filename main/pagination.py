@@ -0,0 +1,192 @@
+"""
+Keyset (seek) pagination for the HTML listings and the REST API.
+
+Instead of ``COUNT(*)`` plus ``OFFSET``, each page remembers the sort key of
+its first and last row, and the neighbouring page is fetched with a
+``WHERE (created_at, id) < (...)`` style condition that the database can
+answer from an index. Page 1000 therefore costs the same as page 1. The total
+count is only computed when asked for.
+"""
+import base64
+import binascii
+import json
+from collections import OrderedDict
+
+from django.db.models import Q
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+NEXT, PREVIOUS = 'n', 'p'
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+class KeysetPage:
+    def __init__(self, object_list, paginator, next_key=None, previous_key=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = paginator.encode_cursor(NEXT, next_key) if next_key else None
+        self.previous_cursor = paginator.encode_cursor(PREVIOUS, previous_key) if previous_key else None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """Paginate ``queryset`` by the unique sort key ``ordering``.
+
+    All ordering fields must sort in the same direction and together be
+    unique, e.g. ``('-created_at', '-id')``. Pass ``count=True`` to expose
+    the total number of rows (one extra ``COUNT(*)`` query).
+    """
+
+    def __init__(self, queryset, per_page, ordering, count=False):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.descending = ordering[0].startswith('-')
+        self.fields = [field.lstrip('-') for field in ordering]
+        self.with_count = count
+        self._count = None
+
+    @property
+    def count(self):
+        if not self.with_count:
+            return None
+        if self._count is None:
+            self._count = self.queryset.count()
+        return self._count
+
+    # Cursors
+
+    def encode_cursor(self, direction, key):
+        payload = json.dumps([direction, [str(value) for value in key]], separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            payload = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            direction, raw_key = json.loads(payload)
+            if direction not in (NEXT, PREVIOUS) or len(raw_key) != len(self.fields):
+                raise InvalidCursor(cursor)
+            model = self.queryset.model
+            key = [model._meta.get_field(name).to_python(value) for name, value in zip(self.fields, raw_key)]
+        except (binascii.Error, ValueError, TypeError, UnicodeDecodeError) as exc:
+            raise InvalidCursor(cursor) from exc
+        return direction, key
+
+    # Querying
+
+    def _key(self, obj):
+        if isinstance(obj, dict):
+            return [obj[field] for field in self.fields]
+        return [getattr(obj, field) for field in self.fields]
+
+    def _seek(self, key, forward):
+        # Rows strictly after ``key`` in the direction of travel, expanded as
+        # (a < x) OR (a = x AND b < y) OR ... so every term can use the index
+        lookup = 'lt' if forward == self.descending else 'gt'
+        condition = Q()
+        for i, field in enumerate(self.fields):
+            term = Q(**{f'{field}__{lookup}': key[i]})
+            for previous_field, previous_value in zip(self.fields[:i], key[:i]):
+                term &= Q(**{previous_field: previous_value})
+            condition |= term
+        return condition
+
+    def _ordering(self, forward):
+        prefix = '-' if forward == self.descending else ''
+        return [prefix + field for field in self.fields]
+
+    def page(self, cursor=None):
+        """Return the page after (or before) ``cursor``; the first page if it is empty or invalid"""
+        direction, key = NEXT, None
+        if cursor:
+            try:
+                direction, key = self.decode_cursor(cursor)
+            except InvalidCursor:
+                pass
+
+        forward = direction == NEXT
+        queryset = self.queryset.order_by(*self._ordering(forward))
+        if key is not None:
+            queryset = queryset.filter(self._seek(key, forward))
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if not forward:
+            rows.reverse()
+
+        if not rows:
+            return KeysetPage(rows, self)
+        if forward:
+            next_key = self._key(rows[-1]) if has_more else None
+            previous_key = self._key(rows[0]) if key is not None else None
+        else:
+            next_key = self._key(rows[-1])
+            previous_key = self._key(rows[0]) if has_more else None
+        return KeysetPage(rows, self, next_key=next_key, previous_key=previous_key)
+
+
+class KeysetPagination(BasePagination):
+    """DRF pagination using ``KeysetPaginator`` and the view's ``keyset_ordering``.
+
+    Responses contain ``next``/``previous`` links and ``results``; add
+    ``?count=true`` to also get the total ``count``.
+    """
+    page_size = 10
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.paginator = KeysetPaginator(
+            queryset, self.page_size, view.keyset_ordering,
+            count=request.query_params.get(self.count_query_param) in ('1', 'true'),
+        )
+        self.page = self.paginator.page(request.query_params.get(self.cursor_query_param))
+        return list(self.page)
+
+    def _link(self, cursor):
+        if cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        payload = OrderedDict()
+        if self.paginator.with_count:
+            payload['count'] = self.paginator.count
+        payload['next'] = self._link(self.page.next_cursor)
+        payload['previous'] = self._link(self.page.previous_cursor)
+        payload['results'] = data
+        return Response(payload)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'count': {'type': 'integer'},
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
@@ -0,0 +1,150 @@
+"""
+Sliding-window rate limiting stored in the configured cache.
+
+Each rule counts hits in fixed windows and estimates the rate over the last
+``period`` seconds as the current window's count plus the previous window's
+count weighted by how much of it still overlaps. All counters of a request
+are read with one ``get_many``, so an allowed request costs one read and one
+``add``/``incr`` per rule and a throttled one just the read.
+
+Contact submissions are limited per client IP and per sender email hash,
+before the form is validated or the database is touched. The REST API uses
+the same limiter through ``SlidingWindowThrottle``.
+"""
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, JsonResponse
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle, SimpleRateThrottle
+
+KEY = 'ratelimit:{}:{}'
+
+
+def parse_rate(rate):
+    """Turn ``'5/h'`` into ``(5, 3600)``, like DRF's throttle rates"""
+    return SimpleRateThrottle.parse_rate(None, rate)
+
+
+def client_ip(request):
+    # Honours REST_FRAMEWORK['NUM_PROXIES'] like the DRF throttles do
+    return BaseThrottle().get_ident(request)
+
+
+def email_hash(email):
+    return hashlib.sha256(email.strip().lower().encode()).hexdigest()[:32]
+
+
+class SlidingWindow:
+
+    def __init__(self, name, rate):
+        self.name = name
+        self.limit, self.period = parse_rate(rate)
+
+    def keys(self, ident, now):
+        window = int(now // self.period)
+        prefix = KEY.format(self.name, ident)
+        return f'{prefix}:{window}', f'{prefix}:{window - 1}'
+
+    def wait(self, current, previous, now):
+        """Seconds until one more hit is allowed, or 0 if it is allowed now"""
+        elapsed = (now % self.period) / self.period
+        if current + previous * (1 - elapsed) < self.limit:
+            return 0
+        if current >= self.limit or not previous:
+            return self.period - now % self.period
+        # The previous window's weight has to fall below (limit - current) / previous;
+        # never report 0, which would mean allowed
+        return max(((1 - (self.limit - current) / previous) - elapsed) * self.period, 0.001)
+
+
+def consume(rules, now=None):
+    """Record a hit against every ``(SlidingWindow, ident)`` rule if all allow it.
+
+    Returns 0 when the hit was allowed, otherwise the seconds to wait.
+    """
+    now = time.time() if now is None else now
+    keyed = [(rule, rule.keys(ident, now)) for rule, ident in rules]
+    counts = cache.get_many([key for _, keys in keyed for key in keys])
+
+    wait = max(
+        (rule.wait(counts.get(current, 0), counts.get(previous, 0), now) for rule, (current, previous) in keyed),
+        default=0,
+    )
+    if wait:
+        return wait
+
+    for rule, (current, _) in keyed:
+        # Keep each window until the next one no longer looks back at it
+        if not cache.add(current, 1, rule.period * 2):
+            try:
+                cache.incr(current)
+            except ValueError:
+                cache.set(current, 1, rule.period * 2)
+    return 0
+
+
+# Contact submissions
+
+def contact_rules(request, data):
+    rules = [(SlidingWindow('contact-ip', getattr(settings, 'CONTACT_RATE_PER_IP', '5/h')), client_ip(request))]
+    email = data.get('email') if hasattr(data, 'get') else None
+    if isinstance(email, str) and email.strip():
+        rate = getattr(settings, 'CONTACT_RATE_PER_EMAIL', '3/h')
+        rules.append((SlidingWindow('contact-email', rate), email_hash(email)))
+    return rules
+
+
+def throttled_response(request, wait):
+    message = 'Too many messages. Please try again later.'
+    if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+        response = JsonResponse({'success': False, 'message': message}, status=429)
+    else:
+        response = HttpResponse(message, status=429, content_type='text/plain')
+    response['Retry-After'] = str(int(wait) + 1)
+    return response
+
+
+def ratelimit_contact(view_func):
+    """Reject contact form POSTs over the per-IP or per-email rate"""
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        # The homepage only handles POSTs that carry the contact form
+        if request.method == 'POST' and 'name' in request.POST:
+            wait = consume(contact_rules(request, request.POST))
+            if wait:
+                return throttled_response(request, wait)
+        return view_func(request, *args, **kwargs)
+    return wrapper
+
+
+# REST framework
+
+class SlidingWindowThrottle(BaseThrottle):
+    """Throttle API clients by IP using the rate of the view's ``throttle_scope``"""
+    default_scope = 'api'
+
+    def allow_request(self, request, view):
+        scope = getattr(view, 'throttle_scope', None) or self.default_scope
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(scope)
+        if rate is None:
+            return True
+        self.wait_time = consume([(SlidingWindow(f'api-{scope}', rate), self.get_ident(request))])
+        return not self.wait_time
+
+    def wait(self):
+        return self.wait_time
+
+
+class ContactRateThrottle(BaseThrottle):
+    """Apply the contact form limits to JSON submissions"""
+
+    def allow_request(self, request, view):
+        self.wait_time = consume(contact_rules(request, request.data))
+        return not self.wait_time
+
+    def wait(self):
+        return self.wait_time
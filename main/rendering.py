@@ -0,0 +1,276 @@
+"""
+Blog post HTML, rendered once when a post is saved.
+
+Post content is stored sanitized with ``sanitize`` (see ``SummernoteSourceField``). ``render_content``
+turns it into the HTML the detail page shows as is:
+
+* sanitized with bleach to an allowlist of tags, attributes and styles
+* images load lazily and get a ``srcset`` of their WebP variants
+* ``<pre>`` blocks are highlighted with Pygments, if installed
+* ``<h2>``-``<h4>`` get ids and anchor links, and make up the table of contents
+* words are counted for the reading time
+
+Uploaded images that have no variants yet are queued by ``queue_post_images``;
+the post is rendered again when they are ready.
+"""
+import html
+import math
+import re
+from collections import namedtuple
+from html.parser import HTMLParser
+from urllib.parse import unquote
+
+import bleach
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.utils.text import slugify
+
+from .cache import bump_generation_on_commit
+from .images import manifest, queue_upload
+
+ALLOWED_TAGS = [
+    'a', 'abbr', 'b', 'blockquote', 'br', 'code', 'div', 'em', 'figcaption', 'figure', 'h1', 'h2', 'h3',
+    'h4', 'h5', 'h6', 'hr', 'i', 'iframe', 'img', 'li', 'ol', 'p', 'pre', 's', 'span', 'strong', 'sub',
+    'sup', 'table', 'tbody', 'td', 'tfoot', 'th', 'thead', 'tr', 'u', 'ul',
+]
+ALLOWED_ATTRIBUTES = {
+    '*': ['class', 'style'],
+    'a': ['href', 'title', 'target'],
+    'abbr': ['title'],
+    'img': ['src', 'alt', 'title', 'width', 'height'],
+    'td': ['colspan', 'rowspan'],
+    'th': ['colspan', 'rowspan'],
+}
+ALLOWED_STYLES = [
+    'color', 'background-color', 'text-align', 'font-weight', 'font-style', 'text-decoration', 'width', 'float',
+]
+# Summernote's video button embeds these players
+IFRAME_SOURCE_RE = re.compile(r'^(https:)?//(www\.youtube\.com/embed/|player\.vimeo\.com/video/)')
+IFRAME_ATTRIBUTES = ('width', 'height', 'frameborder', 'allowfullscreen')
+
+TOC_LEVELS = ('h2', 'h3', 'h4')
+WORDS_PER_MINUTE = 200
+WORD_RE = re.compile(r'\w+(?:[\'’-]\w+)*')
+LANGUAGE_RE = re.compile(r'\blang(?:uage)?-([\w+#-]+)')
+IMAGE_SIZES = '(min-width: 992px) 616px, 100vw'
+VOID_ELEMENTS = {'br', 'hr', 'img'}
+
+RenderedContent = namedtuple('RenderedContent', 'html toc word_count reading_time')
+IMAGE_SRC_RE = re.compile(r'<img\b[^>]*?\ssrc="([^"]*)"')
+
+
+def _allow_attribute(tag, name, value):
+    if tag == 'iframe':
+        if name == 'src':
+            return bool(IFRAME_SOURCE_RE.match(value))
+        return name in IFRAME_ATTRIBUTES
+    allowed = ALLOWED_ATTRIBUTES.get(tag, []) + ALLOWED_ATTRIBUTES['*']
+    return name in allowed
+
+
+def sanitize(content):
+    return bleach.clean(
+        content, tags=ALLOWED_TAGS, attributes=_allow_attribute, styles=ALLOWED_STYLES, strip=True,
+    )
+
+
+def highlight(code, language):
+    """Return highlighted HTML for ``code``, or None without Pygments or a lexer"""
+    try:
+        from pygments import highlight as pygments_highlight
+        from pygments.formatters import HtmlFormatter
+        from pygments.lexers import get_lexer_by_name
+        from pygments.util import ClassNotFound
+    except ImportError:
+        return None
+    if not language:
+        return None
+    try:
+        lexer = get_lexer_by_name(language)
+    except ClassNotFound:
+        return None
+    return pygments_highlight(code, lexer, HtmlFormatter(nowrap=True))
+
+
+def _attributes(attrs):
+    return ''.join(
+        f' {name}' if value is None else f' {name}="{html.escape(value)}"' for name, value in attrs
+    )
+
+
+def upload_name(src):
+    """The storage name of an image under ``MEDIA_URL``, or None"""
+    if src and src.startswith(settings.MEDIA_URL):
+        return unquote(src[len(settings.MEDIA_URL):])
+    return None
+
+
+class ContentRenderer(HTMLParser):
+    """Re-emit sanitized HTML with the transformations applied"""
+
+    def __init__(self, image_info):
+        super().__init__(convert_charrefs=False)
+        self.image_info = image_info
+        self.output = []
+        self.toc = []
+        self.ids = set()
+        self.words = 0
+        # Open <pre> or heading whose content is being collected
+        self.pre = None
+        self.heading = None
+
+    def _emit(self, text):
+        if self.heading is not None:
+            self.heading['markup'].append(text)
+        else:
+            self.output.append(text)
+
+    def handle_starttag(self, tag, attrs):
+        if self.pre is not None:
+            if tag == 'br':
+                self.pre['text'].append('\n')
+            elif tag == 'code':
+                self.pre['language'] = self.pre['language'] or self._language(attrs)
+            return
+        if tag == 'pre':
+            self.pre = {'attrs': attrs, 'text': [], 'language': self._language(attrs)}
+            return
+        if tag in TOC_LEVELS and self.heading is None:
+            self.heading = {'tag': tag, 'attrs': attrs, 'markup': [], 'text': []}
+            return
+        if tag == 'img':
+            attrs = self._image(attrs)
+        elif tag == 'a' and dict(attrs).get('target') == '_blank':
+            attrs = [*attrs, ('rel', 'noopener noreferrer')]
+        elif tag == 'iframe':
+            attrs = [*attrs, ('loading', 'lazy')]
+        self._emit(f'<{tag}{_attributes(attrs)}>')
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag):
+        if self.pre is not None:
+            if tag == 'pre':
+                self._close_pre()
+            return
+        if self.heading is not None and tag == self.heading['tag']:
+            self._close_heading()
+            return
+        if tag not in VOID_ELEMENTS:
+            self._emit(f'</{tag}>')
+
+    def handle_data(self, data):
+        if self.pre is not None:
+            self.pre['text'].append(data)
+            return
+        self.words += len(WORD_RE.findall(data))
+        if self.heading is not None:
+            self.heading['text'].append(data)
+        self._emit(data)
+
+    def handle_entityref(self, name):
+        self._reference(f'&{name};')
+
+    def handle_charref(self, name):
+        self._reference(f'&#{name};')
+
+    def _reference(self, reference):
+        if self.pre is not None:
+            self.pre['text'].append(html.unescape(reference))
+            return
+        if self.heading is not None:
+            self.heading['text'].append(html.unescape(reference))
+        self._emit(reference)
+
+    def _language(self, attrs):
+        match = LANGUAGE_RE.search(dict(attrs).get('class') or '')
+        return match.group(1) if match else None
+
+    def _close_pre(self):
+        code = ''.join(self.pre['text'])
+        self.words += len(WORD_RE.findall(code))
+        highlighted = highlight(code, self.pre['language'])
+        if highlighted is None:
+            body, attrs = html.escape(code), self.pre['attrs']
+        else:
+            body = highlighted
+            attrs = [(name, value) for name, value in self.pre['attrs'] if name != 'class'] + [('class', 'highlight')]
+        self.pre = None
+        self._emit(f'<pre{_attributes(attrs)}><code>{body}</code></pre>')
+
+    def _close_heading(self):
+        heading, self.heading = self.heading, None
+        title = html.unescape(''.join(heading['text'])).strip()
+        base = slugify(title) or 'section'
+        anchor, n = base, 1
+        while anchor in self.ids:
+            n += 1
+            anchor = f'{base}-{n}'
+        self.ids.add(anchor)
+        self.toc.append({'level': int(heading['tag'][1]), 'id': anchor, 'title': title})
+        attrs = [(name, value) for name, value in heading['attrs'] if name != 'id'] + [('id', anchor)]
+        self._emit(
+            f'<{heading["tag"]}{_attributes(attrs)}>{"".join(heading["markup"])}'
+            f'<a class="heading-anchor" href="#{anchor}" aria-label="Link to this section">#</a>'
+            f'</{heading["tag"]}>'
+        )
+
+    def _image(self, attrs):
+        attrs = [(name, value) for name, value in attrs if name not in ('loading', 'decoding')]
+        src = dict(attrs).get('src')
+        name = upload_name(src)
+        if name and self.image_info is not None:
+            info = self.image_info(name)
+            if info and info['variants']:
+                candidates = [f'{default_storage.url(variant)} {width}w' for width, variant in info['variants']]
+                candidates.append(f"{src} {info['width']}w")
+                attrs += [('srcset', ', '.join(candidates)), ('sizes', IMAGE_SIZES)]
+                # Reserve the image's space before it loads
+                if not {'width', 'height'} & dict(attrs).keys():
+                    attrs += [('width', str(info['width'])), ('height', str(info['height']))]
+        return attrs + [('loading', 'lazy'), ('decoding', 'async')]
+
+    def close(self):
+        super().close()
+        if self.pre is not None:
+            self._close_pre()
+        if self.heading is not None:
+            self._close_heading()
+
+
+def render_content(content, image_info=None):
+    """Render Summernote HTML for display.
+
+    ``image_info(name)`` returns the manifest entry of an upload (see
+    ``main.images``); without it images get no ``srcset``.
+    """
+    renderer = ContentRenderer(image_info)
+    renderer.feed(sanitize(content or ''))
+    renderer.close()
+    reading_time = max(1, math.ceil(renderer.words / WORDS_PER_MINUTE)) if renderer.words else 0
+    return RenderedContent(''.join(renderer.output), renderer.toc, renderer.words, reading_time)
+
+
+def rerender_post(pk):
+    """Render a post's content again, e.g. once its images have variants"""
+    from .models import BlogPost, RENDERED_FIELDS
+
+    post = BlogPost.objects.filter(pk=pk).first()
+    if post is None:
+        return
+    post.render_content()
+    # update() rather than save(): nothing but the rendering changed
+    BlogPost.objects.filter(pk=pk).update(**{field: getattr(post, field) for field in RENDERED_FIELDS})
+    bump_generation_on_commit(BlogPost)
+
+
+def queue_post_images(post):
+    """Queue the content images of ``post`` that have no variants yet"""
+    from .models import BlogPost
+
+    processed = manifest()
+    for src in IMAGE_SRC_RE.findall(post.content_html):
+        name = upload_name(html.unescape(src))
+        if name and name not in processed:
+            queue_upload(name, models=[BlogPost], then=lambda: rerender_post(post.pk))
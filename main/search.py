@@ -0,0 +1,220 @@
+"""
+Full-text search over projects, published blog posts and skills.
+
+Each searchable object is flattened into a ``SearchDocument`` row, which the
+database indexes with its native full-text engine: a weighted ``tsvector``
+column with a GIN index on PostgreSQL, an FTS5 table on SQLite (both created
+by migration 0004). Other databases fall back to ``icontains`` matching.
+"""
+import html
+import re
+from abc import ABC, abstractmethod
+
+from django.db import connection
+from django.db.models import Q
+from django.urls import reverse
+from django.utils.html import strip_tags
+
+from .models import Project, Skill, BlogPost, SearchDocument
+
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+# Building documents
+
+def plain_text(value):
+    """Strip Summernote HTML down to whitespace-normalised text"""
+    return ' '.join(html.unescape(strip_tags(value or '')).split())
+
+
+def project_document(project):
+    return {
+        'title': project.title,
+        'body': f'{project.technologies} {plain_text(project.description)}',
+        'url': reverse('project_detail', args=[project.id]),
+    }
+
+
+def blogpost_document(post):
+    if not post.published:
+        return None
+    tags = ' '.join(tag.name for tag in post.tags.all())
+    return {
+        'title': post.title,
+        'body': f'{tags} {plain_text(post.excerpt)} {plain_text(post.content)}',
+        'url': reverse('blog_post', args=[post.slug]),
+    }
+
+
+def skill_document(skill):
+    return {
+        'title': skill.name,
+        'body': skill.category,
+        'url': reverse('index') + '#skills',
+    }
+
+
+DOCUMENT_BUILDERS = {
+    Project: project_document,
+    BlogPost: blogpost_document,
+    Skill: skill_document,
+}
+
+
+def index_object(instance):
+    """Create, update or remove the search document for ``instance``"""
+    kind = instance._meta.model_name
+    fields = DOCUMENT_BUILDERS[type(instance)](instance)
+    if fields is None:
+        unindex_object(instance)
+    else:
+        SearchDocument.objects.update_or_create(kind=kind, object_id=instance.pk, defaults=fields)
+
+
+def unindex_object(instance):
+    SearchDocument.objects.filter(kind=instance._meta.model_name, object_id=instance.pk).delete()
+
+
+def rebuild_index():
+    """Rebuild every search document from scratch and return the count"""
+    SearchDocument.objects.all().delete()
+    documents = []
+    querysets = {
+        Project: Project.objects.all(),
+        BlogPost: BlogPost.objects.published_with_tags(),
+        Skill: Skill.objects.all(),
+    }
+    for model, queryset in querysets.items():
+        for instance in queryset:
+            fields = DOCUMENT_BUILDERS[model](instance)
+            if fields is not None:
+                documents.append(SearchDocument(kind=model._meta.model_name, object_id=instance.pk, **fields))
+    SearchDocument.objects.bulk_create(documents, batch_size=500)
+    return len(documents)
+
+
+# Querying
+
+class SearchResults(ABC):
+    """Lazily ranked search results, sliceable so ``Paginator`` can page them"""
+
+    def __init__(self, query):
+        self.query = query
+        self.terms = WORD_RE.findall(query.lower())
+        self._count = None
+
+    def count(self):
+        if self._count is None:
+            self._count = self._fetch_count() if self.terms else 0
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        start, stop = index.start or 0, index.stop
+        if not self.terms or (stop is not None and stop <= start):
+            return []
+        limit = -1 if stop is None else stop - start
+        ids_with_rank = self._fetch_ids(limit, start)
+        documents = SearchDocument.objects.in_bulk([pk for pk, _ in ids_with_rank])
+        results = []
+        for pk, rank in ids_with_rank:
+            document = documents[pk]
+            document.rank = rank
+            results.append(document)
+        return results
+
+    @abstractmethod
+    def _fetch_count(self):
+        """Return the number of matching documents"""
+
+    @abstractmethod
+    def _fetch_ids(self, limit, offset):
+        """Return ``(id, rank)`` of matching documents, best first; a ``limit`` of -1 means all"""
+
+
+class PostgresSearchResults(SearchResults):
+
+    def tsquery(self):
+        return ' & '.join(f'{term}:*' for term in self.terms)
+
+    def _fetch_count(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT COUNT(*) FROM main_searchdocument "
+                "WHERE search_vector @@ to_tsquery('english', %s)",
+                [self.tsquery()],
+            )
+            return cursor.fetchone()[0]
+
+    def _fetch_ids(self, limit, offset):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT id, ts_rank_cd(search_vector, query) AS rank "
+                "FROM main_searchdocument, to_tsquery('english', %s) query "
+                "WHERE search_vector @@ query ORDER BY rank DESC, id LIMIT %s OFFSET %s",
+                [self.tsquery(), None if limit < 0 else limit, offset],
+            )
+            return cursor.fetchall()
+
+
+class SQLiteSearchResults(SearchResults):
+
+    def match(self):
+        # Quote every term so user input can never form FTS5 syntax
+        return ' '.join('"%s"*' % term.replace('"', '') for term in self.terms)
+
+    def _fetch_count(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT COUNT(*) FROM main_searchdocument_fts WHERE main_searchdocument_fts MATCH %s",
+                [self.match()],
+            )
+            return cursor.fetchone()[0]
+
+    def _fetch_ids(self, limit, offset):
+        # bm25() is lower for better matches; title hits weigh 10x body hits
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT rowid, -bm25(main_searchdocument_fts, 10.0, 1.0) AS rank "
+                "FROM main_searchdocument_fts WHERE main_searchdocument_fts MATCH %s "
+                "ORDER BY rank DESC, rowid LIMIT %s OFFSET %s",
+                [self.match(), limit, offset],
+            )
+            return cursor.fetchall()
+
+
+class BasicSearchResults(SearchResults):
+    """Unranked fallback for databases without a supported full-text engine"""
+
+    def queryset(self):
+        queryset = SearchDocument.objects.all()
+        for term in self.terms:
+            queryset = queryset.filter(Q(title__icontains=term) | Q(body__icontains=term))
+        return queryset
+
+    def _fetch_count(self):
+        return self.queryset().count()
+
+    def _fetch_ids(self, limit, offset):
+        queryset = self.queryset().order_by('id').values_list('id', flat=True)
+        ids = queryset[offset:] if limit < 0 else queryset[offset:offset + limit]
+        return [(pk, 0) for pk in ids]
+
+
+def _has_fts5_table():
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'main_searchdocument_fts'")
+        return cursor.fetchone() is not None
+
+
+def search_documents(query):
+    """Return ranked ``SearchResults`` for a user-entered query"""
+    if connection.vendor == 'postgresql':
+        return PostgresSearchResults(query)
+    if connection.vendor == 'sqlite' and _has_fts5_table():
+        return SQLiteSearchResults(query)
+    return BasicSearchResults(query)
@@ -1,17 +1,65 @@
+from django.contrib.contenttypes.models import ContentType
 from rest_framework import serializers
+from taggit.models import TaggedItem
 from .models import Project, Skill, BlogPost
 
-class ProjectSerializer(serializers.ModelSerializer):
+class SparseFieldsSerializer(serializers.ModelSerializer):
+    """Serializer that drops every field not named in the ``fields`` argument"""
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+class TagNamesField(serializers.Field):
+    """Tag names in alphabetical order, read from the prefetched tags"""
+
+    def __init__(self, **kwargs):
+        super().__init__(read_only=True, **kwargs)
+
+    def to_representation(self, tags):
+        return sorted(tag.name for tag in tags.all())
+
+    def bulk_values(self, pks):
+        """Return ``{pk: names}`` for the objects ``pks`` in one query (see main.fast_serializers)"""
+        names = {pk: [] for pk in pks}
+        items = TaggedItem.objects.filter(
+            content_type=ContentType.objects.get_for_model(self.parent.Meta.model), object_id__in=pks,
+        ).values_list('object_id', 'tag__name')
+        for pk, name in items:
+            names[pk].append(name)
+        return {pk: sorted(tag_names) for pk, tag_names in names.items()}
+
+class ProjectListSerializer(SparseFieldsSerializer):
+    class Meta:
+        model = Project
+        fields = (
+            'id', 'title', 'image', 'project_url', 'github_url', 'technologies',
+            'date_created', 'updated_at', 'featured',
+        )
+
+class ProjectSerializer(SparseFieldsSerializer):
     class Meta:
         model = Project
         fields = '__all__'
 
-class SkillSerializer(serializers.ModelSerializer):
+class SkillSerializer(SparseFieldsSerializer):
     class Meta:
         model = Skill
         fields = '__all__'
 
-class BlogPostSerializer(serializers.ModelSerializer):
+class BlogPostListSerializer(SparseFieldsSerializer):
+    tags = TagNamesField()
+
     class Meta:
         model = BlogPost
-        fields = '__all__'
\ No newline at end of file
+        fields = (
+            'id', 'title', 'slug', 'excerpt', 'featured_image', 'tags',
+            'created_at', 'updated_at', 'published', 'reading_time',
+        )
+
+class BlogPostSerializer(BlogPostListSerializer):
+    class Meta:
+        model = BlogPost
+        fields = '__all__'
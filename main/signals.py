@@ -0,0 +1,107 @@
+import threading
+from contextlib import contextmanager
+from functools import wraps
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+from taggit.models import Tag, TaggedItem
+
+from .cache import bump_generation_on_commit
+from .images import queue_instance
+from .rendering import queue_post_images
+from .models import Profile, Project, Skill, Testimonial, BlogPost, ContactMessage
+from .search import DOCUMENT_BUILDERS, index_object, unindex_object
+
+# Models whose rows are rendered on the public site
+CONTENT_MODELS = (Profile, Project, Skill, Testimonial, BlogPost)
+# Models only summarised in the admin dashboard
+ADMIN_MODELS = (ContactMessage,)
+
+_state = threading.local()
+
+
+@contextmanager
+def signals_suppressed():
+    """Skip the handlers below, for bulk writes that refresh everything once at the end"""
+    previous = getattr(_state, 'suppressed', False)
+    _state.suppressed = True
+    try:
+        yield
+    finally:
+        _state.suppressed = previous
+
+
+def unless_suppressed(handler):
+    @wraps(handler)
+    def wrapper(*args, **kwargs):
+        if not getattr(_state, 'suppressed', False):
+            return handler(*args, **kwargs)
+    return wrapper
+
+
+@unless_suppressed
+def content_changed(sender, **kwargs):
+    """Invalidate cached content built from ``sender``"""
+    bump_generation_on_commit(sender)
+
+
+for model in CONTENT_MODELS + ADMIN_MODELS:
+    post_save.connect(content_changed, sender=model, dispatch_uid=f'content_saved_{model._meta.model_name}')
+    post_delete.connect(content_changed, sender=model, dispatch_uid=f'content_deleted_{model._meta.model_name}')
+
+
+@receiver(m2m_changed, sender=TaggedItem)
+@unless_suppressed
+def tags_changed(sender, instance, action, **kwargs):
+    """Invalidate cached content when an object's tags change"""
+    if action in ('post_add', 'post_remove', 'post_clear') and type(instance) in CONTENT_MODELS:
+        bump_generation_on_commit(type(instance))
+
+
+@receiver([post_save, post_delete], sender=Tag)
+@unless_suppressed
+def tag_changed(sender, **kwargs):
+    """Invalidate cached posts when a tag is renamed or deleted"""
+    bump_generation_on_commit(BlogPost)
+
+
+@unless_suppressed
+def searchable_saved(sender, instance, **kwargs):
+    """Keep the object's search document in step with its row"""
+    index_object(instance)
+
+
+@unless_suppressed
+def searchable_deleted(sender, instance, **kwargs):
+    unindex_object(instance)
+
+
+for model in DOCUMENT_BUILDERS:
+    post_save.connect(searchable_saved, sender=model, dispatch_uid=f'search_saved_{model._meta.model_name}')
+    post_delete.connect(searchable_deleted, sender=model, dispatch_uid=f'search_deleted_{model._meta.model_name}')
+
+
+@receiver(m2m_changed, sender=TaggedItem)
+@unless_suppressed
+def searchable_tags_changed(sender, instance, action, **kwargs):
+    """Reindex a post when its tags change; tags are part of its document"""
+    if action in ('post_add', 'post_remove', 'post_clear') and type(instance) in DOCUMENT_BUILDERS:
+        index_object(instance)
+
+
+@unless_suppressed
+def images_saved(sender, instance, **kwargs):
+    """Queue resizing of the object's new images once it is committed"""
+    transaction.on_commit(lambda: queue_instance(instance))
+
+
+for model in (Profile, Project, Testimonial, BlogPost):
+    post_save.connect(images_saved, sender=model, dispatch_uid=f'images_saved_{model._meta.model_name}')
+
+
+@receiver(post_save, sender=BlogPost)
+@unless_suppressed
+def post_content_saved(sender, instance, **kwargs):
+    """Queue resizing of images inserted in the post's content"""
+    transaction.on_commit(lambda: queue_post_images(instance))
@@ -1,17 +1,123 @@
-# sitemap.py
+"""
+sitemap.xml: an index of one sitemap per section, written by ``main.generated``.
+
+Sections hold at most ``limit`` URLs per page (``?p=2``...), as the sitemap
+protocol allows 50,000. Pages are written row by row from ``iterator()``.
+"""
+from xml.sax.saxutils import escape
+
 from django.contrib.sitemaps import Sitemap
+from django.db.models import Max
+from django.http import Http404
+from django.urls import reverse
+
 from .models import Project, BlogPost
 
-class ProjectSitemap(Sitemap):
+SITEMAP_NS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+CHUNK_SIZE = 2000
+
+
+def _w3c_date(value):
+    return value.isoformat(timespec='seconds') if hasattr(value, 'hour') else value.isoformat()
+
+
+class ContentSitemap(Sitemap):
+    """A sitemap section whose pages are streamed rather than paginated in memory"""
+    models = ()
+
+    def page_items(self, page):
+        items = self.items()[(page - 1) * self.limit:page * self.limit]
+        if hasattr(items, 'iterator'):
+            items = items.iterator(chunk_size=CHUNK_SIZE)
+        return items
+
+    def num_pages(self):
+        items = self.items()
+        count = len(items) if isinstance(items, list) else items.count()
+        return max(1, -(-count // self.limit))
+
+    def get_latest_lastmod(self):
+        # One aggregate instead of calling lastmod() on every row
+        return None
+
+    def write_page(self, handle, page, base_url):
+        handle.write(f'<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="{SITEMAP_NS}">\n'.encode())
+        empty = True
+        for item in self.page_items(page):
+            empty = False
+            entry = [f'<loc>{escape(base_url + self.location(item))}</loc>']
+            lastmod = self.lastmod(item) if callable(getattr(self, 'lastmod', None)) else None
+            if lastmod:
+                entry.append(f'<lastmod>{_w3c_date(lastmod)}</lastmod>')
+            if self.changefreq:
+                entry.append(f'<changefreq>{self.changefreq}</changefreq>')
+            if self.priority is not None:
+                entry.append(f'<priority>{self.priority}</priority>')
+            handle.write(f'<url>{"".join(entry)}</url>\n'.encode())
+        if empty and page > 1:
+            raise Http404('No such sitemap page')
+        handle.write(b'</urlset>\n')
+
+
+class PagesSitemap(ContentSitemap):
+    changefreq = 'weekly'
+    priority = 1.0
+
+    def items(self):
+        return ['index', 'projects', 'blog']
+
+    def location(self, item):
+        return reverse(item)
+
+
+class ProjectSitemap(ContentSitemap):
     changefreq = "monthly"
     priority = 0.8
+    models = (Project,)
 
     def items(self):
-        return Project.objects.all()
+        return Project.objects.order_by('id').only('id', 'updated_at')
+
+    def lastmod(self, item):
+        return item.updated_at
+
+    def get_latest_lastmod(self):
+        return Project.objects.aggregate(latest=Max('updated_at'))['latest']
+
 
-class BlogSitemap(Sitemap):
+class BlogSitemap(ContentSitemap):
     changefreq = "weekly"
     priority = 0.5
+    models = (BlogPost,)
 
     def items(self):
-        return BlogPost.objects.filter(published=True)
\ No newline at end of file
+        return BlogPost.objects.published().order_by('id').only('id', 'slug', 'updated_at')
+
+    def lastmod(self, item):
+        return item.updated_at
+
+    def get_latest_lastmod(self):
+        return BlogPost.objects.published().aggregate(latest=Max('updated_at'))['latest']
+
+
+SITEMAPS = {
+    'pages': PagesSitemap(),
+    'projects': ProjectSitemap(),
+    'blog': BlogSitemap(),
+}
+# Models whose changes change the sitemap index
+SITEMAP_MODELS = (Project, BlogPost)
+
+
+def write_index(handle, base_url):
+    """Write a sitemap index listing every page of every section"""
+    handle.write(f'<?xml version="1.0" encoding="UTF-8"?>\n<sitemapindex xmlns="{SITEMAP_NS}">\n'.encode())
+    for section, sitemap in SITEMAPS.items():
+        location = base_url + reverse('sitemap_section', args=[section])
+        lastmod = sitemap.get_latest_lastmod()
+        for page in range(1, sitemap.num_pages() + 1):
+            entry = [f'<loc>{escape(location if page == 1 else f"{location}?p={page}")}</loc>']
+            if lastmod:
+                entry.append(f'<lastmod>{_w3c_date(lastmod)}</lastmod>')
+            handle.write(f'<sitemap>{"".join(entry)}</sitemap>\n'.encode())
+    handle.write(b'</sitemapindex>\n')
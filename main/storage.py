@@ -0,0 +1,17 @@
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+
+class StaticFilesStorage(CompressedManifestStaticFilesStorage):
+    """Hashed names plus ``.br``/``.gz`` siblings, written by ``collectstatic``.
+
+    A name missing from the manifest (before the first ``collectstatic``, or
+    in tests) is served unhashed instead of raising, as ``StaticFilesStorage``
+    would.
+    """
+    manifest_strict = False
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
@@ -0,0 +1,274 @@
+"""
+As-you-type search suggestions served from a memory-mapped index.
+
+The index maps every word of project titles, technologies, tags and post
+titles to the suggestions containing it. It is written once per content
+generation to a snapshot file which each gunicorn worker maps read-only, so
+all workers share the same pages and a lookup never touches the database.
+
+Snapshot layout (little endian, offsets are absolute)::
+
+    header      magic 'SUG1', term count, entry count
+    term table  (term offset, term length, postings offset, postings count)
+    entry table (entry offset, entry length)
+    postings    uint32 entry ids, best suggestion first
+    strings     utf-8 terms, then JSON encoded [label, url, kind] entries
+
+Terms are sorted bytewise so prefixes can be found by binary search.
+"""
+import glob
+import json
+import mmap
+import os
+import re
+import struct
+import tempfile
+import threading
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.urls import reverse
+
+from .cache import content_generation
+from .models import Project, BlogPost
+
+MAGIC = b'SUG1'
+HEADER = struct.Struct('<4sII')
+TERM = struct.Struct('<IIII')
+ENTRY = struct.Struct('<II')
+POSTING = struct.Struct('<I')
+
+WORD_RE = re.compile(r'\w[\w+#.-]*', re.UNICODE)
+# Suggestions are ordered by kind, then by label length
+KIND_ORDER = ('project', 'post', 'technology', 'tag')
+MAX_TYPO_CANDIDATES = 200
+STALE_SNAPSHOT_AGE = 60
+
+
+def tokenize(text):
+    return [word.strip('.-').lower() for word in WORD_RE.findall(text) if word.strip('.-')]
+
+
+# Building
+
+def collect_entries():
+    """Return ``(label, url, kind)`` suggestions for all public content"""
+    search_url = reverse('search')
+    entries = []
+    technologies = {}
+    tags = {}
+
+    for project in Project.objects.only('id', 'title', 'technologies'):
+        entries.append((project.title, reverse('project_detail', args=[project.id]), 'project'))
+        for technology in re.split(r'[,\s]+', project.technologies):
+            if technology:
+                technologies.setdefault(technology.lower(), technology)
+
+    for post in BlogPost.objects.published_with_tags().only('id', 'title', 'slug'):
+        entries.append((post.title, reverse('blog_post', args=[post.slug]), 'post'))
+        for tag in post.tags.all():
+            tags.setdefault(tag.name.lower(), tag.name)
+
+    for kind, labels in (('technology', technologies), ('tag', tags)):
+        for label in labels.values():
+            entries.append((label, f'{search_url}?{urlencode({"q": label})}', kind))
+
+    entries.sort(key=lambda entry: (KIND_ORDER.index(entry[2]), len(entry[0]), entry[0].lower()))
+    return entries
+
+
+def build_snapshot(entries):
+    """Serialise suggestions into the snapshot format and return the bytes"""
+    postings = {}
+    for entry_id, (label, url, kind) in enumerate(entries):
+        for term in tokenize(label):
+            ids = postings.setdefault(term.encode(), [])
+            if not ids or ids[-1] != entry_id:
+                ids.append(entry_id)
+
+    terms = sorted(postings)
+    encoded_entries = [json.dumps(entry, separators=(',', ':')).encode() for entry in entries]
+
+    term_table_at = HEADER.size
+    entry_table_at = term_table_at + TERM.size * len(terms)
+    postings_at = entry_table_at + ENTRY.size * len(entries)
+    strings_at = postings_at + POSTING.size * sum(len(ids) for ids in postings.values())
+
+    term_table, posting_data, strings = bytearray(), bytearray(), bytearray()
+    for term in terms:
+        ids = postings[term]
+        term_table += TERM.pack(
+            strings_at + len(strings), len(term), postings_at + len(posting_data), len(ids)
+        )
+        strings += term
+        for entry_id in ids:
+            posting_data += POSTING.pack(entry_id)
+
+    entry_table = bytearray()
+    for data in encoded_entries:
+        entry_table += ENTRY.pack(strings_at + len(strings), len(data))
+        strings += data
+
+    return b''.join([
+        HEADER.pack(MAGIC, len(terms), len(entries)),
+        bytes(term_table), bytes(entry_table), bytes(posting_data), bytes(strings),
+    ])
+
+
+def write_snapshot(path, data):
+    # Write to a temporary file and rename so readers never see a partial file
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(fd, 'wb') as handle:
+        handle.write(data)
+    os.replace(tmp_path, path)
+
+
+# Reading
+
+class SuggestIndex:
+    """Read-only view over a snapshot, decoded lazily from the mapping"""
+
+    def __init__(self, path):
+        with open(path, 'rb') as handle:
+            self._map = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.term_count, self.entry_count = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError(f'{path} is not a suggestion index')
+        self._entry_table_at = HEADER.size + TERM.size * self.term_count
+
+    def close(self):
+        self._map.close()
+
+    def _term(self, index):
+        offset, length, _, _ = TERM.unpack_from(self._map, HEADER.size + TERM.size * index)
+        return self._map[offset:offset + length]
+
+    def _postings(self, index):
+        _, _, offset, count = TERM.unpack_from(self._map, HEADER.size + TERM.size * index)
+        return [POSTING.unpack_from(self._map, offset + POSTING.size * i)[0] for i in range(count)]
+
+    def _entry(self, entry_id):
+        offset, length = ENTRY.unpack_from(self._map, self._entry_table_at + ENTRY.size * entry_id)
+        return json.loads(self._map[offset:offset + length])
+
+    def _lower_bound(self, key):
+        low, high = 0, self.term_count
+        while low < high:
+            middle = (low + high) // 2
+            if self._term(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _prefix_range(self, prefix):
+        start = self._lower_bound(prefix)
+        end = start
+        while end < self.term_count and self._term(end).startswith(prefix):
+            end += 1
+        return range(start, end)
+
+    def _fuzzy_range(self, word):
+        """Terms whose prefix is one edit (or transposition) away from ``word``"""
+        matches = []
+        # Typos rarely hit the first letter, so only scan terms sharing it
+        first = word[:1]
+        candidates = self._prefix_range(first.encode())
+        for index in list(candidates)[:MAX_TYPO_CANDIDATES]:
+            term = self._term(index).decode()
+            if any(within_one_edit(word, term[:length]) for length in (len(word) - 1, len(word), len(word) + 1)):
+                matches.append(index)
+        return matches
+
+    def _matching_entries(self, word):
+        indexes = self._prefix_range(word.encode())
+        if not indexes:
+            indexes = self._fuzzy_range(word)
+        ids = set()
+        for index in indexes:
+            ids.update(self._postings(index))
+        return ids
+
+    def suggest(self, query, limit=8):
+        words = tokenize(query)
+        if not words:
+            return []
+        ids = None
+        for word in words:
+            matches = self._matching_entries(word)
+            ids = matches if ids is None else ids & matches
+            if not ids:
+                return []
+        # Entries were sorted by preference when the snapshot was built
+        return [
+            dict(zip(('label', 'url', 'kind'), self._entry(entry_id)))
+            for entry_id in sorted(ids)[:limit]
+        ]
+
+
+def within_one_edit(a, b):
+    """True if ``a`` and ``b`` differ by at most one edit or adjacent swap"""
+    if a == b:
+        return True
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) == len(b):
+        diffs = [i for i in range(len(a)) if a[i] != b[i]]
+        return len(diffs) == 1 or (
+            len(diffs) == 2 and diffs[1] == diffs[0] + 1
+            and a[diffs[0]] == b[diffs[1]] and a[diffs[1]] == b[diffs[0]]
+        )
+    if len(a) > len(b):
+        a, b = b, a
+    for i in range(len(a)):
+        if a[i] != b[i]:
+            return a[i:] == b[i + 1:]
+    return True
+
+
+# Per-process access
+
+_lock = threading.Lock()
+_loaded = {'generation': None, 'index': None}
+
+
+def snapshot_dir():
+    return getattr(settings, 'SUGGEST_INDEX_DIR', os.path.join(settings.BASE_DIR, 'cache', 'suggest'))
+
+
+def _remove_stale_snapshots(current):
+    # Workers still mapping a removed snapshot keep their pages; the grace
+    # period lets a worker that just saw an older generation open its file.
+    cutoff = os.path.getmtime(current) - STALE_SNAPSHOT_AGE
+    for path in glob.glob(os.path.join(snapshot_dir(), 'suggest-*.idx')):
+        try:
+            if path != current and os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def get_index():
+    """Return the index for the current content, building it if needed"""
+    generation = content_generation(Project, BlogPost)
+    if _loaded['generation'] == generation:
+        return _loaded['index']
+
+    with _lock:
+        if _loaded['generation'] != generation:
+            path = os.path.join(snapshot_dir(), f'suggest-{generation}.idx')
+            try:
+                index = SuggestIndex(path)
+            except FileNotFoundError:
+                write_snapshot(path, build_snapshot(collect_entries()))
+                index = SuggestIndex(path)
+                _remove_stale_snapshots(path)
+            _loaded['index'] = index
+            _loaded['generation'] = generation
+        return _loaded['index']
+
+
+def suggest(query, limit=8):
+    return get_index().suggest(query, limit)
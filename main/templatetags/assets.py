@@ -0,0 +1,47 @@
+from django import template
+from django.templatetags.static import static
+from django.utils.html import format_html, format_html_join
+from django.utils.safestring import mark_safe
+
+from ..assets import BUNDLE_CSS, BUNDLE_JS, CDN_CSS, CDN_JS, LOCAL_CSS, LOCAL_JS, bundle_available
+from ..critical import critical_css
+
+register = template.Library()
+
+
+@register.simple_tag
+def site_css(page=None):
+    """Link the bundled stylesheet, or the CDN ones until ``vendor_assets`` has run.
+
+    With a ``page`` type whose critical CSS was built (see ``main.critical``),
+    that CSS is inlined and the bundle is loaded without blocking rendering.
+    """
+    if not bundle_available(BUNDLE_CSS):
+        urls = list(CDN_CSS) + [static(name) for name in LOCAL_CSS]
+        return format_html_join('\n    ', '<link rel="stylesheet" href="{}">', ((url,) for url in urls))
+
+    url = static(BUNDLE_CSS)
+    critical = critical_css(page) if page else None
+    if critical is None:
+        return format_html('<link rel="stylesheet" href="{}">', url)
+    return format_html(
+        '<style>{}</style>\n'
+        '    <link rel="preload" href="{}" as="style" onload="this.onload=null;this.rel=\'stylesheet\'">\n'
+        '    <noscript><link rel="stylesheet" href="{}"></noscript>',
+        # A stylesheet cannot contain "</" legitimately outside strings and comments
+        mark_safe(critical.replace('</', '<\\/')), url, url,
+    )
+
+
+@register.simple_tag
+def site_js():
+    """Load the bundled script, or the CDN ones until ``vendor_assets`` has run.
+
+    Scripts are deferred: they download in parallel with the page and run,
+    in order, once it is parsed.
+    """
+    if bundle_available(BUNDLE_JS):
+        urls = [static(BUNDLE_JS)]
+    else:
+        urls = list(CDN_JS) + [static(name) for name in LOCAL_JS]
+    return format_html_join('\n    ', '<script src="{}" defer></script>', ((url,) for url in urls))
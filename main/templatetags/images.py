@@ -0,0 +1,31 @@
+from django import template
+from django.utils.html import format_html, format_html_join
+
+from ..images import image_variants
+
+register = template.Library()
+
+
+@register.simple_tag
+def responsive_image(field_file, sizes='100vw', loading='lazy', **attrs):
+    """Render an ``<img>`` whose ``srcset`` lists the WebP variants of an upload.
+
+    ``sizes`` describes the rendered width, e.g. ``"(min-width: 992px) 50vw,
+    100vw"``; other keyword arguments (``alt``, ``class``, ``width``...) are
+    copied onto the tag. The original stays the ``src`` and the largest
+    ``srcset`` candidate.
+    """
+    if not field_file:
+        return ''
+    info = image_variants(field_file)
+    storage = field_file.storage
+    attributes = {'src': field_file.url}
+    if info and info['variants']:
+        candidates = [f'{storage.url(name)} {width}w' for width, name in info['variants']]
+        candidates.append(f"{field_file.url} {info['width']}w")
+        attributes['srcset'] = ', '.join(candidates)
+        attributes['sizes'] = sizes
+    attributes.update(attrs)
+    attributes['loading'] = loading
+    attributes['decoding'] = 'async'
+    return format_html('<img {}>', format_html_join(' ', '{}="{}"', attributes.items()))
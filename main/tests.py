@@ -1,3 +1,1239 @@
-from django.test import TestCase
+import io
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import skipUnless
+from unittest.mock import patch
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import CommandError, call_command
+from django.db import DatabaseError, connection
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from . import fast_serializers
+from .admin import custom_admin_site, dashboard_statistics
+from .assets import AssetError, icon_sources, minify_css, subset_font_awesome, used_icons
+from .cache_backends import SQLiteCache
+from .contact import contact_buffer
+from .critical import extract_critical, fold_tokens
+from .images import WIDTHS, build_variants, image_variants
+from .mail import MAX_ATTEMPTS, queue_mail, send_pending
+from .ratelimit import SlidingWindow, consume
+from .rendering import render_content
+from .sitemap import SITEMAPS
+from .models import Profile, Project, Skill, Testimonial, BlogPost, ContactMessage, OutboundEmail, ImageVariant
+
+
+# Each test process gets a private cache instead of the shared on-disk one
+_test_cache = override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+
+
+def setUpModule():
+    _test_cache.enable()
+
+
+def tearDownModule():
+    _test_cache.disable()
+
+
+@override_settings(IMAGE_WORKERS=0)
+class ContentTestCase(TestCase):
+    """Base class providing a small portfolio and an empty cache"""
+
+    def setUp(self):
+        cache.clear()
+        self.profile = Profile.objects.create(
+            name='Test User', email='test@example.com', profile_picture='profiles/me.jpg'
+        )
+        self.project = Project.objects.create(
+            title='Portfolio', description='A portfolio site', image='projects/p.jpg',
+            technologies='Django Python', featured=True
+        )
+        Skill.objects.create(name='Django', proficiency=90, category='Backend')
+        Testimonial.objects.create(client_name='Client', content='Great work', rating=5, featured=True)
+        self.post = BlogPost.objects.create(
+            title='Hello', slug='hello', content='<p>Hello world</p>', excerpt='Hello',
+            featured_image='blog/hello.jpg', published=True
+        )
+        self.post.tags.add('django', 'python')
+
+
+class IndexCacheTests(ContentTestCase):
+
+    def test_steady_state_needs_no_queries(self):
+        self.client.get(reverse('index'))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('index'))
+        self.assertContains(response, 'Portfolio')
+        self.assertContains(response, 'python')
+
+    def test_admin_edit_invalidates_featured_projects(self):
+        self.client.get(reverse('index'))
+        self.project.title = 'Renamed project'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project.save()
+        self.assertContains(self.client.get(reverse('index')), 'Renamed project')
+
+    def test_tag_change_invalidates_latest_posts(self):
+        self.client.get(reverse('index'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.tags.add('caching')
+        self.assertContains(self.client.get(reverse('index')), 'caching')
+
+
+class SQLiteCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.cache = SQLiteCache(os.path.join(directory.name, 'cache.sqlite3'), {'OPTIONS': {'MAX_ENTRIES': 10}})
+
+    def test_add_only_sets_missing_or_expired_keys(self):
+        self.assertTrue(self.cache.add('key', 1))
+        self.assertFalse(self.cache.add('key', 2))
+        self.assertEqual(self.cache.get('key'), 1)
+        self.cache.set('old', 1, timeout=10)
+        with patch('main.cache_backends.time.time', return_value=time.time() + 20):
+            self.assertTrue(self.cache.add('old', 2))
+            self.assertEqual(self.cache.get('old'), 2)
+
+    def test_incr_missing_key_raises_value_error(self):
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+        self.cache.set('counter', 1)
+        self.assertEqual(self.cache.incr('counter', 2), 3)
+        self.assertEqual(self.cache.get('counter'), 3)
+
+    def test_expired_entries_are_misses(self):
+        self.cache.set('key', 'value', timeout=10)
+        self.cache.set('forever', 'value', timeout=None)
+        with patch('main.cache_backends.time.time', return_value=time.time() + 20):
+            self.assertIsNone(self.cache.get('key'))
+            self.assertFalse(self.cache.has_key('key'))
+            self.assertEqual(self.cache.get_many(['key', 'forever']), {'forever': 'value'})
+            with self.assertRaises(ValueError):
+                self.cache.incr('key')
+
+    def test_touch_extends_live_entries_only(self):
+        self.cache.set('key', 'value', timeout=10)
+        self.assertTrue(self.cache.touch('key', timeout=100))
+        self.assertFalse(self.cache.touch('missing'))
+        with patch('main.cache_backends.time.time', return_value=time.time() + 50):
+            self.assertEqual(self.cache.get('key'), 'value')
+        with patch('main.cache_backends.time.time', return_value=time.time() + 200):
+            self.assertFalse(self.cache.touch('key'))
+
+    def test_culls_past_max_entries(self):
+        self.cache.CULL_EVERY = 5
+        self.cache.set('counter', 0, timeout=None)
+        for i in range(14):
+            self.cache.set(f'key{i}', i, timeout=100 + i)
+        # The 15th write found 15 entries and dropped a third of them, those
+        # closest to expiry; counters without a timeout go last
+        remaining = self.cache.get_many(['counter'] + [f'key{i}' for i in range(14)])
+        self.assertEqual(sorted(remaining), sorted(['counter'] + [f'key{i}' for i in range(5, 14)]))
+
+
+class PageCacheTests(ContentTestCase):
+
+    def test_anonymous_pages_served_from_cache(self):
+        for url in (reverse('projects'), reverse('project_detail', args=[self.project.id]),
+                    reverse('blog'), reverse('blog_post', args=['hello']), reverse('search') + '?q=folio'):
+            first = self.client.get(url)
+            with self.assertNumQueries(0):
+                second = self.client.get(url)
+            self.assertEqual(first.content, second.content)
+
+    def test_query_string_is_part_of_the_key(self):
+        self.client.get(reverse('search') + '?q=folio')
+        # The full-text table check and the match count; no results to fetch
+        with self.assertNumQueries(2):
+            self.client.get(reverse('search') + '?q=other')
+
+    def test_save_invalidates_cached_pages(self):
+        self.client.get(reverse('blog'))
+        self.post.title = 'Updated title'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.save()
+        self.assertContains(self.client.get(reverse('blog')), 'Updated title')
+
+    def test_requests_with_session_bypass_cache(self):
+        self.client.get(reverse('blog'))
+        self.client.cookies['sessionid'] = 'abc'
+        # The page of posts and their prefetched tags
+        with self.assertNumQueries(2):
+            self.client.get(reverse('blog'))
+
+
+class ConditionalGetTests(ContentTestCase):
+
+    def test_etag_revalidation_returns_304(self):
+        for url in (reverse('blog'), reverse('blog_post', args=['hello']), '/api/blog/'):
+            response = self.client.get(url)
+            self.assertIn('no-cache', response['Cache-Control'])
+            with self.assertNumQueries(0):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+            self.assertEqual(response.status_code, 304)
+
+    def test_last_modified_follows_updated_at(self):
+        response = self.client.get(reverse('blog'))
+        response = self.client.get(reverse('blog'), HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_edit_changes_validators(self):
+        etag = self.client.get(reverse('projects'))['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project.save()
+        response = self.client.get(reverse('projects'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+
+class TagPrefetchTests(ContentTestCase):
+
+    def add_posts(self, start, count):
+        for i in range(start, start + count):
+            post = BlogPost.objects.create(
+                title=f'Post {i}', slug=f'post-{i}', content='<p>Body</p>', excerpt='Excerpt',
+                featured_image='blog/post.jpg', published=True
+            )
+            post.tags.add(f'tag-{i}', 'shared')
+
+    def count_queries(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        return len(queries)
+
+    def test_query_count_does_not_depend_on_page_size(self):
+        urls = (reverse('index'), reverse('blog'), '/api/blog/')
+        self.add_posts(0, 1)
+        small = [self.count_queries(url) for url in urls]
+        self.add_posts(1, 8)
+        self.assertEqual([self.count_queries(url) for url in urls], small)
+
+
+
+class SearchTests(ContentTestCase):
+
+    def test_ranked_results_cover_projects_posts_and_skills(self):
+        response = self.client.get(reverse('search'), {'q': 'django'})
+        kinds = {document.kind for document in response.context['results']}
+        self.assertEqual(kinds, {'project', 'blogpost', 'skill'})
+
+    def test_title_matches_rank_first(self):
+        Project.objects.create(title='Other', description='Built with Hello tooling', image='projects/o.jpg', technologies='Go')
+        results = list(self.client.get(reverse('search'), {'q': 'hello'}).context['results'])
+        self.assertEqual(results[0].title, 'Hello')
+
+    def test_index_follows_edits_and_unpublishing(self):
+        self.post.content = '<p>All about <b>websockets</b></p>'
+        self.post.save()
+        self.assertContains(self.client.get(reverse('search'), {'q': 'websock'}), 'Hello')
+        self.post.published = False
+        self.post.save()
+        cache.clear()
+        self.assertNotContains(self.client.get(reverse('search'), {'q': 'websock'}), 'View Details')
+
+    def test_query_syntax_is_escaped(self):
+        response = self.client.get(reverse('search'), {'q': '"django" OR * NEAR('})
+        self.assertEqual(response.status_code, 200)
+
+
+class SuggestTests(ContentTestCase):
+
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_override = override_settings(SUGGEST_INDEX_DIR=directory.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def suggest(self, query):
+        response = self.client.get(reverse('search_suggest'), {'q': query})
+        return [(item['label'], item['kind']) for item in response.json()['suggestions']]
+
+    def test_prefix_matches_titles_technologies_and_tags(self):
+        self.assertEqual(self.suggest('port'), [('Portfolio', 'project')])
+        self.assertIn(('Django', 'technology'), self.suggest('dja'))
+        self.assertIn(('python', 'tag'), self.suggest('pyt'))
+        self.assertEqual(self.suggest('hel'), [('Hello', 'post')])
+
+    def test_typos_are_tolerated(self):
+        self.assertEqual(self.suggest('protf'), [('Portfolio', 'project')])
+
+    def test_index_rebuilt_when_content_changes(self):
+        self.suggest('port')
+        with self.captureOnCommitCallbacks(execute=True):
+            Project.objects.create(title='Portal', description='x', image='projects/x.jpg', technologies='Vue')
+        self.assertIn(('Portal', 'project'), self.suggest('port'))
+
+    def test_lookups_do_not_query_the_database(self):
+        self.suggest('warm')
+        with self.assertNumQueries(0):
+            self.suggest('dja')
+            self.suggest('pyth')
+
+
+class KeysetPaginationTests(ContentTestCase):
+
+    def setUp(self):
+        super().setUp()
+        for i in range(12):
+            Project.objects.create(title=f'Project {i}', description='x', image='projects/x.jpg', technologies='Go')
+
+    def walk(self, url, key):
+        titles, cursor = [], None
+        while True:
+            response = self.client.get(url, {'cursor': cursor} if cursor else {})
+            page = response.context['page_obj'] if key is None else response.json()
+            if key is None:
+                titles += [project.title for project in page]
+                cursor = page.next_cursor
+            else:
+                titles += [item['title'] for item in page['results']]
+                cursor = page['next'] and page['next'].split('cursor=')[1]
+            if not cursor:
+                return titles
+
+    def test_pages_cover_every_row_once_in_order(self):
+        expected = list(Project.objects.order_by('-date_created', '-id').values_list('title', flat=True))
+        self.assertEqual(self.walk(reverse('projects'), None), expected)
+        self.assertEqual(self.walk('/api/projects/', 'json'), expected)
+
+    def test_previous_cursor_returns_to_earlier_page(self):
+        first = self.client.get(reverse('projects')).context['page_obj']
+        second = self.client.get(reverse('projects'), {'cursor': first.next_cursor}).context['page_obj']
+        back = self.client.get(reverse('projects'), {'cursor': second.previous_cursor}).context['page_obj']
+        self.assertEqual(list(back), list(first))
+        self.assertFalse(back.has_previous())
+
+    def test_deep_pages_do_not_count_or_offset(self):
+        first = self.client.get(reverse('projects')).context['page_obj']
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('projects'), {'cursor': first.next_cursor})
+        sql = ' '.join(query['sql'] for query in queries)
+        self.assertNotIn('COUNT(', sql)
+        self.assertNotIn('OFFSET', sql)
+
+    def test_api_count_is_opt_in(self):
+        self.assertNotIn('count', self.client.get('/api/projects/').json())
+        self.assertEqual(self.client.get('/api/projects/', {'count': 'true'}).json()['count'], 13)
+
+    def test_invalid_cursor_falls_back_to_first_page(self):
+        response = self.client.get(reverse('projects'), {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 200)
+
+
+class QueryPlanTests(ContentTestCase):
+
+    def test_view_queries_use_indexes(self):
+        output = StringIO()
+        call_command('explain_queries', '--fail-on-scan', stdout=output)
+        self.assertIn('blogpost_published_idx', output.getvalue())
+
+
+class DashboardTests(ContentTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'secret')
+
+    def render_dashboard(self):
+        request = RequestFactory().get('/admin/dashboard/')
+        request.user = self.admin
+        return custom_admin_site.dashboard_view(request)
+
+    def add_messages(self, count):
+        ContactMessage.objects.bulk_create(
+            ContactMessage(name='Visitor', email='v@example.com', subject='Hi', message='Hello', read=i % 2 == 0)
+            for i in range(count)
+        )
+
+    def test_query_count_does_not_grow_with_tables(self):
+        self.add_messages(1)
+        self.render_dashboard()
+        cache.clear()
+        with CaptureQueriesContext(connection) as small:
+            self.render_dashboard()
+        cache.clear()
+        self.add_messages(50)
+        with CaptureQueriesContext(connection) as large:
+            self.render_dashboard()
+        self.assertEqual(len(small), len(large))
+
+    def test_cached_statistics_need_no_queries(self):
+        self.render_dashboard()
+        # Only the app list's ProfileAdmin.has_add_permission check remains
+        with self.assertNumQueries(1):
+            response = self.render_dashboard()
+        self.assertContains(response, 'Portfolio')
+
+    def test_counts_and_series(self):
+        self.add_messages(3)
+        stats = dashboard_statistics(timezone.localdate())
+        self.assertEqual((stats['total_contacts'], stats['unread_contacts']), (3, 1))
+        self.assertEqual((stats['total_projects'], stats['featured_projects']), (1, 1))
+        self.assertEqual(len(stats['messages_per_day']), 30)
+        self.assertEqual(stats['messages_per_day'][-1]['count'], 3)
+        self.assertEqual(stats['posts_per_month'][-1]['count'], 1)
+
+    def test_new_message_invalidates_statistics(self):
+        self.assertContains(self.render_dashboard(), 'All Read')
+        with self.captureOnCommitCallbacks(execute=True):
+            ContactMessage.objects.create(name='Visitor', email='v@example.com', subject='Hi', message='Hello')
+        self.assertContains(self.render_dashboard(), '1 Unread')
+
+
+class CountingBackend(EmailBackend):
+    """locmem backend that records how many connections were opened"""
+    opened = 0
+
+    def open(self):
+        CountingBackend.opened += 1
+        return super().open()
+
+
+class FailingBackend(EmailBackend):
+
+    def send_messages(self, messages):
+        raise ConnectionError('SMTP server unavailable')
+
+
+@override_settings(
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    EMAIL_HOST_USER='owner@example.com', EMAIL_HOST_PASSWORD='secret', DEFAULT_FROM_EMAIL='owner@example.com',
+    CONTACT_FLUSH_SIZE=1,
+)
+class OutboundEmailTests(TestCase):
+    contact = {'name': 'Visitor', 'email': 'visitor@example.com', 'subject': 'Hello', 'message': 'I would like to talk.'}
+
+    def setUp(self):
+        cache.clear()
+
+    def test_contact_post_only_queues(self):
+        response = self.client.post(reverse('contact'), self.contact)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(mail.outbox, [])
+        email = OutboundEmail.objects.get()
+        self.assertEqual(email.status, 'pending')
+        self.assertEqual(email.reply_to, ['visitor@example.com'])
+
+    def test_worker_sends_batch_over_one_connection(self):
+        for i in range(3):
+            queue_mail(f'Message {i}', 'Body', ['owner@example.com'])
+        CountingBackend.opened = 0
+        with self.settings(EMAIL_BACKEND='main.tests.CountingBackend'):
+            call_command('run_mail_worker', '--once', stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(CountingBackend.opened, 1)
+        self.assertFalse(OutboundEmail.objects.exclude(status='sent').exists())
+
+    def test_failures_back_off_then_give_up(self):
+        email = queue_mail('Hello', 'Body', ['owner@example.com'])
+        with self.settings(EMAIL_BACKEND='main.tests.FailingBackend'), self.assertLogs('main.mail') as logs:
+            send_pending()
+            email.refresh_from_db()
+            self.assertEqual((email.status, email.attempts), ('pending', 1))
+            self.assertGreater(email.next_attempt_at, timezone.now())
+            # Not due again until the backoff has passed
+            self.assertEqual(send_pending(), 0)
+            self.assertEqual(OutboundEmail.objects.get().attempts, 1)
+
+            for _ in range(MAX_ATTEMPTS - 1):
+                OutboundEmail.objects.update(next_attempt_at=timezone.now())
+                send_pending()
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), ('failed', MAX_ATTEMPTS))
+        self.assertIn('unavailable', email.last_error)
+        self.assertIn('Giving up', logs.output[-1])
+
+
+@override_settings(
+    EMAIL_HOST_USER='owner@example.com', EMAIL_HOST_PASSWORD='secret', DEFAULT_FROM_EMAIL='owner@example.com',
+    CONTACT_FLUSH_SIZE=5, CONTACT_FLUSH_INTERVAL=60, CONTACT_RATE_PER_IP='100/h', CONTACT_RATE_PER_EMAIL='100/h',
+)
+class ContactIngestionTests(TestCase):
+    contact = {'name': 'Visitor', 'email': 'visitor@example.com', 'subject': 'Hello', 'message': 'I would like to talk.'}
+
+    def setUp(self):
+        cache.clear()
+
+    def tearDown(self):
+        contact_buffer.flush()
+
+    def test_api_submissions_are_written_in_bulk(self):
+        for _ in range(4):
+            response = self.client.post(reverse('api_contact'), self.contact, content_type='application/json')
+            self.assertEqual(response.status_code, 202)
+        self.assertEqual(ContactMessage.objects.count(), 0)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(reverse('api_contact'), self.contact, content_type='application/json')
+        inserts = [query for query in queries if query['sql'].startswith('INSERT')]
+        self.assertEqual(len(inserts), 2)
+        self.assertEqual(ContactMessage.objects.count(), 5)
+        self.assertEqual(OutboundEmail.objects.count(), 5)
+
+    def test_api_rejects_invalid_submissions(self):
+        response = self.client.post(reverse('api_contact'), {'name': 'Visitor'}, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('email', response.json()['errors'])
+
+    def test_views_share_the_service(self):
+        self.client.post(reverse('contact'), self.contact)
+        self.client.post(reverse('index'), self.contact)
+        self.assertEqual(len(contact_buffer), 2)
+        self.assertEqual(contact_buffer.flush(), 2)
+        self.assertEqual(ContactMessage.objects.count(), 2)
+
+    def test_failed_write_keeps_the_batch(self):
+        self.client.post(reverse('contact'), self.contact)
+        with patch.object(OutboundEmail.objects, 'bulk_create', side_effect=DatabaseError('disk full')), \
+                self.assertLogs('main.contact', 'ERROR'):
+            self.assertEqual(contact_buffer.flush(), 0)
+        self.assertEqual(len(contact_buffer), 1)
+        self.assertEqual(ContactMessage.objects.count(), 0)
+        self.assertEqual(contact_buffer.flush(), 1)
+        self.assertEqual((ContactMessage.objects.count(), OutboundEmail.objects.count()), (1, 1))
+
+    @override_settings(CONTACT_FLUSH_SIZE=1)
+    def test_write_through(self):
+        self.client.post(reverse('contact'), self.contact)
+        self.assertEqual(len(contact_buffer), 0)
+        self.assertEqual(ContactMessage.objects.count(), 1)
+
+
+@override_settings(CONTACT_RATE_PER_IP='3/h', CONTACT_RATE_PER_EMAIL='2/h', CONTACT_FLUSH_SIZE=1)
+class RateLimitTests(TestCase):
+    contact = {'name': 'Visitor', 'email': 'visitor@example.com', 'subject': 'Hello', 'message': 'I would like to talk.'}
+
+    def setUp(self):
+        cache.clear()
+
+    def test_sliding_window_weights_previous_window(self):
+        rule = SlidingWindow('test', '4/m')
+        for _ in range(4):
+            self.assertEqual(consume([(rule, 'client')], now=60.0), 0)
+        self.assertGreater(consume([(rule, 'client')], now=61.0), 0)
+        # 10 s into the next window, 5/6 of the old hits still count
+        self.assertEqual(consume([(rule, 'client')], now=130.0), 0)
+        self.assertAlmostEqual(consume([(rule, 'client')], now=130.0), 5.0)
+        self.assertEqual(consume([(rule, 'client')], now=136.0), 0)
+
+    def test_throttled_post_skips_validation_and_database(self):
+        for i in range(3):
+            self.client.post(reverse('contact'), dict(self.contact, email=f'visitor{i}@example.com'))
+        with self.assertNumQueries(0):
+            response = self.client.post(reverse('contact'), {'name': 'Spam'})
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+        self.assertEqual(ContactMessage.objects.count(), 3)
+
+    def test_email_limit_applies_across_addresses(self):
+        for i in range(2):
+            self.client.post(reverse('index'), self.contact, REMOTE_ADDR=f'10.0.0.{i}')
+        response = self.client.post(reverse('index'), self.contact, REMOTE_ADDR='10.0.0.9')
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(ContactMessage.objects.count(), 2)
+
+    def test_forwarded_for_is_ignored_without_proxies(self):
+        for i in range(3):
+            self.client.post(
+                reverse('contact'), dict(self.contact, email=f'visitor{i}@example.com'),
+                HTTP_X_FORWARDED_FOR=f'10.0.0.{i}',
+            )
+        response = self.client.post(reverse('contact'), self.contact, HTTP_X_FORWARDED_FOR='10.0.0.9')
+        self.assertEqual(response.status_code, 429)
+
+    def test_homepage_get_is_not_limited(self):
+        for i in range(3):
+            self.client.post(reverse('index'), dict(self.contact, email=f'visitor{i}@example.com'))
+        self.assertEqual(self.client.get(reverse('index')).status_code, 200)
+
+    def test_api_contact_is_throttled(self):
+        for _ in range(2):
+            self.client.post(reverse('api_contact'), self.contact, content_type='application/json')
+        response = self.client.post(reverse('api_contact'), self.contact, content_type='application/json')
+        self.assertEqual(response.status_code, 429)
+
+    def test_api_router_is_throttled(self):
+        rest_framework = dict(settings.REST_FRAMEWORK, DEFAULT_THROTTLE_RATES={'api': '2/m'})
+        with self.settings(REST_FRAMEWORK=rest_framework):
+            statuses = [self.client.get('/api/skills/').status_code for _ in range(3)]
+        self.assertEqual(statuses, [200, 200, 429])
+
+
+def make_image(name, size=(2000, 1000)):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, (200, 80, 40)).save(buffer, 'JPEG')
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/jpeg')
+
+
+class ImageVariantTests(ContentTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_variants_recorded_on_save(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            project = Project.objects.create(title='Photo', description='Big image', image=make_image('photo.jpg'))
+        rows = ImageVariant.objects.filter(source=project.image.name).order_by('width')
+        self.assertEqual([row.width for row in rows], list(WIDTHS) + [2000])
+        variant = rows[0]
+        self.assertEqual((variant.height, variant.size), (80, os.path.getsize(os.path.join(self.media_root, variant.name))))
+        with Image.open(os.path.join(self.media_root, variant.name)) as image:
+            self.assertEqual((image.format, image.size), ('WEBP', (160, 80)))
+
+    def test_variant_names_follow_the_file_contents(self):
+        name = default_storage.save('projects/photo.jpg', make_image('photo.jpg'))
+        first = build_variants(name)[1][0]
+        default_storage.delete(name)
+        default_storage.save(name, make_image('photo.jpg', size=(1000, 500)))
+        second = build_variants(name)[1][0]
+        self.assertRegex(first, r'^variants/projects/photo-[0-9a-f]{8}-160w\.webp$')
+        self.assertNotEqual(first, second)
+
+    def test_listing_emits_srcset(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Project.objects.create(title='Photo', description='Big image', image=make_image('photo.jpg'))
+        response = self.client.get(reverse('projects'))
+        self.assertContains(response, 'srcset=')
+        self.assertContains(response, '-1536w.webp 1536w')
+        self.assertContains(response, 'photo.jpg 2000w')
+        self.assertContains(response, 'loading="lazy"')
+
+    def test_unprocessed_upload_is_queued_then_read_from_manifest(self):
+        project = Project.objects.create(title='Photo', description='Small image', image=make_image('photo.jpg', (400, 300)))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertIsNone(image_variants(project.image))
+        info = image_variants(project.image)
+        self.assertEqual([width for width, _ in info['variants']], [160, 320])
+        with self.assertNumQueries(0):
+            self.assertEqual(image_variants(project.image), info)
+        # The manifest survives losing the cache
+        cache.clear()
+        self.assertEqual(image_variants(project.image), info)
+
+    def test_upload_queued_by_a_page_invalidates_it(self):
+        Project.objects.create(title='Photo', description='Small image', image=make_image('photo.jpg', (400, 300)))
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertNotContains(self.client.get(reverse('projects')), 'srcset=')
+        self.assertContains(self.client.get(reverse('projects')), 'srcset=')
+
+    def test_rebuild_command_uses_process_pool(self):
+        if multiprocessing.current_process().daemon:
+            # As are the workers of `manage.py test --parallel`
+            self.skipTest('daemonic processes cannot start a process pool')
+        project = Project.objects.create(title='Photo', description='Big image', image=make_image('photo.jpg'))
+        output = StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('rebuild_image_variants', '--workers', '2', stdout=output, stderr=StringIO())
+        self.assertIn('Processed 1 images', output.getvalue())
+        self.assertEqual(ImageVariant.objects.filter(source=project.image.name).count(), len(WIDTHS) + 1)
+        self.assertIsNotNone(image_variants(project.image))
+
+    def test_missing_upload_falls_back_to_original(self):
+        response = self.client.get(reverse('projects'))
+        self.assertContains(response, 'src="/media/projects/p.jpg"')
+        self.assertNotContains(response, 'srcset=')
+
+
+class MediaServingTests(TestCase):
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        os.makedirs(os.path.join(self.media_root, 'variants'))
+        self.data = bytes(range(256)) * 40
+        for name in ('doc.txt', 'variants/photo-1a2b3c4d-640w.webp'):
+            with open(os.path.join(self.media_root, name), 'wb') as handle:
+                handle.write(self.data)
+
+    def test_full_response_headers(self):
+        response = self.client.get('/media/doc.txt')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.data)
+        self.assertEqual(response['Content-Length'], str(len(self.data)))
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertIn('must-revalidate', response['Cache-Control'])
+
+    def test_only_variants_are_immutable(self):
+        response = self.client.get('/media/variants/photo-1a2b3c4d-640w.webp')
+        self.assertEqual(response['Content-Type'], 'image/webp')
+        self.assertIn('immutable', response['Cache-Control'])
+        for name in ('IMG-20240101-WA0001.jpg', 'report-20231015-final.pdf'):
+            with open(os.path.join(self.media_root, name), 'wb') as handle:
+                handle.write(self.data)
+            self.assertIn('must-revalidate', self.client.get(f'/media/{name}')['Cache-Control'])
+
+    def test_range_requests(self):
+        response = self.client.get('/media/doc.txt', HTTP_RANGE='bytes=100-199')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 100-199/{len(self.data)}')
+        self.assertEqual(b''.join(response.streaming_content), self.data[100:200])
+
+        response = self.client.get('/media/doc.txt', HTTP_RANGE='bytes=-10')
+        self.assertEqual(b''.join(response.streaming_content), self.data[-10:])
+
+        response = self.client.get('/media/doc.txt', HTTP_RANGE=f'bytes={len(self.data)}-')
+        self.assertEqual(response.status_code, 416)
+
+    def test_stale_if_range_sends_whole_file(self):
+        response = self.client.get('/media/doc.txt', HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_conditional_requests(self):
+        response = self.client.get('/media/doc.txt')
+        self.assertEqual(self.client.get('/media/doc.txt', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        self.assertEqual(
+            self.client.get('/media/doc.txt', HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 304
+        )
+
+    def test_precompressed_sibling(self):
+        with open(os.path.join(self.media_root, 'doc.txt.gz'), 'wb') as handle:
+            handle.write(b'compressed')
+        response = self.client.get('/media/doc.txt', HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(b''.join(response.streaming_content), b'compressed')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertNotIn('Content-Encoding', self.client.get('/media/doc.txt'))
+
+    def test_paths_outside_media_root_are_not_served(self):
+        self.assertEqual(self.client.get('/media/../manage.py').status_code, 400)
+        self.assertEqual(self.client.get('/media/missing.txt').status_code, 404)
+
+
+FONT_AWESOME_SAMPLE = '''/*! Font Awesome Free 6.4.0 */
+.fa-2x{font-size:2em}
+.fa-github:before{content:"\\f09b"}
+.fa-twitter:before{content:"\\f099"}
+.fa-external-link-alt:before,.fa-up-right-from-square:before{content:"\\f35d"}
+@font-face{font-family:"Font Awesome 6 Brands";src:url(../webfonts/fa-brands-400.woff2) format("woff2"),url(../webfonts/fa-brands-400.ttf) format("truetype")}
+'''
+POPPINS_SAMPLE = '''/* devanagari */
+@font-face { font-family: 'Poppins'; font-weight: 400; src: url(https://fonts.gstatic.com/p/dev.woff2) format('woff2'); }
+/* latin */
+@font-face { font-family: 'Poppins'; font-weight: 400; src: url(https://fonts.gstatic.com/p/latin.woff2) format('woff2'); }
+'''
+
+
+def fake_fetch(url, *args):
+    if url.endswith('all.min.css'):
+        return FONT_AWESOME_SAMPLE.encode()
+    if 'googleapis' in url:
+        return POPPINS_SAMPLE.encode()
+    if url.endswith('.css'):
+        return b'.x { color : red ; }\n/*# sourceMappingURL=x.css.map */'
+    if url.endswith('.js'):
+        return b'var x = 1\n//# sourceMappingURL=x.js.map'
+    return b'font:' + url.encode()
+
+
+class AssetTests(TestCase):
+    def setUp(self):
+        self.static_root = tempfile.mkdtemp()
+        shutil.copytree(os.path.join(settings.BASE_DIR, 'static', 'main'), os.path.join(self.static_root, 'main'))
+        self.addCleanup(shutil.rmtree, self.static_root)
+
+    def test_font_awesome_subset(self):
+        css, codepoints = subset_font_awesome(FONT_AWESOME_SAMPLE, {'github', 'external-link-alt', '2x'})
+        self.assertIn('.fa-github:before', css)
+        self.assertIn('.fa-external-link-alt:before{', css)
+        self.assertNotIn('twitter', css)
+        self.assertNotIn('up-right-from-square', css)
+        self.assertIn('.fa-2x{font-size:2em}', css)
+        self.assertIn('/*! Font Awesome Free 6.4.0 */', css)
+        self.assertIn('src:url(fonts/fa-brands-400.woff2) format("woff2")}', css)
+        self.assertEqual(codepoints, {0xf09b, 0xf35d})
+
+    def test_icons_used_by_templates_and_scripts(self):
+        icons = used_icons(icon_sources())
+        self.assertTrue({'github', 'linkedin', 'arrow-up', 'paper-plane'} <= icons)
+
+    def test_minify_css_keeps_strings(self):
+        css = '/*! keep */\na  >  b { content : "a  b" ; }\n/* drop */ c { }'
+        self.assertEqual(minify_css(css), '/*! keep */\na>b{content:"a  b"}c{}')
+
+    def test_vendor_assets_builds_bundles(self):
+        with override_settings(STATICFILES_DIRS=[self.static_root]), patch('main.assets.fetch', fake_fetch):
+            call_command('vendor_assets', stdout=StringIO())
+            vendor = os.path.join(self.static_root, 'main', 'vendor')
+            with open(os.path.join(vendor, 'site.css')) as handle:
+                css = handle.read()
+            with open(os.path.join(vendor, 'site.js')) as handle:
+                js = handle.read()
+            self.assertIn('.x{color:red}', css)
+            self.assertIn('url(fonts/poppins-400-latin.woff2)', css)
+            self.assertNotIn('dev.woff2', css)
+            self.assertNotIn('sourceMappingURL', css + js)
+            self.assertIn('backToTopButton', js)
+            self.assertTrue(os.path.exists(os.path.join(vendor, 'fonts', 'fa-brands-400.woff2')))
+            self.assertFalse(os.path.exists(os.path.join(vendor, 'fonts', 'fa-brands-400.ttf')))
+
+            response = self.client.get(reverse('index'))
+        self.assertContains(response, 'href="/static/main/vendor/site.css"')
+        self.assertContains(response, 'src="/static/main/vendor/site.js"')
+        self.assertNotContains(response, 'cdn.jsdelivr.net')
+
+    def test_cdn_links_until_bundled(self):
+        with override_settings(STATICFILES_DIRS=[self.static_root]):
+            response = self.client.get(reverse('index'))
+        self.assertContains(response, 'https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css')
+        self.assertContains(response, 'href="/static/main/css/style.css"')
+        self.assertContains(response, 'src="/static/main/js/script.js"')
+
+    def test_bundle_lookup_is_remembered(self):
+        with override_settings(STATICFILES_DIRS=[self.static_root]):
+            self.client.get(reverse('index'))
+            with patch('main.assets.finders.find') as find:
+                self.client.get(reverse('projects'))
+        find.assert_not_called()
+
+    def test_offline_build_keeps_cdn_links(self):
+        def offline(url, *args):
+            raise AssetError(f'Could not download {url}')
+
+        stderr = StringIO()
+        with override_settings(STATICFILES_DIRS=[self.static_root]), patch('main.assets.fetch', offline):
+            call_command('vendor_assets', stdout=StringIO(), stderr=stderr)
+        self.assertIn('CDN', stderr.getvalue())
+        self.assertFalse(os.path.exists(os.path.join(self.static_root, 'main', 'vendor')))
+
+
+class CriticalCssTests(ContentTestCase):
+    def setUp(self):
+        super().setUp()
+        self.static_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.static_root)
+        shutil.copytree(os.path.join(settings.BASE_DIR, 'static', 'main'), os.path.join(self.static_root, 'main'))
+        os.makedirs(os.path.join(self.static_root, 'main', 'vendor'))
+        with open(os.path.join(self.static_root, 'main', 'css', 'style.css')) as handle:
+            self.bundle = handle.read() + '.unused-rule{color:red}'
+        with open(os.path.join(self.static_root, 'main', 'vendor', 'site.css'), 'w') as handle:
+            handle.write(self.bundle)
+        settings_override = override_settings(STATICFILES_DIRS=[self.static_root])
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_fold_stops_after_first_block_of_main(self):
+        tags, classes, ids = fold_tokens(
+            '<nav class="navbar"><a id="brand"></a></nav><main><section class="hero"><img class="pic"></section>'
+            '<section class="later"></section></main><footer class="foot"></footer>'
+        )
+        self.assertTrue({'navbar', 'hero', 'pic'} <= classes)
+        self.assertNotIn('later', classes)
+        self.assertNotIn('foot', classes)
+        self.assertIn('brand', ids)
+        self.assertNotIn('footer', tags)
+
+    def test_extract_keeps_rules_for_the_fold(self):
+        css = (
+            "@font-face{font-family:'Poppins';src:url(a.woff2)}@font-face{font-family:'Other';src:url(b.woff2)}"
+            '@keyframes spin{to{transform:rotate(1turn)}}@keyframes unused{}'
+            ':root{--x:1}body{font-family:Poppins}.hero{animation:spin 1s}.hero:hover{color:red}'
+            'nav .brand,.later{color:blue}footer{color:green}'
+            '@media (max-width:768px){.hero{padding:0}.later{padding:0}}@media print{.later{display:none}}'
+        )
+        critical = extract_critical(css, ({'html', 'body', 'nav'}, {'hero', 'brand'}, set()))
+        self.assertIn("font-family:'Poppins'", critical)
+        self.assertNotIn('Other', critical)
+        self.assertIn('@keyframes spin', critical)
+        self.assertNotIn('unused', critical)
+        self.assertIn(':root{--x:1}', critical)
+        self.assertIn('nav .brand{color:blue}', critical)
+        self.assertIn('@media (max-width:768px){.hero{padding:0}}', critical)
+        self.assertNotIn(':hover', critical)
+        self.assertNotIn('later', critical)
+        self.assertNotIn('footer', critical)
+
+    def test_pages_inline_critical_css(self):
+        call_command('critical_css', stdout=StringIO())
+        response = self.client.get(reverse('index'))
+        self.assertContains(response, '<style>')
+        self.assertContains(response, '.hero-section{')
+        self.assertNotContains(response, '.unused-rule')
+        self.assertContains(response, 'rel="preload" href="/static/main/vendor/site.css" as="style"')
+        self.assertContains(response, '<noscript><link rel="stylesheet" href="/static/main/vendor/site.css"></noscript>')
+        self.assertContains(response, '<script src="https://unpkg.com/aos@2.3.1/dist/aos.js" defer></script>')
+
+        detail = self.client.get(reverse('project_detail', args=[self.project.id]))
+        self.assertContains(detail, '<style>')
+        # Pages without a type link the bundle normally
+        projects = self.client.get(reverse('projects'))
+        self.assertNotContains(projects, '<style>')
+        self.assertContains(projects, '<link rel="stylesheet" href="/static/main/vendor/site.css">')
+
+
+class SitemapFeedTests(ContentTestCase):
+
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_override = override_settings(GENERATED_DIR=directory.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def get(self, url, **extra):
+        response = self.client.get(url, **extra)
+        content = b''.join(response.streaming_content).decode() if response.streaming else response.content.decode()
+        return response, content
+
+    def test_sitemap_index_and_sections(self):
+        BlogPost.objects.create(
+            title='Draft', slug='draft', content='x', excerpt='x', featured_image='blog/d.jpg', published=False
+        )
+        response, index = self.get(reverse('sitemap'))
+        self.assertEqual(response['Content-Type'], 'application/xml')
+        for section in ('pages', 'projects', 'blog'):
+            self.assertIn(f'<loc>http://testserver/sitemap-{section}.xml</loc>', index)
+        self.assertIn(f'<lastmod>{self.post.updated_at.isoformat(timespec="seconds")}</lastmod>', index)
+
+        _, blog = self.get(reverse('sitemap_section', args=['blog']))
+        self.assertIn('<loc>http://testserver/blog/hello/</loc>', blog)
+        self.assertNotIn('draft', blog)
+        _, projects = self.get(reverse('sitemap_section', args=['projects']))
+        self.assertIn(f'<loc>http://testserver/projects/{self.project.id}/</loc>', projects)
+        self.assertIn('<lastmod>', projects)
+
+    def test_large_sections_are_paginated(self):
+        second = Project.objects.create(title='Second', description='x', image='projects/s.jpg', technologies='Go')
+        with patch.object(SITEMAPS['projects'], 'limit', 1):
+            _, index = self.get(reverse('sitemap'))
+            self.assertIn('sitemap-projects.xml?p=2', index)
+            _, page = self.get(reverse('sitemap_section', args=['projects']) + '?p=2')
+            self.assertIn(f'/projects/{second.id}/', page)
+            self.assertNotIn(f'/projects/{self.project.id}/', page)
+            self.assertEqual(self.client.get(reverse('sitemap_section', args=['projects']) + '?p=3').status_code, 404)
+        self.assertEqual(self.client.get(reverse('sitemap_section', args=['missing'])).status_code, 404)
+
+    def test_documents_are_generated_once_per_generation(self):
+        for name in ('sitemap', 'feed_rss', 'feed_atom'):
+            self.get(reverse(name))
+            with self.assertNumQueries(0):
+                response, _ = self.get(reverse(name))
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(self.client.get(reverse(name), HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+    def test_feeds_follow_post_changes(self):
+        response, rss = self.get(reverse('feed_rss'))
+        self.assertTrue(response['Content-Type'].startswith('application/rss+xml'))
+        self.assertIn('<link>http://testserver/blog/hello/</link>', rss)
+        self.assertIn('<category>django</category>', rss)
+        response, atom = self.get(reverse('feed_atom'))
+        self.assertTrue(response['Content-Type'].startswith('application/atom+xml'))
+        self.assertIn('xmlns="http://www.w3.org/2005/Atom"', atom)
+        self.assertIn('<link href="http://testserver/blog/hello/" rel="alternate"/>', atom)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.title = 'Renamed'
+            self.post.save()
+        _, rss = self.get(reverse('feed_rss'))
+        self.assertIn('<title>Renamed</title>', rss)
+
+
+class RenderingTests(ContentTestCase):
+
+    def test_content_is_sanitized(self):
+        rendered = render_content(
+            '<p onclick="steal()">Hi <script>alert(1)</script><a href="/x" target="_blank">link</a></p>'
+            '<iframe src="https://evil.example/"></iframe>'
+            '<iframe src="https://www.youtube.com/embed/abc" width="560"></iframe>'
+        )
+        self.assertNotIn('onclick', rendered.html)
+        self.assertNotIn('<script', rendered.html)
+        self.assertNotIn('evil.example', rendered.html)
+        self.assertIn('rel="noopener noreferrer"', rendered.html)
+        self.assertIn('<iframe src="https://www.youtube.com/embed/abc" width="560" loading="lazy">', rendered.html)
+
+    def test_headings_make_the_table_of_contents(self):
+        rendered = render_content('<h2>Intro</h2><p>one two</p><h3>Set &amp; up</h3><h2>Intro</h2>')
+        self.assertEqual(rendered.toc, [
+            {'level': 2, 'id': 'intro', 'title': 'Intro'},
+            {'level': 3, 'id': 'set-up', 'title': 'Set & up'},
+            {'level': 2, 'id': 'intro-2', 'title': 'Intro'},
+        ])
+        self.assertIn('<h2 id="intro-2">Intro<a class="heading-anchor" href="#intro-2"', rendered.html)
+        self.assertEqual((rendered.word_count, rendered.reading_time), (6, 1))
+
+    def test_code_is_highlighted(self):
+        rendered = render_content('<pre class="language-python">def f(x):<br>    return x &lt; 1</pre>')
+        self.assertIn('<pre class="highlight"><code><span class="k">def</span>', rendered.html)
+        self.assertIn('&lt;', rendered.html)
+        plain = render_content('<pre>a &lt; b</pre>')
+        self.assertIn('<pre><code>a &lt; b</code></pre>', plain.html)
+
+    def test_fields_rendered_on_save(self):
+        self.post.content = '<h2>One</h2><p>' + 'word ' * 450 + '</p><h2>Two</h2>'
+        self.post.save()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.reading_time, 3)
+        self.assertEqual([entry['id'] for entry in self.post.toc], ['one', 'two'])
+        response = self.client.get(reverse('blog_post', args=['hello']))
+        self.assertContains(response, '3 min read')
+        self.assertContains(response, '<a href="#two">Two</a>', html=True)
+        self.assertNotContains(response, '<h2>One</h2>')
+
+    def test_stored_content_is_sanitized(self):
+        self.post.content = '<p onclick="steal()">Hi<script>alert(1)</script></p><img src="/media/a.jpg">'
+        self.post.save()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.content, '<p>Hialert(1)</p><img src="/media/a.jpg">')
+        self.assertEqual(self.client.get(f'/api/blog/{self.post.pk}/').json()['content'], self.post.content)
+
+    def test_render_posts_command(self):
+        BlogPost.objects.update(content_html='', toc=[], word_count=0, reading_time=0)
+        call_command('render_posts', stdout=StringIO())
+        self.post.refresh_from_db()
+        self.assertEqual((self.post.content_html, self.post.word_count), ('<p>Hello world</p>', 2))
+
+    def test_content_images_get_srcset_once_processed(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        with override_settings(MEDIA_ROOT=media_root):
+            name = default_storage.save('django-summernote/photo.jpg', make_image('photo.jpg'))
+            self.post.content = f'<p><img src="{settings.MEDIA_URL}{name}" style="width: 50%;"></p>'
+            with self.captureOnCommitCallbacks(execute=True):
+                self.post.save()
+            self.assertIn('loading="lazy"', self.post.content_html)
+            self.assertNotIn('srcset', self.post.content_html)
+            # Re-rendered once the variants exist
+            self.post.refresh_from_db()
+            self.assertIn('-1536w.webp 1536w', self.post.content_html)
+            self.assertIn('width="2000" height="1000"', self.post.content_html)
+            self.assertIn('style="width: 50%;"', self.post.content_html)
+
+
+class ApiFieldsTests(ContentTestCase):
+
+    def test_list_leaves_out_post_bodies(self):
+        with CaptureQueriesContext(connection) as queries:
+            results = self.client.get('/api/blog/').json()['results']
+        self.assertEqual(results[0]['tags'], ['django', 'python'])
+        self.assertNotIn('content', results[0])
+        self.assertNotIn('"main_blogpost"."content"', ' '.join(query['sql'] for query in queries))
+        detail = self.client.get(f'/api/blog/{self.post.pk}/').json()
+        self.assertEqual(detail['content'], '<p>Hello world</p>')
+        self.assertIn('content_html', detail)
+
+    def test_sparse_fieldsets(self):
+        with CaptureQueriesContext(connection) as queries:
+            results = self.client.get('/api/blog/', {'fields': 'title,slug'}).json()['results']
+        self.assertEqual(results, [{'title': 'Hello', 'slug': 'hello'}])
+        # No tag prefetch, and only the selected and ordering columns
+        select = [query['sql'] for query in queries if 'LIMIT' in query['sql']][0]
+        columns = select.split(' FROM ')[0]
+        self.assertEqual(columns.count(','), 3)  # id, title, slug, created_at
+        self.assertFalse([query for query in queries if 'taggit' in query['sql']])
+        project = self.client.get(f'/api/projects/{self.project.pk}/', {'omit': 'description,image'}).json()
+        self.assertNotIn('description', project)
+        self.assertEqual(project['title'], 'Portfolio')
+
+    def test_unknown_fields_are_rejected(self):
+        response = self.client.get('/api/skills/', {'fields': 'name,secret'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'fields': ['Unknown field: secret']})
+
+
+class FastSerializationTests(ContentTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.project.title = 'Café   "quoted" </script>'
+        self.project.save()
+        Project.objects.create(title='No links', description='x', image='', technologies='Go')
+        post = BlogPost.objects.create(
+            title='Ünïcode ✓ \u2028', slug='unicode', content='<p>x</p>', excerpt='Tab\there',
+            featured_image='blog/a b.jpg', published=True
+        )
+        post.tags.add('zeta', 'alpha')
+
+    def get(self, url, params, fast):
+        cache.clear()
+        with self.settings(API_FAST_SERIALIZATION=fast):
+            return self.client.get(url, params)
+
+    def assert_output_matches_drf(self):
+        cases = [
+            ('/api/projects/', {}), ('/api/projects/', {'count': 'true'}), ('/api/projects/', {'omit': 'image'}),
+            ('/api/skills/', {}), ('/api/blog/', {}), ('/api/blog/', {'fields': 'tags,title'}),
+        ]
+        for url, params in cases:
+            with self.subTest(url=url, params=params):
+                fast, drf = self.get(url, params, True), self.get(url, params, False)
+                self.assertEqual(fast.content, drf.content)
+                self.assertEqual(fast['Content-Type'], drf['Content-Type'])
+                self.assertEqual(fast.get('Vary'), drf.get('Vary'))
+
+    def test_output_matches_drf_byte_for_byte(self):
+        with patch('main.fast_serializers.orjson', None):
+            self.assert_output_matches_drf()
+
+    @skipUnless(fast_serializers.orjson, 'orjson is not installed')
+    def test_orjson_output_matches_drf_byte_for_byte(self):
+        self.assert_output_matches_drf()
+
+    def test_fast_path_reads_rows_not_models(self):
+        with patch('main.api.RowSerializer.serialize', wraps=lambda rows: []) as serialize:
+            self.get('/api/blog/', {}, True)
+        self.assertIsInstance(serialize.call_args.args[0][0], dict)
+        # The browsable API still goes through DRF
+        response = self.client.get('/api/blog/', HTTP_ACCEPT='text/html')
+        self.assertContains(response, 'Ünïcode')
+
+
+class ApiCacheTests(ContentTestCase):
+
+    def test_repeat_requests_need_no_queries(self):
+        for url in ('/api/projects/', f'/api/blog/{self.post.pk}/', '/api/skills/'):
+            with self.subTest(url=url):
+                first = self.client.get(url, {'omit': 'id', 'count': 'true'})
+                with self.assertNumQueries(0):
+                    second = self.client.get(url, {'count': 'true', 'omit': 'id'})
+                self.assertEqual(second.content, first.content)
+                self.assertEqual(second['Content-Type'], 'application/json')
+
+    def test_change_invalidates_cached_pages(self):
+        self.client.get('/api/projects/')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project.title = 'Renamed'
+            self.project.save()
+        self.assertEqual(self.client.get('/api/projects/').json()['results'][0]['title'], 'Renamed')
+
+    def test_parameters_and_browsable_api_are_not_shared(self):
+        self.assertEqual(list(self.client.get('/api/blog/', {'fields': 'slug'}).json()['results'][0]), ['slug'])
+        self.assertIn('title', self.client.get('/api/blog/').json()['results'][0])
+        self.client.get('/api/skills/')
+        response = self.client.get('/api/skills/', HTTP_ACCEPT='text/html')
+        self.assertTrue(response['Content-Type'].startswith('text/html'))
+
+    def test_unknown_parameters_are_not_part_of_the_key(self):
+        first = self.client.get('/api/projects/', {'x': 'random'})
+        self.assertNotIn(b'random', self.client.get('/api/projects/').content)
+        with self.assertNumQueries(0):
+            second = self.client.get('/api/projects/', {'x': 'other'})
+        self.assertEqual(second.json()['results'], first.json()['results'])
+
+
+class ExportTests(ContentTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+
+    def export(self, **params):
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('api_export'), params)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        return [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+
+    def test_staff_only(self):
+        self.assertIn(self.client.get(reverse('api_export')).status_code, (401, 403))
+
+    def test_every_object_is_a_line(self):
+        objects = self.export()
+        self.assertEqual(
+            [obj['model'] for obj in objects],
+            ['main.profile', 'main.project', 'main.skill', 'main.testimonial', 'main.blogpost'],
+        )
+        post = objects[-1]
+        self.assertEqual(post['pk'], self.post.pk)
+        self.assertEqual(post['fields']['tags'], ['django', 'python'])
+        self.assertEqual(post['fields']['content'], '<p>Hello world</p>')
+
+    def test_since_exports_later_changes(self):
+        later = timezone.now() + timedelta(seconds=1)
+        with patch('django.utils.timezone.now', return_value=later + timedelta(seconds=1)):
+            self.project.save()
+        objects = self.export(since=later.isoformat(), models='project,blogpost')
+        self.assertEqual([(obj['model'], obj['pk']) for obj in objects], [('main.project', self.project.pk)])
+        self.assertEqual(self.client.get(reverse('api_export'), {'since': 'yesterday'}).status_code, 400)
+
+    def test_command_streams_in_chunks(self):
+        for i in range(5):
+            Skill.objects.create(name=f'Skill {i}', proficiency=50, category='Backend')
+        output, errors = StringIO(), StringIO()
+        with CaptureQueriesContext(connection) as queries:
+            call_command('export_content', models='skill', chunk_size=2, stdout=output, stderr=errors)
+        self.assertEqual(len(output.getvalue().splitlines()), 6)
+        self.assertIn('Exported 6 objects', errors.getvalue())
+        self.assertEqual(len([query for query in queries if 'main_skill' in query['sql']]), 1)
+
+
+class ImportTests(ContentTestCase):
+
+    def import_file(self, name, content, **options):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, name)
+        with open(path, 'w', encoding='utf-8') as handle:
+            handle.write(content)
+        output = StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('import_content', path, stdout=output, **options)
+        return output.getvalue()
+
+    def test_export_round_trip(self):
+        export = StringIO()
+        call_command('export_content', stdout=export, stderr=StringIO())
+        created_at = self.post.created_at
+        BlogPost.objects.all().delete()
+        Project.objects.all().delete()
+        output = self.import_file('content.ndjson', export.getvalue())
+        self.assertIn('Imported 5 objects', output)
+        post = BlogPost.objects.get(pk=self.post.pk)
+        self.assertEqual(post.created_at, created_at)
+        self.assertEqual(sorted(post.tags.names()), ['django', 'python'])
+        self.assertEqual(post.content_html, '<p>Hello world</p>')
+        self.assertTrue(Project.objects.filter(pk=self.project.pk, title='Portfolio').exists())
+        self.assertEqual(self.client.get(reverse('search'), {'q': 'portfolio'}).status_code, 200)
+
+    def test_csv_upserts_posts_by_slug(self):
+        content = (
+            'slug,title,content,excerpt,published,tags\n'
+            'hello,Hello again,<h2>New</h2>,Updated,true,"news, django"\n'
+            'second,Second,<p>Two</p>,Two,false,\n'
+        )
+        with patch('main.signals.index_object') as index_object, patch('main.importer.bump_generation_on_commit') as bump:
+            self.import_file('posts.csv', content, model='blogpost')
+        index_object.assert_not_called()
+        bump.assert_called_once_with(BlogPost)
+        self.assertEqual(BlogPost.objects.count(), 2)
+        post = BlogPost.objects.get(slug='hello')
+        self.assertEqual((post.pk, post.title, post.created_at), (self.post.pk, 'Hello again', self.post.created_at))
+        self.assertEqual(post.toc, [{'level': 2, 'id': 'new', 'title': 'New'}])
+        self.assertEqual(sorted(post.tags.names()), ['django', 'news'])
+        self.assertFalse(BlogPost.objects.get(slug='second').published)
+
+    def test_invalid_rows_are_reported(self):
+        with self.assertRaisesMessage(CommandError, 'Line 2:'):
+            self.import_file('skills.ndjson', '{"model": "main.skill", "fields": {"name": "Go"}}\n'
+                             '{"model": "main.skill", "fields": {"proficiency": "lots"}}\n')
+        with self.assertRaisesMessage(CommandError, 'Unknown model: main.user'):
+            self.import_file('users.ndjson', '{"model": "main.user", "fields": {}}\n')
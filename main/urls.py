@@ -1,7 +1,8 @@
 from django.urls import path, include
 from . import views
 from rest_framework.routers import DefaultRouter
-from .api import ProjectViewSet, SkillViewSet, BlogPostViewSet
+from .api import ProjectViewSet, SkillViewSet, BlogPostViewSet, ContactView, ExportView
+from .feeds import LatestPostsFeed, AtomLatestPostsFeed
 from django.conf import settings  # Add this import
 from django.conf.urls.static import static  # Add this import
 
@@ -15,9 +16,17 @@ urlpatterns = [
     path('projects/', views.projects, name='projects'),
     path('projects/<int:project_id>/', views.project_detail, name='project_detail'),
     path('blog/', views.blog, name='blog'),
+    # Before blog_post, whose slug would match "feed"
+    path('blog/feed/', LatestPostsFeed(), name='feed_rss'),
+    path('blog/feed/atom/', AtomLatestPostsFeed(), name='feed_atom'),
     path('blog/<slug:slug>/', views.blog_post, name='blog_post'),
+    path('sitemap.xml', views.sitemap_index, name='sitemap'),
+    path('sitemap-<slug:section>.xml', views.sitemap_section, name='sitemap_section'),
     path('search/', views.search, name='search'),
+    path('api/search/suggest', views.search_suggest, name='search_suggest'),
     path('contact/', views.contact, name='contact'),
+    path('api/contact/', ContactView.as_view(), name='api_contact'),
+    path('api/export/', ExportView.as_view(), name='api_export'),
     path('', include(router.urls)),
 ]
 
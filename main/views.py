@@ -1,76 +1,50 @@
 from django.shortcuts import render, get_object_or_404, redirect
-from django.http import JsonResponse
-from django.core.mail import send_mail
-from django.conf import settings
-from django.core.cache import cache
+from django.urls import reverse
+from django.http import Http404, JsonResponse
 from django.core.paginator import Paginator
-from django.db.models import Q
 from django.views.decorators.http import require_http_methods
 from django.contrib import messages
-import time
-from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 from django.views.decorators.cache import never_cache
 
-from .models import Profile, Project, Skill, Testimonial, BlogPost, ContactMessage
+from .models import Profile, Project, Skill, Testimonial, BlogPost
 from .forms import ContactForm
+from .contact import submit_contact
+from .ratelimit import ratelimit_contact
+from .pagination import KeysetPaginator
+from .search import search_documents
+from .suggest import suggest
+from .cache import get_content, cache_page_by_generation, conditional_by_generation
+from .generated import serve_generated
+from .sitemap import SITEMAPS, SITEMAP_MODELS, write_index
+
 @never_cache
+@ratelimit_contact
 def index(request):
-    profile = cache.get('profile')
-    if not profile:
-        profile = Profile.objects.first()
-        cache.set('profile', profile, 60*60*24)
-    
-    featured_projects = cache.get('featured_projects')
-    if not featured_projects:
-        featured_projects = Project.objects.filter(featured=True)[:3]
-        cache.set('featured_projects', featured_projects, 60*60*12)
-    
-    skills = Skill.objects.all()
-    testimonials = Testimonial.objects.filter(featured=True)[:3]
-    latest_posts = BlogPost.objects.filter(published=True)[:3]
+    profile = get_content('profile', [Profile], Profile.objects.first)
+    featured_projects = get_content(
+        'featured_projects', [Project],
+        lambda: list(Project.objects.filter(featured=True).order_by('-date_created')[:3])
+    )
+    skills = get_content('skills', [Skill], lambda: list(Skill.objects.order_by('category', 'id')))
+    testimonials = get_content(
+        'featured_testimonials', [Testimonial],
+        lambda: list(Testimonial.objects.filter(featured=True).order_by('-created_at')[:3])
+    )
+    latest_posts = get_content(
+        'latest_posts', [BlogPost],
+        lambda: list(BlogPost.objects.published_with_tags()[:3])
+    )
     
     # Handle contact form submission if it's a POST request
     if request.method == 'POST' and 'name' in request.POST:
         form = ContactForm(request.POST)
         if form.is_valid():
-            # Save to database
-            ContactMessage.objects.create(
-                name=form.cleaned_data['name'],
-                email=form.cleaned_data['email'],
-                subject=form.cleaned_data['subject'],
-                message=form.cleaned_data['message']
-            )
-            
-            # Send email notification
-            if settings.EMAIL_HOST_USER and settings.EMAIL_HOST_PASSWORD:
-                try:
-                    email_subject = f"Portfolio Contact: {form.cleaned_data['subject']}"
-                    email_message = f"""
-                    New message from your portfolio contact form:
-                    
-                    Name: {form.cleaned_data['name']}
-                    Email: {form.cleaned_data['email']}
-                    Subject: {form.cleaned_data['subject']}
-                    
-                    Message:
-                    {form.cleaned_data['message']}
-                    
-                    Sent: {time.strftime('%Y-%m-%d %H:%M:%S')}
-                    """
-                    
-                    send_mail(
-                        email_subject,
-                        email_message,
-                        settings.DEFAULT_FROM_EMAIL,
-                        [settings.DEFAULT_FROM_EMAIL],
-                        fail_silently=False,
-                    )
-                except Exception as e:
-                    print(f"Email sending failed: {e}")
+            # Store the message and queue its notification email
+            submit_contact(form.cleaned_data)
             
             # Add success message
             messages.success(request, 'Your message has been sent successfully! I will get back to you soon.')
-            return redirect('index#contact')
+            return redirect(reverse('index') + '#contact')
         else:
             messages.error(request, 'Please correct the errors below.')
     else:
@@ -85,31 +59,14 @@ def index(request):
         'form': form
     })
 
-# Add a signal to clear cache when profile is updated
-from django.db.models.signals import post_save
-from django.dispatch import receiver
-
-@receiver(post_save, sender=Profile)
-def clear_profile_cache(sender, instance, **kwargs):
-    """Clear cache when profile is updated"""
-    cache.delete('profile')
-    # You might want to clear other caches that include profile data
-
+@conditional_by_generation(Project)
+@cache_page_by_generation(Project)
 def projects(request):
-    all_projects = Project.objects.all().order_by('-date_created')
+    all_projects = Project.objects.all()
     
-    # Pagination
-    paginator = Paginator(all_projects, 6)  # Show 6 projects per page
-    page = request.GET.get('page')
-    
-    try:
-        projects = paginator.page(page)
-    except PageNotAnInteger:
-        # If page is not an integer, deliver first page
-        projects = paginator.page(1)
-    except EmptyPage:
-        # If page is out of range, deliver last page of results
-        projects = paginator.page(paginator.num_pages)
+    # Keyset pagination: deep pages cost the same as the first one
+    paginator = KeysetPaginator(all_projects, 6, ordering=('-date_created', '-id'))  # Show 6 projects per page
+    projects = paginator.page(request.GET.get('cursor'))
     
     context = {
         'projects': projects,
@@ -117,81 +74,77 @@ def projects(request):
     }
     return render(request, 'main/projects.html', context)
 
+@conditional_by_generation(Project)
+@cache_page_by_generation(Project)
 def project_detail(request, project_id):
     project = get_object_or_404(Project, id=project_id)
     context = {'project': project}
     return render(request, 'main/project_detail.html', context)
 
+@conditional_by_generation(BlogPost)
+@cache_page_by_generation(BlogPost)
 def blog(request):
-    posts = BlogPost.objects.filter(published=True).order_by('-created_at')
-    paginator = Paginator(posts, 5)  # Show 5 posts per page
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # The list shows excerpts; leave the post bodies in the database
+    posts = BlogPost.objects.published_with_tags().defer('content', 'content_html', 'toc')
+    paginator = KeysetPaginator(posts, 5, ordering=('-created_at', '-id'))  # Show 5 posts per page
+    page_obj = paginator.page(request.GET.get('cursor'))
     return render(request, 'main/blog.html', {'page_obj': page_obj})
 
+@conditional_by_generation(BlogPost)
+@cache_page_by_generation(BlogPost)
 def blog_post(request, slug):
-    post = get_object_or_404(BlogPost, slug=slug, published=True)
+    post = get_object_or_404(BlogPost.objects.published_with_tags(), slug=slug)
     return render(request, 'main/blog_post.html', {'post': post})
 
+@conditional_by_generation(Project, BlogPost, Skill)
+@cache_page_by_generation(Project, BlogPost, Skill)
 def search(request):
-    query = request.GET.get('q')
-    results = []
+    query = request.GET.get('q', '').strip()
+    page_obj = None
     if query:
-        results = Project.objects.filter(
-            Q(title__icontains=query) | 
-            Q(description__icontains=query) |
-            Q(technologies__icontains=query)
-        )
-    return render(request, 'main/search.html', {'results': results, 'query': query})
+        paginator = Paginator(search_documents(query), 10)  # Show 10 results per page
+        page_obj = paginator.get_page(request.GET.get('page'))
+    return render(request, 'main/search.html', {'results': page_obj, 'page_obj': page_obj, 'query': query})
+
+@require_http_methods(["GET", "HEAD"])
+@conditional_by_generation(*SITEMAP_MODELS)
+def sitemap_index(request):
+    base_url = f'{request.scheme}://{request.get_host()}'
+    return serve_generated(
+        request, 'sitemap', SITEMAP_MODELS,
+        lambda handle: write_index(handle, base_url), content_type='application/xml',
+    )
+
+@require_http_methods(["GET", "HEAD"])
+@conditional_by_generation(*SITEMAP_MODELS)
+def sitemap_section(request, section):
+    sitemap = SITEMAPS.get(section)
+    page = request.GET.get('p', '1')
+    if sitemap is None or not page.isdigit() or int(page) < 1:
+        raise Http404('No such sitemap')
+    base_url = f'{request.scheme}://{request.get_host()}'
+    return serve_generated(
+        request, f'sitemap-{section}-{int(page)}', sitemap.models,
+        lambda handle: sitemap.write_page(handle, int(page), base_url), content_type='application/xml',
+    )
+
+@require_http_methods(["GET"])
+def search_suggest(request):
+    query = request.GET.get('q', '')[:100]
+    response = JsonResponse({'query': query, 'suggestions': suggest(query)})
+    response['Cache-Control'] = 'public, max-age=60'
+    return response
 
 @require_http_methods(["GET", "POST"])
+@ratelimit_contact
 def contact(request):
     profile = Profile.objects.first()
     
     if request.method == 'POST':
         form = ContactForm(request.POST)
         if form.is_valid():
-            # Get form data
-            name = form.cleaned_data['name']
-            email = form.cleaned_data['email']
-            subject = form.cleaned_data['subject']
-            message = form.cleaned_data['message']
-            
-            # Save to database
-            ContactMessage.objects.create(
-                name=name,
-                email=email,
-                subject=subject,
-                message=message
-            )
-            
-            # Send email notification
-            if settings.EMAIL_HOST_USER and settings.EMAIL_HOST_PASSWORD:
-                try:
-                    email_subject = f"Portfolio Contact: {subject}"
-                    email_message = f"""
-                    New message from your portfolio contact form:
-                    
-                    Name: {name}
-                    Email: {email}
-                    Subject: {subject}
-                    
-                    Message:
-                    {message}
-                    
-                    Sent: {time.strftime('%Y-%m-%d %H:%M:%S')}
-                    """
-                    
-                    send_mail(
-                        email_subject,
-                        email_message,
-                        settings.DEFAULT_FROM_EMAIL,
-                        [settings.DEFAULT_FROM_EMAIL],  # Send to yourself
-                        fail_silently=False,
-                    )
-                except Exception as e:
-                    # Log error but don't break the form submission
-                    print(f"Email sending failed: {e}")
+            # Store the message and queue its notification email
+            submit_contact(form.cleaned_data)
             
             # Add success message
             messages.success(request, 'Your message has been sent successfully! I will get back to you soon.')
@@ -29,8 +29,9 @@ INSTALLED_APPS = [
     'django.contrib.contenttypes',
     'django.contrib.sessions',
     'django.contrib.messages',
-    'django.contrib.staticfiles',
+    # Before staticfiles, so main's collectstatic (which bundles assets) is used
     'main',
+    'django.contrib.staticfiles',
     'django_summernote',
     'taggit',
     'rest_framework',
@@ -149,6 +150,11 @@ USE_TZ = True
 STATIC_URL = '/static/'
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+# Hashed, precompressed static files; see main/assets.py for the bundles
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'main.storage.StaticFilesStorage'},
+}
 
 # Media files
 MEDIA_URL = '/media/'
@@ -183,10 +189,29 @@ SERVER_EMAIL = 'wisdombesong123@gmail.com'
 if DEBUG:
     EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 
+# Processes resizing uploaded images in each web worker; 0 resizes inline
+IMAGE_WORKERS = int(os.environ.get('IMAGE_WORKERS', 1))
+
+# Contact submissions are written in batches of this size, or this many
+# seconds after the first buffered one. The default of 1 writes each one
+# before responding; buffered submissions are lost if a worker is killed
+CONTACT_FLUSH_SIZE = int(os.environ.get('CONTACT_FLUSH_SIZE', 1))
+CONTACT_FLUSH_INTERVAL = float(os.environ.get('CONTACT_FLUSH_INTERVAL', 1.0))
+
+# Contact submissions allowed per client IP and per sender address
+CONTACT_RATE_PER_IP = os.environ.get('CONTACT_RATE_PER_IP', '5/h')
+CONTACT_RATE_PER_EMAIL = os.environ.get('CONTACT_RATE_PER_EMAIL', '3/h')
+
 REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
-    'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend']
+    'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend'],
+    'DEFAULT_THROTTLE_CLASSES': ['main.ratelimit.SlidingWindowThrottle'],
+    'DEFAULT_THROTTLE_RATES': {'api': os.environ.get('API_RATE', '120/m')},
+    # Proxies in front of the app that append the client address to
+    # X-Forwarded-For (1 on Render); with 0 the header is ignored, as any
+    # client can set it
+    'NUM_PROXIES': int(os.environ.get('NUM_PROXIES', 0)),
 }
 
 USE_I18N = True
@@ -201,10 +226,14 @@ LOCALE_PATHS = [
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 
+# Cache shared by all gunicorn workers (see main/cache_backends.py)
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'unique-snowflake',
+        'BACKEND': 'main.cache_backends.SQLiteCache',
+        'LOCATION': os.environ.get('CACHE_LOCATION', os.path.join(BASE_DIR, 'cache', 'cache.sqlite3')),
+        'OPTIONS': {
+            'MAX_ENTRIES': 5000,
+        },
     }
 }
 
@@ -162,6 +162,81 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     });
 
+    // Search suggestions
+    document.querySelectorAll('input[data-suggest-url]').forEach(input => {
+        const list = document.createElement('div');
+        list.className = 'suggestions';
+        list.hidden = true;
+        input.parentNode.appendChild(list);
+
+        let timer = null;
+        let active = -1;
+        let controller = null;
+
+        const render = (suggestions) => {
+            list.innerHTML = '';
+            active = -1;
+            suggestions.forEach(suggestion => {
+                const link = document.createElement('a');
+                link.href = suggestion.url;
+                link.textContent = suggestion.label;
+                const kind = document.createElement('small');
+                kind.textContent = suggestion.kind;
+                link.appendChild(kind);
+                list.appendChild(link);
+            });
+            list.hidden = suggestions.length === 0;
+        };
+
+        const setActive = (index) => {
+            const links = list.querySelectorAll('a');
+            links.forEach(link => link.classList.remove('active'));
+            if (links.length) {
+                active = (index + links.length) % links.length;
+                links[active].classList.add('active');
+            }
+        };
+
+        input.addEventListener('input', () => {
+            clearTimeout(timer);
+            const query = input.value.trim();
+            if (!query) {
+                render([]);
+                return;
+            }
+            timer = setTimeout(() => {
+                if (controller) {
+                    controller.abort();
+                }
+                controller = new AbortController();
+                fetch(`${input.dataset.suggestUrl}?q=${encodeURIComponent(query)}`, { signal: controller.signal })
+                    .then(response => response.json())
+                    .then(data => render(data.suggestions))
+                    .catch(() => {});
+            }, 120);
+        });
+
+        input.addEventListener('keydown', (e) => {
+            if (list.hidden) {
+                return;
+            }
+            if (e.key === 'ArrowDown' || e.key === 'ArrowUp') {
+                e.preventDefault();
+                setActive(active + (e.key === 'ArrowDown' ? 1 : -1));
+            } else if (e.key === 'Enter' && active >= 0) {
+                e.preventDefault();
+                window.location.href = list.querySelectorAll('a')[active].href;
+            } else if (e.key === 'Escape') {
+                list.hidden = true;
+            }
+        });
+
+        input.addEventListener('blur', () => {
+            // Let clicks on a suggestion land before hiding the list
+            setTimeout(() => { list.hidden = true; }, 150);
+        });
+    });
+
     // Close alert messages after 5 seconds
     const alerts = document.querySelectorAll('.alert');
     alerts.forEach(alert => {